@@ -1,7 +1,9 @@
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 import pandas as pd
 from dotenv import load_dotenv
@@ -11,177 +13,333 @@ from tavily import TavilyClient
 # Add parent directory to path so we can import execution.utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from execution.utils import load_config, DataManager, get_bucket_queries, logger
+from execution.utils import load_config, config_list, DataManager, get_bucket_queries, logger
+from execution import replay
+from execution.url_canon import url_key, frame_keys
+from execution.search_cache import SearchCache
+from execution.query_scheduler import QueryScheduler
+from execution.run_state import RunState, run_stage
+from execution.feeds import FeedPoller, load_feeds
+from execution.domain_stats import DomainFetchStats
+from execution.dates import normalize_date
+from execution.article_store import ArticleStore
+from execution.search_providers import (
+    SearchProvider, SearchResult, TavilyProvider, DDGProvider, FeedProvider, CompositeProvider,
+)
 
 OUTPUT_TAB = "raw_candidates"
+BUCKETS = ["upstream", "general", "ai_automation", "regulation"]
 
-def run_sourcing(force=False):
+BLOCKED_DOMAINS = [
+    "businesswire.com",
+    "prnewswire.com",
+    "globenewswire.com",
+    "accesswire.com"
+]
+
+def _fan_out(jobs: List[Tuple[str, str]], search_fn: Callable[[str], SearchResult], max_workers: int) -> Dict[Tuple[str, str], SearchResult]:
+    """Runs all (bucket, query) searches concurrently. Failed queries are left out of the result."""
+    results: Dict[Tuple[str, str], SearchResult] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(search_fn, q): (lane, q) for lane, q in jobs}
+        for fut in as_completed(futures):
+            lane, q = futures[fut]
+            try:
+                results[(lane, q)] = fut.result()
+                logger.info(f"Query done [{lane}]: {q} ({len(results[(lane, q)][0])} results)")
+            except Exception as e:
+                logger.error(f"Search failed for '{q}': {e}")
+    return results
+
+def _build_search_provider(config: Dict, tavily_client: Optional[TavilyClient], ddgs: DDGS, cache: SearchCache,
+                           feed_provider: Optional[FeedProvider], max_workers: int) -> SearchProvider:
+    """Providers from SEARCH_PROVIDERS (in order), combined per SEARCH_PROVIDER_MODE when there are several."""
+    available = {
+        "TAVILY": TavilyProvider(
+            tavily_client, cache,
+            article_store=ArticleStore.from_config(config) if config.get("TAVILY_RAW_CONTENT", True) else None,
+            min_chars=int(config.get("EXTRACT_MIN_CHARS", 400)),
+            max_in_flight=int(config.get("SEARCH_CONCURRENCY_TAVILY", 4)),
+        ) if tavily_client else None,
+        "DDG": DDGProvider(ddgs, cache, max_in_flight=int(config.get("SEARCH_CONCURRENCY_DDG", 4))),
+        "FEEDS": feed_provider,
+    }
+    names = config_list(config.get("SEARCH_PROVIDERS", "TAVILY, DDG"))
+    providers = [available[n.upper()] for n in names if available.get(n.upper())]
+    if not providers:
+        providers = [available["DDG"]]
+    if len(providers) == 1:
+        return providers[0]
+    return CompositeProvider(
+        providers,
+        mode=str(config.get("SEARCH_PROVIDER_MODE", "FAILOVER")),
+        timeout=config.get("SEARCH_PROVIDER_TIMEOUT_SECONDS", 20),
+        max_workers=max_workers,
+    )
+
+def _build_candidate(lane: str, item: Dict) -> Optional[Dict]:
+    """Applies blocked-domain and lane guardrails; returns a raw_candidates row or None."""
+    url = item.get("url")
+
+    # Blocked Domains
+    if any(dom in url for dom in BLOCKED_DOMAINS):
+        return None
+
+    # AI Guardrail 
+    if lane == "ai_automation":
+        combined = ((item.get("title") or "") + " " + (item.get("snippet") or "")).lower()
+        if "ai" not in combined and "intelligence" not in combined and "automation" not in combined:
+            return None
+
+    # Derive Source Name
+    try:
+        domain = urlparse(url).netloc
+        # Strip www. and .com roughly for display
+        source_name = domain.replace('www.', '').split('.')[0].title()
+    except:
+        source_name = "Unknown"
+
+    return {
+        "bucket": lane,
+        "title": item.get("title"),
+        "source_name": source_name,
+        "url": url,
+        "snippet": item.get("snippet"),
+        "source_date": normalize_date(item.get("date")) or item.get("date"),
+        "image_url": item.get("image") or "",
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+def _last_write_from_history(df_existing: pd.DataFrame) -> Optional[datetime]:
+    """Newest `timestamp` in raw_candidates (used once, to seed the run-state key)."""
+    if df_existing.empty:
+        return None
+    if 'timestamp' not in df_existing.columns:
+        logger.warning("'timestamp' column missing from existing data.")
+        return None
+    try:
+        # Assuming timestamp format matches what we save: ISO 8601
+        timestamps = pd.to_datetime(df_existing['timestamp'], utc=True, errors='coerce')
+        last_run_time = timestamps.max()
+        logger.info(f"Max timestamp found: {last_run_time}")
+    except Exception as e:
+        logger.warning(f"Could not parse timestamps: {e}")
+        return None
+    if pd.isna(last_run_time):
+        return None
+    return last_run_time.to_pydatetime()
+
+def run_sourcing(force=False, use_cache=True):
+    """Returns run counts, or None when skipped by the frequency check."""
     config = load_config()
     run_size = config.get("RUN_SIZE", "TEST")
     target_total = config.get(f"CANDIDATE_LINKS_TOTAL_{run_size}", 10)
     freq_hours = config.get("SOURCE_NEWS_FREQUENCY_HOURS", 24)
+    window_max_days = config.get("SEARCH_WINDOW_MAX_DAYS", 7)
     
     logger.info(f"Starting Sourcing. Mode: {run_size}, Target Total: {target_total}, Freq Check: {freq_hours}h")
 
-    # 0. Load Existing Data for Checks
+    # Run state: last raw_candidates write, per-query watermarks, feed validators
+    run_state = RunState()
     dm = DataManager()
-    df_existing = dm.read_data(OUTPUT_TAB)
-    existing_urls = set()
-    last_run_time = None
-    
-    if not df_existing.empty:
-        if 'url' in df_existing.columns:
-            existing_urls = set(df_existing['url'].dropna().astype(str))
-            
-        if 'timestamp' in df_existing.columns:
-            try:
-                # Assuming timestamp format matches what we save: ISO 8601
-                # We need to parse max timestamp
-                logger.info(f"Checking timestamps. Sample: {df_existing['timestamp'].head(1).values}")
-                timestamps = pd.to_datetime(df_existing['timestamp'], utc=True, errors='coerce')
-                last_run_time = timestamps.max()
-                logger.info(f"Max timestamp found: {last_run_time}")
-            except Exception as e:
-                logger.warning(f"Could not parse timestamps: {e}")
-        else:
-            logger.warning("'timestamp' column missing from existing data.")
 
-    # 1. Frequency Check
+    # 1. Frequency Check (one run-state lookup; the tab is scanned only to bootstrap the key)
+    df_existing = None
+    last_run_time = run_state.last_output_at(OUTPUT_TAB)
+    if last_run_time is None:
+        df_existing = dm.read_data(OUTPUT_TAB)
+        last_run_time = _last_write_from_history(df_existing)
+        if last_run_time is not None:
+            run_state.set_output_time(OUTPUT_TAB, last_run_time)
+            run_state.save()
+
     if last_run_time and not force:
-        now = datetime.now(timezone.utc)
-        # Ensure last_run_time is timezone aware if now is (it should be from utils)
-        if last_run_time.tzinfo is None:
-             last_run_time = last_run_time.replace(tzinfo=timezone.utc)
-             
-        diff = now - last_run_time
+        diff = replay.now() - last_run_time
         if diff < timedelta(hours=freq_hours):
             logger.info(f"Last run was {diff} ago (Limit: {freq_hours}h). Skipping sourcing. Use --force to override.")
-            return
+            return None
+
+    # 0. Load Existing Data for Dedupe
+    if df_existing is None:
+        df_existing = dm.read_data(OUTPUT_TAB)
+    existing_keys = set()
+    if not df_existing.empty and 'url' in df_existing.columns:
+        existing_keys = set(frame_keys(df_existing)) - {""}
 
     # 2. Sourcing Logic
-    buckets = ["upstream", "general", "ai_automation", "regulation"]
     candidates = []
     
     # Simple distribution of target total
-    limit_per_bucket = max(1, target_total // len(buckets))
+    limit_per_bucket = max(1, target_total // len(BUCKETS))
 
-    # Setup Clients
+    # Setup Clients (one shared session per provider for the whole fan-out)
     tavily_key = os.getenv("TAVILY_API_KEY")
     use_paid = config.get("PAID_APIS_DEFAULT_ALLOWED", False)
     
     tavily_client = None
-    if tavily_key and use_paid:
-        tavily_client = TavilyClient(api_key=tavily_key)
+    if (tavily_key or replay.is_replaying()) and use_paid:
+        # Replays never reach Tavily, so the key may be absent.
+        tavily_client = TavilyClient(api_key=tavily_key or "replay")
     else:
         logger.info("Paid APIs not enabled by default. Falling back to DDG.")
 
-    blocked_domains = [
-        "businesswire.com",
-        "prnewswire.com",
-        "globenewswire.com",
-        "accesswire.com"
-    ]
+    # Queries in flight follow the primary provider (Tavily when allowed, else DDG); each
+    # provider still caps its own live calls, so a failover to DDG stays at its limit
+    primary = "tavily" if tavily_client else "ddg"
+    max_workers = int(config.get(f"SEARCH_CONCURRENCY_{primary.upper()}", 4))
+
+    cache = SearchCache(
+        ttl_hours=config.get("SEARCH_CACHE_TTL_HOURS", 6),
+        enabled=use_cache and config.get("SEARCH_CACHE", True),
+    )
+    scheduler = None
+    if config.get("QUERY_SCHEDULER", True):
+        scheduler = QueryScheduler(
+            backoff_hours=config.get("QUERY_BACKOFF_HOURS", 24),
+            backoff_max_days=config.get("QUERY_BACKOFF_MAX_DAYS", 14),
+        )
+    # Per-query watermarks turn into provider time filters (first run: SEARCH_WINDOW_MAX_DAYS)
 
-    for lane in buckets:
-        logger.info(f"Searching bucket: {lane}")
+    # Per-lane plan: best expected yield first, duplicate-only queries rested.
+    # Without the scheduler every query runs in a single wave.
+    pending = {}
+    for lane in BUCKETS:
         queries = get_bucket_queries(lane)
-        
-        bucket_candidates = []
-        
-        for q in queries:
-            if len(bucket_candidates) >= limit_per_bucket:
-                break
-                
-            logger.info(f"Query: {q}")
+        pending[lane] = scheduler.plan(lane, queries) if scheduler else queries
+
+    bucket_candidates = {lane: [] for lane in BUCKETS}
+    seen_keys = set()
+    quota_cut_keys = set()  # new results turned away by a full lane (feed entries stay unseen)
+    paid_searches = 0
+
+    # Full-text fetch history from step 02: results from domains that rarely yield text go last,
+    # and domains that practically never do are skipped
+    fetch_stats = DomainFetchStats.from_config(config)
+
+    def take(lane: str, items: List[Dict], query: str) -> Tuple[int, int]:
+        """Adds items to a lane (dedupe + quota + guardrails). Returns how many were new to
+        history, and how many new ones the full lane quota turned away."""
+        net_new = 0
+        quota_cut = 0
+        items = sorted(items, key=lambda i: fetch_stats.weak(i.get("url") or ""))
+        for item in items:
+            url = item.get("url")
+            if not url: continue
+            key = url_key(url)
             
-            items = []
-            try:
-                if tavily_client:
-                    # Tavily
-                    resp = tavily_client.search(query=q, search_depth="basic", max_results=5)
-                    results = resp.get("results", [])
-                    # map to standard dict
-                    for r in results:
-                        items.append({
-                            "title": r.get("title"),
-                            "url": r.get("url"),
-                            "snippet": r.get("content"),
-                            "date": r.get("published_date") # Tavily might provide
-                        })
-                else:
-                    # DuckDuckGo
-                    # Note: DDG python lib changes often. Using DDGS context manager
-                    with DDGS() as ddgs:
-                        ddg_gen = ddgs.news(q, max_results=5)
-                        if ddg_gen:
-                            for r in ddg_gen:
-                                items.append({
-                                    "title": r.get("title"),
-                                    "url": r.get("url"), # DDG uses 'url' or 'link'? usually 'url' or 'href'
-                                    "snippet": r.get("body"),
-                                    "date": r.get("date")
-                                })
-            except Exception as e:
-                logger.error(f"Search failed for '{q}': {e}")
+            # Check Global Dedupe (Historical)
+            if key in existing_keys:
+                # logger.debug(f"Skipping duplicate URL: {url}")
                 continue
+            net_new += 1
 
-            # Filter candidates
-            for item in items:
-                url = item.get("url")
-                if not url: continue
-                
-                # Dedupe within this run
-                if any(c['url'] == url for c in candidates): continue
-                if any(c['url'] == url for c in bucket_candidates): continue
-                
-                # Check Global Dedupe (Historical)
-                if url in existing_urls:
-                    # logger.debug(f"Skipping duplicate URL: {url}")
-                    continue
+            # Dedupe within this run (across all buckets)
+            if key in seen_keys: continue
+            if len(bucket_candidates[lane]) >= limit_per_bucket:
+                quota_cut += 1
+                quota_cut_keys.add(key)
+                continue
+            if fetch_stats.unfetchable(url):
+                logger.info(f"Skipping unfetchable domain: {url}")
+                continue
+
+            candidate = _build_candidate(lane, item)
+            if not candidate:
+                continue
+            candidate["url_key"] = key
+            candidate["search_query"] = query
+            seen_keys.add(key)
+            bucket_candidates[lane].append(candidate)
+        return net_new, quota_cut
+
+    # Feeds first: they are free, and whatever they fill reduces the searches needed below
+    feed_provider = None
+    feeds = load_feeds() if config.get("FEED_SOURCING", True) else []
+    if feeds:
+        feed_provider = FeedProvider(FeedPoller(run_state), feeds, max_workers=int(config.get("FEED_CONCURRENCY", 8)))
+        feed_items = feed_provider.entries()
+        for item in feed_items:
+            if item.get("bucket") not in BUCKETS:
+                item["bucket"] = "general"
+        for lane in BUCKETS:
+            take(lane, [i for i in feed_items if i["bucket"] == lane], "")
 
-                # Blocked Domains
-                if any(dom in url for dom in blocked_domains):
+    with DDGS() as ddgs:
+        search_provider = _build_search_provider(config, tavily_client, ddgs, cache, feed_provider, max_workers)
+        provider = search_provider.name
+        search_fn = lambda q: search_provider.timed_search(q, run_state.window_days(provider, q, window_max_days))
+
+        wave = 0
+        while True:
+            # Each wave fans out just enough queries per unfilled lane to reach its quota
+            jobs = []
+            for lane in BUCKETS:
+                needed = limit_per_bucket - len(bucket_candidates[lane])
+                if needed <= 0 or not pending[lane]:
                     continue
+                if scheduler:
+                    batch, pending[lane] = scheduler.wave(pending[lane], needed)
+                else:
+                    batch, pending[lane] = pending[lane], []
+                jobs.extend((lane, q) for q in batch)
+            if not jobs:
+                break
+
+            wave += 1
+            logger.info(f"Wave {wave}: running {len(jobs)} queries concurrently via {provider} (max {max_workers} in flight).")
+            results = _fan_out(jobs, search_fn, max_workers)
+
+            # Merge in lane/plan order; quotas and dedupe are applied here
+            for lane, q in jobs:
+                if (lane, q) not in results:
+                    continue  # failed: no watermark or scheduler update, retried next run
+                items, cached = results[(lane, q)]
+                net_new, quota_cut = take(lane, items, q)
+
+                if not cached:
+                    paid_searches += 1
+                    # A watermark past stories the quota turned away would narrow the next
+                    # search beyond them for good: keep the window until they are consumed
+                    if quota_cut:
+                        logger.info(f"Watermark for '{q}' kept: {quota_cut} new results did not fit the {lane} quota.")
+                    else:
+                        run_state.update_watermark(provider, q, [item.get("date") for item in items])
+                    if scheduler:
+                        scheduler.record_search(q, len(items), net_new)
 
-                # AI Guardrail 
-                if lane == "ai_automation":
-                    combined = (item.get("title", "") + " " + item.get("snippet", "")).lower()
-                    if "ai" not in combined and "intelligence" not in combined and "automation" not in combined:
-                         continue
-
-                # Derive Source Name
-                try:
-                    domain = urlparse(url).netloc
-                    # Strip www. and .com roughly for display
-                    source_name = domain.replace('www.', '').split('.')[0].title()
-                except:
-                    source_name = "Unknown"
-
-                candidate = {
-                    "bucket": lane,
-                    "title": item.get("title"),
-                    "source_name": source_name,
-                    "url": url,
-                    "snippet": item.get("snippet"),
-                    "source_date": item.get("date"),
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }
-                bucket_candidates.append(candidate)
-                
-                if len(bucket_candidates) >= limit_per_bucket:
-                    break
-        
-        candidates.extend(bucket_candidates)
+        search_provider.log_stats()
+        search_provider.close()
+
+    if feed_provider:
+        # Entries no lane took are left unseen, so the next poll returns them again
+        feed_provider.commit(e for e in feed_provider.entries()
+                             if url_key(e["url"]) in quota_cut_keys and url_key(e["url"]) not in seen_keys)
+
+    cache.log_stats()
+    if scheduler:
+        scheduler.save()
+    logger.info(f"Sourcing used {paid_searches} provider searches in {wave} wave(s).")
+
+    for lane in BUCKETS:
+        logger.info(f"Bucket {lane}: {len(bucket_candidates[lane])} new candidates.")
+        candidates.extend(bucket_candidates[lane])
 
     if candidates:
         logger.info(f"Found {len(candidates)} NEW candidates (Dedupe filtered). Saving to '{OUTPUT_TAB}'.")
         dm.save_data(OUTPUT_TAB, candidates)
+        run_state.mark_output(OUTPUT_TAB)
     else:
         logger.info("No new candidates found.")
 
+    # Watermarks and seen feed entries only once the candidates they cover are written:
+    # if the write fails, the next run searches the same window again
+    run_state.save()
+
+    return {"candidates": len(candidates), "searches": paid_searches, "waves": wave}
+
 if __name__ == "__main__":
     # Check for CLI args (e.g. force)
     force_Arg = False
     if "--force" in sys.argv:
         force_Arg = True
-    run_sourcing(force=force_Arg)
+    run_stage("source_news", run_sourcing, force=force_Arg, use_cache="--no-cache" not in sys.argv)
@@ -4,17 +4,33 @@ import json
 import logging
 import hashlib
 import pandas as pd
+import queue
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Add parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import load_config, DataManager, query_llm, logger
-from newspaper import Article
+from execution.url_canon import frame_keys
+from execution.query_scheduler import QueryScheduler
+from execution.run_state import run_stage
+from execution.fetch_engine import FetchEngine
+from execution.domain_stats import DomainFetchStats
+from execution.prefilter import Prefilter, candidate_text
+from execution.story_clusters import StoryClusters
+from execution.scoring_ledger import ScoringLedger
+from execution.dates import freshness_score
+from execution.credibility import domain_credibility
+from execution.ranking import Ranker, RankingTable
+from execution.topic_index import TopicIndex
 
 INPUT_TAB = "raw_candidates"
 OUTPUT_TAB = "selected"
+DRAFTS_TAB = "posts_draft"
+PUBLISHED_TAB = "posts_published"
 
 def load_prompt_template(prompt_name: str) -> str:
     """Loads a prompt template from directives/prompts/."""
@@ -32,15 +48,9 @@ def load_prompt_template(prompt_name: str) -> str:
         raise
 
 def fetch_full_text(url: str) -> str:
-    """Fetches article text using newspaper3k."""
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text
-    except Exception as e:
-        logger.warning(f"FullText fetch failed for {url}: {e}")
-        return ""
+    """Fetches article text for a single URL ('' on failure). Batch work should share a FetchEngine."""
+    with FetchEngine.from_config(load_config(), max_workers=1) as engine:
+        return engine.fetch_text(url)
 
 def _sha256(text: str) -> str:
     return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
@@ -52,18 +62,33 @@ def _truncate_for_sheet(text: str, max_chars: int = 45000) -> str:
         return text
     return text[:max_chars]
 
+def _search_query(item: Dict) -> str:
+    """The sourcing query that found this row ('' for legacy rows)."""
+    q = item.get('search_query')
+    return q if isinstance(q, str) else ""
+
+def _image_candidates(item: Dict, engine: FetchEngine) -> str:
+    """JSON list of image URLs for step 03: the fetched page's candidates, then the search or
+    feed result image. '' when neither is known (step 03 then scrapes the article page)."""
+    images = list(engine.image_candidates(item['url']) or [])
+    search_image = item.get('image_url')
+    if isinstance(search_image, str) and search_image.startswith(("http://", "https://")) and search_image not in images:
+        images.append(search_image)
+    return json.dumps(images) if images else ""
+
 def score_item(item: Dict, full_text: str = "") -> Dict:
     """Uses LLM to score the item."""
     
     # Load appropriate prompt template
     if full_text:
         # Pass 2: full text available
-        prompt_template = load_prompt_template("pass2_scoring")
+        prompt_name = "pass2_scoring"
         content = full_text
     else:
         # Pass 1: metadata only
-        prompt_template = load_prompt_template("pass1_scoring")
+        prompt_name = "pass1_scoring"
         content = item.get('snippet', '')
+    prompt_template = load_prompt_template(prompt_name)
     
     # Build context to inject into prompt
     article_context = f"""
@@ -80,7 +105,7 @@ Snippet/Content:
     full_prompt = f"{prompt_template}\n\n{'-'*60}\nARTICLE TO SCORE:\n{'-'*60}\n\n{article_context}"
     
     try:
-        response = query_llm(full_prompt, temperature=0.0)
+        response = query_llm(full_prompt, temperature=0.0, call_site=prompt_name)
         
         # Parse JSON
         if "```json" in response:
@@ -96,13 +121,83 @@ Snippet/Content:
             "final_bucket": "reject",
             "bucket_reason": f"Scoring error: {str(e)}",
             "relevance_score": 1,
-            "freshness_score": 1,
-            "credibility_score": 1,
             "practicality_score": 1,
             "linkedin_worthiness_score": 1
         }
 
 
+class _BucketState:
+    """Per-bucket progress while pass 1, fetches and pass 2 overlap."""
+
+    def __init__(self, bucket: str, pending: int):
+        self.bucket = bucket
+        self.pending = pending      # candidates still waiting for their pass-1 score
+        self.scored = []            # pass-1 survivors
+        self.fetching = set()       # url_keys whose full text was requested
+        self.failed = 0             # failed fetches (each one frees a slot for the next-best candidate)
+        self.in_flight = 0          # fetches / pass-2 calls not finished yet
+        self.stopped_early = False  # a pass-2 result already beats every remaining candidate
+        self.final_pool = []        # pass-2 survivors
+
+    def ranked(self) -> List[Dict]:
+        return sorted(self.scored, key=lambda x: x.get('score_pass1', 0), reverse=True)
+
+    def best_final(self) -> Optional[float]:
+        return max((x.get('final_score', 0) for x in self.final_pool), default=None)
+
+
+def _apply_pass1(c: Dict, res: Dict, ranker: Ranker) -> bool:
+    """Copies pass-1 results onto the candidate. False when pass 1 rejected it."""
+    c['reason_pass1'] = res.get('bucket_reason', '')
+    if res.get('final_bucket') == 'reject':
+        return False
+
+    # Update bucket if Pass 1 overrode it
+    c['bucket'] = res.get('final_bucket', c['bucket'])
+    
+    # Freshness and credibility are computed locally (publish date, domain table), not by the LLM
+    c['freshness_score'] = freshness_score(c.get('source_date'))
+    c['credibility_score'] = domain_credibility(c.get('url', ''))
+
+    c['bucket_reason'] = res.get('bucket_reason', '')
+    c['relevance_score'] = res.get('relevance_score', 0)
+    c['practicality_score'] = res.get('practicality_score', 0)
+    c['linkedin_worthiness_score'] = res.get('linkedin_worthiness_score', 0)
+
+    # Weighted total of the individual dimensions (SCORE_WEIGHT_* keys), less any recent-post similarity penalty
+    c['score_pass1'] = ranker.total(c) - c.get('topic_penalty', 0)
+    return True
+
+
+def _apply_pass2(item: Dict, res2: Dict, full_text: str, ranker: Ranker) -> bool:
+    """Copies pass-2 results onto the shortlisted item. False when pass 2 rejected it."""
+    if res2.get('final_bucket') == 'reject':
+        return False
+        
+    # Update bucket if Pass 2 overrode it
+    item['bucket'] = res2.get('final_bucket', item['bucket'])
+    
+    # Recalculate total score with the full-text dimensions
+    # Note: freshness and credibility are local (metadata-based), reuse from Pass 1
+    item['relevance_score'] = res2.get('relevance_score', 0)
+    item['practicality_score'] = res2.get('practicality_score', 0)
+    item['linkedin_worthiness_score'] = res2.get('linkedin_worthiness_score', 0)
+    item['score_pass2'] = ranker.total(item) - item.get('topic_penalty', 0)
+    
+    # Handle evidence_notes (array in Pass 2)
+    evidence = res2.get('evidence_notes', [])
+    if isinstance(evidence, list):
+        item['key_evidence_notes'] = "; ".join(evidence)
+    else:
+        item['key_evidence_notes'] = str(evidence)
+        
+    item['bucket_reason'] = res2.get('bucket_reason', '')
+    item['final_score'] = item['score_pass2']
+    item['article_text_hash'] = _sha256(full_text)
+    item['article_text_truncated'] = _truncate_for_sheet(full_text)
+    return True
+
+
 def run_scoring():
     config = load_config()
     run_size = config.get("RUN_SIZE", "TEST")
@@ -118,20 +213,70 @@ def run_scoring():
 
     # Check for existing processed items in Output Tab
     df_existing = dm.read_data(OUTPUT_TAB)
-    processed_urls = set()
+    processed_keys = set()
     if not df_existing.empty and 'url' in df_existing.columns:
-        processed_urls = set(df_existing['url'].astype(str).tolist())
+        processed_keys = set(frame_keys(df_existing))
     
-    # Filter df_raw
+    # URLs decided on an earlier run (rejected, not shortlisted, ...) are not scored again
+    ledger = ScoringLedger.from_config(config) if config.get("SCORING_LEDGER", True) else None
+
+    # Filter df_raw by canonical URL key (same story under two URLs is scored once)
     original_count = len(df_raw)
-    df_raw = df_raw[~df_raw['url'].isin(processed_urls)]
+    df_raw = df_raw.assign(url_key=frame_keys(df_raw))
+    if ledger:
+        processed_keys |= ledger.seen(df_raw['url_key'])
+    df_raw = df_raw[~df_raw['url_key'].isin(processed_keys)]
+    df_raw = df_raw.drop_duplicates(subset=['url_key'], keep='first')
     filtered_count = len(df_raw)
     
     if filtered_count < original_count:
-        logger.info(f"Skipping {original_count - filtered_count} already processed items.")
+        logger.info(f"Skipping {original_count - filtered_count} already processed or duplicate items.")
+
+    # Domains that almost never yield text are skipped before pass 1 (before clustering, so a
+    # fetchable copy of the same story can represent it)
+    fetch_stats = DomainFetchStats.from_config(config)
+    unfetchable = df_raw['url'].map(fetch_stats.unfetchable).astype(bool)
+    for row in df_raw[unfetchable].to_dict('records'):
+        logger.info(f"Skipping unfetchable domain: {row['url']}")
+        if ledger:
+            ledger.record(row, 'unfetchable_domain')
+    df_raw = df_raw[~unfetchable]
+
+    # Near-duplicate copies of one story (syndication) are scored once, through the best-sourced copy
+    clusters = StoryClusters.from_config(config) if config.get("STORY_CLUSTERING", True) else None
+    if clusters:
+        df_raw = clusters.assign(df_raw)
+
+    # Stories too close to a recent draft/post are skipped; borderline ones are penalized in the ranking
+    topics = TopicIndex.from_config(config) if config.get("TOPIC_DIVERSITY", True) else None
+    if topics:
+        topics.update(dm.read_data(DRAFTS_TAB), dm.read_data(PUBLISHED_TAB))
+        matches = [topics.most_similar(candidate_text(row)) for row in df_raw.to_dict('records')]
+        df_raw = df_raw.assign(
+            topic_similarity=[round(sim, 3) for sim, _ in matches],
+            topic_penalty=[round(topics.penalty(sim), 3) for sim, _ in matches],
+        )
+        too_similar = df_raw['topic_similarity'] >= topics.skip_similarity
+        for row, (sim, doc_id) in zip(df_raw.to_dict('records'), matches):
+            if sim < topics.skip_similarity:
+                continue
+            logger.info(f"Skipping story too similar to recent post '{topics.title_of(doc_id)}' ({sim:.2f}): {row['url']}")
+            if ledger:
+                ledger.record(row, 'similar_to_recent_post')
+            if clusters:
+                clusters.record_decision(row['url_key'], 'similar_to_recent_post')
+        df_raw = df_raw[~too_similar]
+        topics.save()
         
     if df_raw.empty:
         logger.info("No NEW candidates to score.")
+        if clusters:
+            clusters.save()
+        if ledger:
+            if clusters:
+                for row, decision in clusters.copy_decisions():
+                    ledger.record(row, decision)
+            ledger.save()
         return
 
     # Process per bucket
@@ -140,14 +285,74 @@ def run_scoring():
         buckets = [] # empty
         
     winners = []
+    fetches_saved = 0
+    survivors_by_query = Counter()
+    decisions = {}  # url_key -> outcome (ledger entry; inherited by the story's other copies)
+    decided_items = {}
     
     # Convert 'status' column if missing
     if 'status' not in df_raw.columns:
         df_raw['status'] = 'new'
         
+    ranker = Ranker.from_config(config)
+
+    # Obvious misses are rejected locally before any LLM call
+    prefilter = Prefilter.from_config(config) if config.get("PREFILTER", True) else None
+
+    # Pass 1, full-text fetches and pass 2 run as overlapping stages for all buckets at once
+    engine = FetchEngine.from_config(config, stats=fetch_stats)
+    llm_pool = ThreadPoolExecutor(max_workers=max(1, int(config.get("SCORING_CONCURRENCY", 6))), thread_name_prefix="score")
+    # Shortlist: Test top 2, Prod top 5; full text is fetched for the best of them
+    shortlist_count = 2 if run_size == "TEST" else 5
+    limit_fetch = min(config.get(f"FULLTEXT_FETCH_PER_BUCKET_{run_size}", 1), shortlist_count)
+    events = queue.Queue()
+    outstanding = 0
+    states = {}
+
+    # Adaptive pass 2: up to limit_fetch fetch -> pass-2 chains stay in flight per bucket; no
+    # further fetch starts once the leader's final score beats what pass 2 could make of that
+    # candidate's pass-1 score
+    early_stop = config.get("EARLY_STOP", True)
+    uplift = ledger.pass2_uplift() if ledger else None
+    margin = uplift if uplift is not None else float(config.get("EARLY_STOP_MARGIN", 0.5))
+    if early_stop:
+        logger.info(f"Early stopping: pass 2 assumed to add at most {margin:.2f} to a pass-1 score"
+                    + (" (from the scoring ledger)." if uplift is not None else "."))
+
+    def submit_pass1(state: _BucketState, item: Dict):
+        llm_pool.submit(score_item, item).add_done_callback(lambda f: events.put(("pass1", state, item, f)))
+
+    def submit_pass2(state: _BucketState, item: Dict, full_text: str):
+        llm_pool.submit(score_item, item, full_text).add_done_callback(
+            lambda f: events.put(("pass2", state, (item, full_text), f)))
+
+    def start_fetches(state: _BucketState) -> int:
+        """Starts downloads for pass-1 survivors that rank inside the fetch slots whatever the
+        still-pending pass-1 scores turn out to be; each failed fetch opens one more slot."""
+        started = 0
+        slots = limit_fetch + state.failed
+        for rank, item in enumerate(state.ranked()):
+            if rank + state.pending >= slots:
+                break
+            if item['url_key'] in state.fetching:
+                continue
+            if fetch_stats.unfetchable(item['url']):
+                slots += 1
+                continue
+            if early_stop:
+                best = state.best_final()
+                if best is not None and best >= item.get('score_pass1', 0) + margin:
+                    state.stopped_early = True
+                    break
+            state.stopped_early = False
+            state.in_flight += 1
+            state.fetching.add(item['url_key'])
+            logger.info(f"Fetching full text for {item['url']}" + (" (backfill)" if state.failed else ""))
+            engine.submit(item['url']).add_done_callback(lambda f, item=item: events.put(("fetched", state, item, f)))
+            started += 1
+        return started
+
     for bucket in buckets:
-        logger.info(f"Processing bucket: {bucket}")
-        
         # Filter candidates for this bucket that are 'new'
         # Note: raw_candidates might not have 'status' yet if just sourced.
         mask = (df_raw['bucket'] == bucket)
@@ -155,129 +360,153 @@ def run_scoring():
         
         if not candidates:
             continue
-            
-        # Pass 1: Score all 'new'
-        scored_candidates = []
+        decided_items.update((c['url_key'], c) for c in candidates)
+
+        if prefilter:
+            kept = prefilter.apply(candidates)
+            kept_keys = {c['url_key'] for c in kept}
+            decisions.update({c['url_key']: 'prefiltered' for c in candidates if c['url_key'] not in kept_keys})
+            candidates = kept
+
+        logger.info(f"Processing bucket: {bucket} ({len(candidates)} candidates)")
+        states[bucket] = _BucketState(bucket, len(candidates))
         for c in candidates:
-            # Simple Pass 1 scoring
-            res = score_item(c)
-            
-            # Handle reject
-            if res.get('final_bucket') == 'reject':
-                logger.info(f"Rejected: {c['url']} - {res.get('bucket_reason', 'N/A')}")
-                continue
-            
-            # Update bucket if Pass 1 overrode it
-            c['bucket'] = res.get('final_bucket', c['bucket'])
-            
-            # Calculate total score from individual dimensions
-            total_score = (
-                res.get('relevance_score', 0) * 2.0 +  # Weight relevance higher
-                res.get('freshness_score', 0) * 1.0 +
-                res.get('credibility_score', 0) * 1.5 +
-                res.get('practicality_score', 0) * 1.5 +
-                res.get('linkedin_worthiness_score', 0) * 1.0
-            ) / 7.0  # Normalize 
-            
-            c['score_pass1'] = total_score
-            c['bucket_reason'] = res.get('bucket_reason', '')
-            c['relevance_score'] = res.get('relevance_score', 0)
-            c['freshness_score'] = res.get('freshness_score', 0)
-            c['credibility_score'] = res.get('credibility_score', 0)
-            c['practicality_score'] = res.get('practicality_score', 0)
-            c['linkedin_worthiness_score'] = res.get('linkedin_worthiness_score', 0)
-            scored_candidates.append(c)
-            
-        # Sort by Score
-        scored_candidates.sort(key=lambda x: x.get('score_pass1', 0), reverse=True)
-        
-        # Shortlist Logic
-        # Test: Top 2, Prod: Top 5
-        shortlist_count = 2 if run_size == "TEST" else 5
-        shortlist = scored_candidates[:shortlist_count]
-        
-        # Pass 2: Full Text
-        final_pool = []
-        for i, item in enumerate(shortlist):
-            limit_fetch = config.get(f"FULLTEXT_FETCH_PER_BUCKET_{run_size}", 1)
-            
-            # Fetch?
-            full_text = ""
-            if i < limit_fetch:
-                logger.info(f"Fetching full text for {item['url']}")
-                full_text = fetch_full_text(item['url'])
-                
-                # If fetch failed (paywall, 403, etc.), reject immediately
-                if not full_text:
-                    logger.warning(f"Rejected due to paywall/fetch failure: {item['url']}")
-                    continue
-            
-            # Rescore with evidence (full text is required now)
+            submit_pass1(states[bucket], c)
+        outstanding += len(candidates)
+
+    while outstanding:
+        kind, state, payload, fut = events.get()
+        outstanding -= 1
+
+        if kind == "pass1":
+            # Pass 1: metadata-only triage
+            c = payload
+            state.pending -= 1
+            res = fut.result()
+            scoring_error = str(res.get('bucket_reason', '')).startswith("Scoring error")
+            if prefilter and not scoring_error:
+                prefilter.observe(c, res.get('final_bucket') != 'reject')
+            if not scoring_error:
+                decisions[c['url_key']] = 'rejected_pass1' if res.get('final_bucket') == 'reject' else 'not_shortlisted'
+            if _apply_pass1(c, res, ranker):
+                state.scored.append(c)
+                survivors_by_query[_search_query(c)] += 1
+            outstanding += start_fetches(state)
+
+        elif kind == "fetched":
+            item, full_text = payload, fut.result()
             if full_text:
-                res2 = score_item(item, full_text)
-                
-                # Handle reject in Pass 2
-                if res2.get('final_bucket') == 'reject':
-                    logger.info(f"Rejected in Pass 2: {item['url']} - {res2.get('bucket_reason', 'N/A')}")
-                    continue
-                    
-                # Update bucket if Pass 2 overrode it
-                item['bucket'] = res2.get('final_bucket', item['bucket'])
-                
-                # Recalculate total score
-                # Note: Pass 2 doesn't re-score freshness (metadata-based), reuse from Pass 1
-                total_score_p2 = (
-                    res2.get('relevance_score', 0) * 2.0 +
-                    item.get('freshness_score', 3) * 1.0 +  # Reuse from Pass 1
-                    res2.get('credibility_score', 0) * 1.5 +
-                    res2.get('practicality_score', 0) * 1.5 +
-                    res2.get('linkedin_worthiness_score', 0) * 1.0
-                ) / 7.0
-                
-                item['score_pass2'] = total_score_p2
-                
-                # Handle evidence_notes (array in Pass 2)
-                evidence = res2.get('evidence_notes', [])
-                if isinstance(evidence, list):
-                    item['key_evidence_notes'] = "; ".join(evidence)
-                else:
-                    item['key_evidence_notes'] = str(evidence)
-                    
-                item['bucket_reason'] = res2.get('bucket_reason', '')
-                item['final_score'] = item['score_pass2']
-                item['article_text_hash'] = _sha256(full_text)
-                item['article_text_truncated'] = _truncate_for_sheet(full_text)
+                # Pass 2 starts as soon as the text arrives
+                submit_pass2(state, item, full_text)
+                outstanding += 1
             else:
-                # Should not reach here anymore, but safety fallback
-                logger.warning(f"Skipping item without full text: {item['url']}")
-                continue
+                # Fetch failed (paywall, 403, etc.): reject and backfill from the next-best candidate
+                logger.warning(f"Rejected due to paywall/fetch failure: {item['url']}")
+                decisions[item['url_key']] = 'fetch_failed'
+                state.failed += 1
+                state.in_flight -= 1
+                outstanding += start_fetches(state)
 
-            final_pool.append(item)
-            
+        elif kind == "pass2":
+            # Pass 2: rescore with evidence from the full text
+            item, full_text = payload
+            res2 = fut.result()
+            item['reason_pass2'] = res2.get('bucket_reason', '')
+            if _apply_pass2(item, res2, full_text, ranker):
+                decisions[item['url_key']] = 'not_selected'
+                state.final_pool.append(item)
+            else:
+                logger.info(f"Rejected in Pass 2: {item['url']} - {res2.get('bucket_reason', 'N/A')}")
+                if not str(res2.get('bucket_reason', '')).startswith("Scoring error"):
+                    decisions[item['url_key']] = 'rejected_pass2'
+                else:
+                    decisions.pop(item['url_key'], None)
+            state.in_flight -= 1
+            outstanding += start_fetches(state)
+
+    llm_pool.shutdown(wait=True)
+
+    backups_count = config.get("BACKUPS_PER_BUCKET", 2)
+    for bucket in buckets:
+        if bucket not in states:
+            continue
         # Select Winners
-        # Sort by final score
-        final_pool.sort(key=lambda x: x.get('final_score', 0), reverse=True)
-        
-        if final_pool:
-            w = final_pool[0]
+        # Best final scores via a bounded heap (no full sort)
+        state = states[bucket]
+        pool = state.final_pool
+        picks = [pool[i] for i in RankingTable.from_records(pool, score='final_score').top_k(1 + backups_count)]
+
+        if state.stopped_early:
+            # Fetches the fixed policy would still have made; each one also saves a pass-2 call
+            fetchable = [x for x in state.scored if x['url_key'] in state.fetching or not fetch_stats.unfetchable(x['url'])]
+            saved = max(min(limit_fetch + state.failed, len(fetchable)) - len(state.fetching), 0)
+            fetches_saved += saved
+            logger.info(f"Early stop in {bucket}: winner {picks[0].get('final_score', 0):.2f} cannot be beaten, "
+                        f"{saved} fetches and pass-2 calls skipped.")
+            # Backups the skipped fetches would have produced are filled from the pass-1 ranking.
+            # They were never fetched or checked by pass 2, so they are marked pass-1-only and
+            # get no final_score (a pass-1 score is not on the pass-2 scale).
+            unfetched = [x for x in state.scored
+                         if x['url_key'] not in state.fetching and not fetch_stats.unfetchable(x['url'])]
+            for i in RankingTable.from_records(unfetched, score='score_pass1').top_k(1 + backups_count - len(picks)):
+                unfetched[i]['final_score'] = None
+                unfetched[i]['pass1_only'] = True
+                picks.append(unfetched[i])
+
+        if picks:
+            w = picks[0]
             w['selection_role'] = 'winner'
             w['status'] = 'selected_winner'
             winners.append(w)
             
             # Backups
-            backups_count = config.get("BACKUPS_PER_BUCKET", 2)
-            for b in final_pool[1:1+backups_count]:
-                b['selection_role'] = 'backup'
-                b['status'] = 'selected_backup'
+            for b in picks[1:]:
+                if b.get('pass1_only'):
+                    b['selection_role'] = 'backup_pass1'
+                    b['status'] = 'selected_backup_pass1'
+                else:
+                    b['selection_role'] = 'backup'
+                    b['status'] = 'selected_backup'
                 winners.append(b)
 
+    for w in winners:
+        decisions[w['url_key']] = w['status']
+
+    engine.close()
+
+    if prefilter:
+        prefilter.save()
+        prefilter.log_stats()
+
+    if clusters:
+        for key, decision in decisions.items():
+            clusters.record_decision(key, decision)
+        clusters.save()
+
+    if ledger:
+        for key, decision in decisions.items():
+            ledger.record(decided_items[key], decision)
+        # Copies clustering dropped stay skipped after their cluster expires (ledger TTL is longer)
+        if clusters:
+            for row, decision in clusters.copy_decisions():
+                ledger.record(row, decision)
+        ledger.save()
+        logger.info(f"Scoring ledger: {len(decisions)} decisions recorded, {len(ledger.entries)} live entries.")
+
+    # Credit pass-1 survivors and selections back to the sourcing queries that found them
+    if config.get("QUERY_SCHEDULER", True):
+        scheduler = QueryScheduler()
+        scheduler.record_outcomes(survivors_by_query, Counter(_search_query(w) for w in winners))
+        scheduler.save()
+
     # Save Selected
     if winners:
         
         # Determine Ready For Write
         # Test: Only 1 total. Prod: All winners.
         # Find absolute max score among winners
-        best_winner = max([w for w in winners if w['selection_role'] == 'winner'], key=lambda x: x.get('final_score', 0), default=None)
+        bucket_winners = [w for w in winners if w['selection_role'] == 'winner']
+        best_winner = next((bucket_winners[i] for i in RankingTable.from_records(bucket_winners, score='final_score').top_k(1)), None)
         
         # Timestamp for when items were selected
         selected_at = datetime.now(timezone.utc).isoformat()
@@ -300,11 +529,13 @@ def run_scoring():
                 "ready_for_write": is_ready,
                 "bucket_reason": w.get('bucket_reason'),
                 "url": w['url'],
+                "url_key": w.get('url_key', ''),
                 "title": w['title'],
                 "source_date": w['source_date'],
                 "key_evidence_notes": w.get('key_evidence_notes', ''),
                 "article_text_truncated": w.get("article_text_truncated", ""),
                 "article_text_hash": w.get("article_text_hash", ""),
+                "image_candidates": _image_candidates(w, engine),
             })
             
         logger.info(f"Saving {len(selected_rows)} selected items to '{OUTPUT_TAB}'.")
@@ -320,6 +551,10 @@ def run_scoring():
         
     else:
         logger.info("No winners selected.")
+
+    counts = {"candidates": filtered_count, "selected": len(winners), "fetches_saved": fetches_saved}
+    counts["llm_calls_saved"] = fetches_saved + (prefilter.stats["rejected"] if prefilter else 0)
+    return counts
         
 if __name__ == "__main__":
-    run_scoring()
+    run_stage("score_and_select", run_scoring)
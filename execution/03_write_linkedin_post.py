@@ -3,6 +3,7 @@ import sys
 import json
 import uuid
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 import pandas as pd
 
@@ -10,7 +11,9 @@ import pandas as pd
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import load_config, DataManager, query_llm, logger
-from execution.image_generation import get_or_generate_image
+from execution.image_generation import NO_IMAGE, scraped_image, generated_image, parse_image_candidates
+from execution.url_canon import frame_keys, row_key
+from execution.run_state import run_stage
 
 INPUT_TAB = "selected"
 OUTPUT_TAB = "posts_draft"
@@ -69,7 +72,7 @@ URL: {item.get('url', 'N/A')}
     
     try:
         # Request post as plain text (new prompt format)
-        response = query_llm(full_prompt, temperature=0.7)
+        response = query_llm(full_prompt, temperature=0.7, call_site="draft_post")
         
         # Return the full response as the post text
         # No JSON parsing needed - prompt returns ready-to-post text
@@ -78,6 +81,45 @@ URL: {item.get('url', 'N/A')}
         logger.error(f"Drafting failed for {item.get('url')}: {e}")
         return ""
 
+def _remove_image(path: str):
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not remove image {path}: {e}")
+
+def prepare_image(item: dict, draft_id: str, draft_future: Future) -> dict:
+    """Scrapes the article image right away (probing the candidates step 02 stored with the
+    row, if any); only when there is none, waits for the draft and generates an AI image
+    from it. Returns the image dict for the draft row. If the draft fails, the scraped
+    image is deleted and no image is returned (there will be no row for it)."""
+    logger.info(f"Image generation enabled for draft {draft_id}")
+    image_info = dict(NO_IMAGE)
+    try:
+        if draft_future.done() and not draft_future.result():
+            return dict(NO_IMAGE)
+        image_info = scraped_image(item.get('url', ''), draft_id,
+                                   candidates=parse_image_candidates(item.get('image_candidates')))
+        post_text = draft_future.result()
+        if not post_text:
+            if image_info and image_info.get("image_path"):
+                logger.info(f"Draft {draft_id} failed; discarding its scraped image.")
+                _remove_image(image_info["image_path"])
+            return dict(NO_IMAGE)
+        if image_info is None:
+            image_info = generated_image(
+                post_text=post_text,
+                bucket=item.get('bucket', 'General'),
+                article_title=item.get('title', ''),
+                draft_id=draft_id
+            )
+        if image_info.get("image_path"):
+            logger.info(f"✓ Image ready: {image_info.get('image_path')}")
+        else:
+            logger.warning(f"Image generation/scraping failed for {draft_id}")
+    except Exception as e:
+        logger.error(f"Image generation error for {draft_id}: {e}")
+    return image_info
+
 def run_drafting():
     config = load_config()
     run_size = config.get("RUN_SIZE", "TEST")
@@ -105,15 +147,34 @@ def run_drafting():
     # Filter out already drafted URLs
     df_existing_drafts = dm.read_data(OUTPUT_TAB)
     if not df_existing_drafts.empty and 'url' in df_existing_drafts.columns:
-        existing_urls = set(df_existing_drafts['url'].astype(str).tolist())
-        to_draft = [item for item in to_draft if item.get('url') not in existing_urls]
+        existing_keys = set(frame_keys(df_existing_drafts))
+        to_draft = [item for item in to_draft if row_key(item) not in existing_keys]
         logger.info(f"Filtered down to {len(to_draft)} items pending draft (others already drafted).")
     
+    generate_images = config.get('GENERATE_IMAGES', False)
+    if not generate_images:
+        logger.info("Image generation disabled (GENERATE_IMAGES=NO)")
+    workers = max(1, int(config.get("DRAFTING_CONCURRENCY", 4)))
+
+    # Every item is drafted at once; its image work starts at the same time, since the
+    # article image does not need the draft (only the AI fallback waits for it).
+    # Separate pools, so image tasks blocked on a draft never hold up the drafts.
+    draft_ids = [str(uuid.uuid4())[:8] for _ in to_draft]
+    with ThreadPoolExecutor(max_workers=workers) as draft_pool, \
+            ThreadPoolExecutor(max_workers=workers) as image_pool:
+        draft_futures = []
+        image_futures = []
+        for item, draft_id in zip(to_draft, draft_ids):
+            logger.info(f"Drafting post for: {item.get('title')}")
+            draft_future = draft_pool.submit(draft_post, item)
+            draft_futures.append(draft_future)
+            if generate_images:
+                image_futures.append(image_pool.submit(prepare_image, item, draft_id, draft_future))
+        post_texts = [f.result() for f in draft_futures]
+        image_infos = [f.result() for f in image_futures] if generate_images else [dict(NO_IMAGE)] * len(to_draft)
+
     drafts = []
-    for item in to_draft:
-        logger.info(f"Drafting post for: {item.get('title')}")
-        
-        post_text = draft_post(item)
+    for item, draft_id, post_text, image_info in zip(to_draft, draft_ids, post_texts, image_infos):
         if not post_text:
             continue
             
@@ -121,30 +182,6 @@ def run_drafting():
         lines = post_text.split('\n')
         hook_line = lines[0] if lines else ""
         
-        # Generate draft ID
-        draft_id = str(uuid.uuid4())[:8]
-        
-        # Try to generate/scrape image if enabled
-        image_info = {"image_path": "", "image_source": "none", "image_prompt": "", "image_origin_url": ""}
-        if config.get('GENERATE_IMAGES', False):
-            logger.info(f"Image generation enabled for draft {draft_id}")
-            try:
-                image_info = get_or_generate_image(
-                    article_url=item.get('url', ''),
-                    article_title=item.get('title', ''),
-                    post_text=post_text,
-                    bucket=item.get('bucket', 'General'),
-                    draft_id=draft_id
-                )
-                if image_info.get("image_path"):
-                    logger.info(f"✓ Image ready: {image_info.get('image_path')}")
-                else:
-                    logger.warning(f"Image generation/scraping failed for {draft_id}")
-            except Exception as e:
-                logger.error(f"Image generation error for {draft_id}: {e}")
-        else:
-            logger.info("Image generation disabled (GENERATE_IMAGES=NO)")
-        
         # Timestamp for when post was drafted
         drafted_at = datetime.now(timezone.utc).isoformat()
         
@@ -153,6 +190,7 @@ def run_drafting():
             "draft_id": draft_id,
             "bucket": item.get('bucket'),
             "url": item.get('url'),
+            "url_key": row_key(item),
             "title": item.get('title'),
             "source_date": item.get('source_date'),
             "post_text": post_text,
@@ -172,5 +210,7 @@ def run_drafting():
     else:
         logger.info("No drafts generated.")
 
+    return {"pending": len(to_draft), "drafts": len(drafts)}
+
 if __name__ == "__main__":
-    run_drafting()
+    run_stage("write_linkedin_post", run_drafting)
@@ -9,6 +9,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from execution.utils import load_config, DataManager, logger
 from execution.publisher_interface import Post
 from execution.publishers import LinkedInPublisherStub, LinkedInPublisherReal
+from execution.url_canon import frame_keys, row_key
+from execution.run_state import run_stage
 
 INPUT_TAB = "posts_draft"
 OUTPUT_TAB = "posts_published" # Or update status in drafts? 
@@ -61,6 +63,24 @@ def run_publishing():
         published_ids = set(df_published['draft_id'].astype(str).tolist())
         to_publish = [item for item in to_publish if item.get('draft_id') not in published_ids]
         logger.info(f"Filtered down to {len(to_publish)} items pending publish (others already published).")
+
+    # Never publish the same story twice, even from two different drafts
+    published_keys = set()
+    if not df_published.empty and 'url' in df_published.columns:
+        df_done = df_published
+        if 'status' in df_published.columns:
+            df_done = df_published[df_published['status'].astype(str) != 'failed']
+        published_keys = set(frame_keys(df_done)) - {""}
+    pending = []
+    for item in to_publish:
+        key = row_key(item)
+        if key and key in published_keys:
+            logger.info(f"Skipping draft {item.get('draft_id')}: story already published ({item.get('url')}).")
+            continue
+        if key:
+            published_keys.add(key)
+        pending.append(item)
+    to_publish = pending
     
     published_records = []
     
@@ -91,6 +111,7 @@ def run_publishing():
                 "text_snippet": result_post.text[:50],
                 "bucket": item.get("bucket", ""),
                 "url": item.get("url", ""),
+                "url_key": row_key(item),
                 "title": item.get("title", ""),
                 "image_path": item.get("image_path", ""),
                 "image_source": item.get("image_source", ""),
@@ -106,5 +127,7 @@ def run_publishing():
         logger.info(f"Writing {len(published_records)} records to '{OUTPUT_TAB}'.")
         dm.save_data(OUTPUT_TAB, published_records)
 
+    return {"pending": len(to_publish), "published": len(published_records)}
+
 if __name__ == "__main__":
-    run_publishing()
+    run_stage("publish_post", run_publishing)
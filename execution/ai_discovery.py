@@ -11,7 +11,7 @@ All configuration comes from environment variables:
 - GOOGLE_CREDENTIALS_JSON: Google OAuth credentials as JSON string (optional, uses service account if available)
 
 Usage:
-    python execution/ai_discovery.py
+    python execution/ai_discovery.py [--no-cache]
 
 Exit codes:
     0: Success
@@ -24,7 +24,7 @@ import sys
 import logging
 import pandas as pd
 from datetime import datetime, timezone, timedelta
-from urllib.parse import urlparse, urlunparse, parse_qs
+from urllib.parse import urlparse
 from typing import Dict, List, Set
 from difflib import SequenceMatcher
 
@@ -32,6 +32,10 @@ from difflib import SequenceMatcher
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import DataManager, logger, SHEET_NAME_DEFAULT
+from execution import replay
+from execution.url_canon import canonicalize_url, url_key
+from execution.search_cache import SearchCache
+from execution.run_state import RunState, tavily_time_range
 
 try:
     from tavily import TavilyClient
@@ -43,6 +47,7 @@ except ImportError:
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")  # Optional, uses default if not set
 GOOGLE_TOKEN_JSON = os.getenv("GOOGLE_TOKEN_JSON")  # OAuth token JSON as string
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "6"))  # 0 disables the cache
 OUTPUT_TAB = "AI_Discovery"
 
 # Blocked domains (PR wires)
@@ -71,34 +76,14 @@ SEARCH_QUERIES = [
 # Target volume
 TARGET_NET_NEW = 10
 
+# Articles older than this are rejected; also the widest server-side time filter
+MAX_AGE_DAYS = 7
+
 
 def normalize_url(url: str) -> str:
-    """Normalize URL for deduplication: lowercase, remove trailing slash, remove tracking params."""
-    if not url:
-        return ""
-    
-    # Parse URL
-    parsed = urlparse(url.lower().strip())
-    
-    # Remove common tracking parameters
-    query_params = parse_qs(parsed.query)
-    tracking_params = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 
-                       'ref', 'source', 'fbclid', 'gclid', '_ga']
-    for param in tracking_params:
-        query_params.pop(param, None)
-    
-    # Reconstruct URL without tracking params
-    clean_query = '&'.join([f"{k}={v[0]}" for k, v in query_params.items()])
-    normalized = urlunparse((
-        parsed.scheme,
-        parsed.netloc,
-        parsed.path.rstrip('/'),  # Remove trailing slash
-        parsed.params,
-        clean_query,
-        ''  # Remove fragment
-    ))
-    
-    return normalized
+    """Canonical URL for deduplication (shared rules in execution/url_canon.py).
+    No redirect resolution here: this job runs headless and bypasses _run_config.md."""
+    return canonicalize_url(url, resolve=False)
 
 
 def title_similarity(title1: str, title2: str) -> float:
@@ -191,17 +176,22 @@ def score_relevance(title: str, snippet: str) -> int:
     return min(score, 5)  # Cap at 5
 
 
-def search_with_tavily(query: str, tavily_client: TavilyClient) -> List[Dict]:
-    """Search using Tavily API and return results."""
+def search_with_tavily(query: str, tavily_client: TavilyClient, cache: SearchCache = None, run_state: RunState = None) -> List[Dict]:
+    """Search using Tavily API (through the shared search cache) and return results.
+    With `run_state`, only items newer than the query's last run are requested."""
+    cache = cache or SearchCache(enabled=False)
+    window_days = run_state.window_days("ai_discovery", query, MAX_AGE_DAYS) if run_state else MAX_AGE_DAYS
+    time_range = tavily_time_range(window_days)
     try:
-        response = tavily_client.search(
-            query=query,
-            search_depth="basic",
-            max_results=10
-        )
+        raw_results, cached = cache.cached_with_status("tavily", query, 10, lambda: replay.through(
+            "tavily", ["search", query, "basic", 10, time_range],
+            lambda: tavily_client.search(query=query, search_depth="basic", max_results=10, time_range=time_range)
+        ).get("results", []), time_range=time_range)
+        if run_state and not cached:
+            run_state.update_watermark("ai_discovery", query, [r.get("published_date") for r in raw_results])
         
         results = []
-        for r in response.get("results", []):
+        for r in raw_results:
             results.append({
                 "url": r.get("url", ""),
                 "title": r.get("title", ""),
@@ -222,11 +212,11 @@ def deduplicate_candidates(candidates: List[Dict], existing_df) -> List[Dict]:
         return candidates
     
     # Build sets of existing URLs and titles
-    existing_urls = set()
+    existing_keys = set()
     existing_titles = []
     
     if 'url' in existing_df.columns:
-        existing_urls = {normalize_url(url) for url in existing_df['url'].dropna().astype(str)}
+        existing_keys = {url_key(url, resolve=False) for url in existing_df['url'].dropna().astype(str)}
     
     if 'title' in existing_df.columns:
         existing_titles = existing_df['title'].dropna().astype(str).tolist()
@@ -238,8 +228,7 @@ def deduplicate_candidates(candidates: List[Dict], existing_df) -> List[Dict]:
         title = candidate.get('title', '')
         
         # Check URL
-        normalized_url = normalize_url(url)
-        if normalized_url in existing_urls:
+        if url_key(url, resolve=False) in existing_keys:
             logger.debug(f"Skipping duplicate URL: {url}")
             continue
         
@@ -259,18 +248,18 @@ def deduplicate_candidates(candidates: List[Dict], existing_df) -> List[Dict]:
     return net_new
 
 
-def run_discovery():
+def run_discovery(use_cache: bool = True):
     """Main execution function."""
     logger.info("=== Starting AI Discovery Pipeline ===")
     
     # Validate configuration
-    if not TAVILY_API_KEY:
+    if not TAVILY_API_KEY and not replay.is_replaying():
         logger.error("TAVILY_API_KEY environment variable not set. Exiting.")
         sys.exit(1)
     
     # Initialize Tavily client
     try:
-        tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
+        tavily_client = TavilyClient(api_key=TAVILY_API_KEY or "replay")
     except Exception as e:
         logger.error(f"Failed to initialize Tavily client: {e}")
         sys.exit(2)
@@ -296,7 +285,7 @@ def run_discovery():
     # Initialize DataManager
     try:
         dm = DataManager()
-        if not dm.use_sheets:
+        if not dm.use_sheets and not replay.is_replaying():
             logger.error("Google Sheets not available. This pipeline requires Google Sheets.")
             sys.exit(2)
     except Exception as e:
@@ -313,21 +302,23 @@ def run_discovery():
     
     # Search and collect candidates
     all_candidates = []
-    seen_urls = set()
+    seen_keys = set()
     
+    cache = SearchCache(ttl_hours=SEARCH_CACHE_TTL_HOURS, enabled=use_cache)
+    run_state = RunState()
     logger.info(f"Searching with {len(SEARCH_QUERIES)} queries...")
     for query in SEARCH_QUERIES:
         logger.info(f"Query: {query}")
-        results = search_with_tavily(query, tavily_client)
+        results = search_with_tavily(query, tavily_client, cache, run_state)
         
         for result in results:
             url = result.get('url', '')
-            normalized_url = normalize_url(url)
+            key = url_key(url, resolve=False)
             
             # Skip if already seen in this run
-            if normalized_url in seen_urls:
+            if key in seen_keys:
                 continue
-            seen_urls.add(normalized_url)
+            seen_keys.add(key)
             
             # Skip blocked domains
             if is_blocked_domain(url):
@@ -343,13 +334,13 @@ def run_discovery():
                 logger.debug(f"Skipping (no explicit AI): {title}")
                 continue
             
-            # Check date (within last 7 days)
+            # Check date (within last MAX_AGE_DAYS; the server-side filter catches most of these)
             published_at = result.get('published_at', '')
             # If no published date, allow it (we discovered it recently)
             if published_at:
                 try:
                     pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-                    if pub_date < datetime.now(timezone.utc) - timedelta(days=7):
+                    if pub_date < replay.now() - timedelta(days=MAX_AGE_DAYS):
                         logger.debug(f"Skipping (too old): {title}")
                         continue
                 except:
@@ -365,6 +356,8 @@ def run_discovery():
                 'search_query_used': query
             })
     
+    cache.log_stats()
+    run_state.save()
     logger.info(f"Found {len(all_candidates)} candidates after filtering")
     
     # Deduplicate against existing discoveries
@@ -401,6 +394,7 @@ def run_discovery():
         row = {
             "discovered_at_utc": discovered_at,
             "url": candidate.get('url', ''),
+            "url_key": url_key(candidate.get('url', ''), resolve=False),
             "title": candidate.get('title', ''),
             "source_name": candidate.get('source_name', ''),
             "published_at": candidate.get('published_at', ''),
@@ -426,7 +420,7 @@ def run_discovery():
 
 if __name__ == "__main__":
     try:
-        run_discovery()
+        run_discovery(use_cache="--no-cache" not in sys.argv)
         logger.info("=== AI Discovery Pipeline Complete ===")
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
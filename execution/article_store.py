@@ -0,0 +1,208 @@
+"""
+Persistent article store: compressed extracted text keyed by canonical URL.
+
+One gzip'd JSON file per article under .tmp/articles/<url_key>.json.gz holding
+the extracted text, `article_text_hash`, fetch status and the HTTP validators
+(ETag / Last-Modified). Every module that needs article text reads through it
+(via `FetchEngine(store=...)`), so step 02, `fix_selected_tab` and the review app
+never download the same article twice.
+
+  - successful fetches are fresh for ARTICLE_CACHE_TTL_HOURS; after that they are
+    revalidated with a conditional GET (304 keeps the stored text)
+  - failures are cached for ARTICLE_CACHE_NEGATIVE_TTL_HOURS, so a paywalled or
+    blocked page is not retried on every run
+  - total size is bounded by ARTICLE_CACHE_MAX_MB; least recently used entries go first
+
+Disabled automatically under record/replay so cassettes stay deterministic.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from execution.utils import TMP_DIR, load_config, logger
+from execution import replay
+from execution.url_canon import url_key
+
+ARTICLE_STORE_DIR = os.path.join(TMP_DIR, "articles")
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+
+def text_hash(text: str) -> str:
+    """Same hash as the `article_text_hash` column."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    def __init__(
+        self,
+        ttl_hours: float = 168,
+        negative_ttl_hours: float = 6,
+        max_mb: float = 200,
+        enabled: bool = True,
+        store_dir: str = ARTICLE_STORE_DIR,
+    ):
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.negative_ttl_seconds = float(negative_ttl_hours) * 3600
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.enabled = bool(enabled) and replay.mode() == "off"
+        self.store_dir = store_dir
+        self.stats = {"hits": 0, "misses": 0, "negative_hits": 0, "revalidated": 0, "stores": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> "ArticleStore":
+        config = config if config is not None else load_config()
+        return cls(
+            ttl_hours=config.get("ARTICLE_CACHE_TTL_HOURS", 168),
+            negative_ttl_hours=config.get("ARTICLE_CACHE_NEGATIVE_TTL_HOURS", 6),
+            max_mb=config.get("ARTICLE_CACHE_MAX_MB", 200),
+            enabled=config.get("ARTICLE_CACHE", True),
+        )
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.store_dir, f"{url_key(url)}.json.gz")
+
+    def _bump(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Article store: dropping unreadable entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Raw entry (fresh or stale) or None. Expired failures are deleted."""
+        if not self.enabled or not url:
+            return None
+        path = self._path(url)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        age = time.time() - float(entry.get("fetched_at", 0))
+        if entry.get("status") == STATUS_FAILED and age > self.negative_ttl_seconds:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, None)  # recency for LRU eviction
+        except OSError:
+            pass
+        entry["fresh"] = entry.get("status") == STATUS_FAILED or age <= self.ttl_seconds
+        return entry
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fresh entry (successful or negatively cached), else None. Counts hits/misses."""
+        entry = self.lookup(url)
+        if entry is None or not entry["fresh"]:
+            self._bump("misses")
+            return None
+        self._bump("negative_hits" if entry.get("status") == STATUS_FAILED else "hits")
+        return entry
+
+    def text(self, url: str) -> Optional[str]:
+        """Stored text for a fresh successful entry, else None (no network)."""
+        entry = self.get(url)
+        if entry and entry.get("status") == STATUS_OK:
+            return entry.get("text", "")
+        return None
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a stale successful entry."""
+        entry = self.lookup(url)
+        if not entry or entry.get("status") != STATUS_OK:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, text: str, status: str = STATUS_OK, error: str = "",
+            etag: str = "", last_modified: str = "", final_url: str = "", **extra):
+        if not self.enabled or not url:
+            return
+        entry = {
+            "url": url,
+            "final_url": final_url or url,
+            "status": status,
+            "error": error[:300],
+            "text": text or "",
+            "article_text_hash": text_hash(text) if text else "",
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            **extra,
+        }
+        path = self._path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._bump("stores")
+        except Exception as e:
+            self._remove(tmp)
+            logger.warning(f"Article store write failed for {url}: {e}")
+
+    def touch(self, url: str):
+        """Marks a stale entry fresh again (the origin answered 304)."""
+        entry = self.lookup(url)
+        if not entry:
+            return
+        entry.pop("fresh", None)
+        self.put(**{k: v for k, v in entry.items() if k not in ("fetched_at", "article_text_hash")})
+        self._bump("revalidated")
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the store fits ARTICLE_CACHE_MAX_MB."""
+        if not self.enabled or not os.path.isdir(self.store_dir):
+            return 0
+        files = []
+        for name in os.listdir(self.store_dir):
+            path = os.path.join(self.store_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            self.stats["evicted"] += removed
+            logger.info(f"Article store: evicted {removed} least recently used entries.")
+        return removed
+
+    def log_stats(self, label: str = "Article store"):
+        if not self.enabled:
+            logger.info(f"{label}: disabled.")
+            return
+        s = self.stats
+        logger.info(f"{label}: {s['hits']} hits, {s['negative_hits']} cached failures, {s['misses']} misses, "
+                    f"{s['revalidated']} revalidated (304), {s['stores']} stored, {s['evicted']} evicted.")
@@ -0,0 +1,163 @@
+"""
+Benchmark: lxml extraction engine (execution/extract.py) vs newspaper3k.
+
+Corpus: a directory of saved *.html pages (the first line of each file may be
+`<!-- url: https://... -->`, so relative image URLs resolve). By default the small
+fixture corpus checked in under execution/fixtures/html_corpus/, so the benchmark runs
+offline. `--collect N` downloads the URLs of the N most recent raw_candidates rows
+into .tmp/html_corpus/ for a benchmark on real pages.
+
+Reports per engine: pages/second, peak traced memory, import time, and how much
+of newspaper's text the fast path recovers (token-set Jaccard and recall),
+plus how often the fast path would fall back to newspaper (EXTRACT_MIN_CHARS).
+
+Usage:
+  python execution/bench_extraction.py [--repeat 3]              # fixture corpus
+  python execution/bench_extraction.py --collect 40
+  python execution/bench_extraction.py --corpus .tmp/html_corpus [--repeat 3]
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean, median
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.utils import TMP_DIR, DataManager, load_config, logger
+
+CORPUS_DIR = os.path.join(TMP_DIR, "html_corpus")
+FIXTURE_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html_corpus")
+URL_LINE_RE = re.compile(r"^<!-- url: (\S+) -->")
+TOKEN_RE = re.compile(r"\w+")
+
+
+def collect(n: int, corpus_dir: str = CORPUS_DIR):
+    from execution.fetch_engine import FetchEngine
+    from execution.url_canon import url_key
+
+    df = DataManager().read_data("raw_candidates")
+    if df.empty or "url" not in df.columns:
+        logger.error("No raw_candidates rows to collect from.")
+        return
+    urls = [u for u in df["url"].dropna().astype(str).tolist()[::-1] if u.startswith("http")]
+    urls = list(dict.fromkeys(urls))[:n]
+    os.makedirs(corpus_dir, exist_ok=True)
+
+    saved = 0
+    config = load_config()
+    with FetchEngine.from_config(config, store=None) as engine, \
+            ThreadPoolExecutor(max_workers=int(config.get("FETCH_CONCURRENCY", 8))) as pool:
+        futures = {url: pool.submit(engine.download, url) for url in urls}
+        for url, fut in futures.items():
+            try:
+                page = fut.result()
+            except Exception as e:
+                logger.info(f"skip {url}: {e}")
+                continue
+            if not page.get("html"):
+                continue
+            with open(os.path.join(corpus_dir, f"{url_key(url)}.html"), "w", encoding="utf-8") as f:
+                f.write(f"<!-- url: {url} -->\n{page['html']}")
+            saved += 1
+    logger.info(f"Saved {saved}/{len(urls)} pages to {corpus_dir}")
+
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, str]]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        match = URL_LINE_RE.match(html)
+        pages.append((match.group(1) if match else "", html))
+    return pages
+
+
+def _timed_import(module: str) -> float:
+    start = time.perf_counter()
+    __import__(module)
+    return time.perf_counter() - start
+
+
+def _run(fn: Callable[[str, str], str], pages, repeat: int) -> Tuple[Dict[int, str], float, float]:
+    texts = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for i, (url, html) in enumerate(pages):
+            try:
+                texts[i] = fn(url, html) or ""
+            except Exception as e:
+                logger.debug(f"extraction failed for {url}: {e}")
+                texts[i] = ""
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return texts, elapsed, peak
+
+
+def _tokens(text: str) -> set:
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lxml extraction engine against newspaper3k.")
+    parser.add_argument("--corpus", help="Directory of saved *.html pages (default: the fixture corpus; with --collect: .tmp/html_corpus)")
+    parser.add_argument("--collect", type=int, metavar="N", help="Download N recent raw_candidates pages into the corpus and exit")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per engine")
+    args = parser.parse_args()
+
+    if args.collect:
+        collect(args.collect, args.corpus or CORPUS_DIR)
+        return
+
+    corpus = args.corpus or FIXTURE_CORPUS_DIR
+    pages = load_corpus(corpus)
+    if not pages:
+        print(f"No pages in {corpus}; run with --collect N first.")
+        return
+    min_chars = int(load_config().get("EXTRACT_MIN_CHARS", 400))
+
+    # Import cost first, while neither engine is loaded
+    lxml_import = _timed_import("execution.extract")
+    newspaper_import = _timed_import("newspaper")
+    from execution.extract import extract, newspaper_text
+
+    fast, fast_s, fast_peak = _run(lambda url, html: extract(html, url).text, pages, args.repeat)
+    slow, slow_s, slow_peak = _run(newspaper_text, pages, args.repeat)
+
+    total = len(pages) * args.repeat
+    print(f"\nCorpus: {len(pages)} pages x {args.repeat} pass(es)\n")
+    print(f"{'engine':<12}{'pages/s':>10}{'ms/page':>10}{'peak MB':>10}{'import s':>10}{'empty':>8}")
+    for name, secs, peak, imp, texts in (
+        ("lxml", fast_s, fast_peak, lxml_import, fast),
+        ("newspaper", slow_s, slow_peak, newspaper_import, slow),
+    ):
+        empty = sum(1 for t in texts.values() if not t)
+        print(f"{name:<12}{total / secs:>10.1f}{secs / total * 1000:>10.1f}{peak / 1e6:>10.1f}{imp:>10.2f}{empty:>8}")
+
+    jaccard, recall = [], []
+    for i, reference in slow.items():
+        ref, got = _tokens(reference), _tokens(fast.get(i, ""))
+        if not ref:
+            continue
+        jaccard.append(len(ref & got) / len(ref | got))
+        recall.append(len(ref & got) / len(ref))
+    fallbacks = sum(1 for t in fast.values() if len(t) < min_chars)
+
+    print(f"\nOverlap with newspaper ({len(jaccard)} pages where newspaper found text):")
+    if jaccard:
+        print(f"  Jaccard  mean {mean(jaccard):.2f}  median {median(jaccard):.2f}")
+        print(f"  recall   mean {mean(recall):.2f}  median {median(recall):.2f}")
+    print(f"Fast path below EXTRACT_MIN_CHARS={min_chars} (would fall back): {fallbacks}/{len(pages)}")
+    print(f"Speed-up: {slow_s / fast_s:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
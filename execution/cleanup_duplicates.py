@@ -7,6 +7,7 @@ import pandas as pd
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import DataManager, logger
+from execution.url_canon import frame_keys
 
 def cleanup_duplicates():
     logger.info("Starting duplicate cleanup for 'raw_candidates'...")
@@ -23,8 +24,11 @@ def cleanup_duplicates():
     # 2. Deduplicate
     initial_count = len(df)
     
-    # Drop duplicates based on 'url', keep 'first'
+    # Drop duplicates based on canonical URL key, keep 'first'
     if 'url' in df.columns:
+        # Backfill the persisted key column for legacy rows
+        df['url_key'] = frame_keys(df)
+
         # Sort by timestamp descending so we keep the most recent (and likely valid) timestamp
         if 'timestamp' in df.columns:
             # Convert to datetime for sorting (handling errors)
@@ -33,7 +37,7 @@ def cleanup_duplicates():
             df = df.drop(columns=['timestamp_dt']) # Clean up helper col
             logger.info("Sorted by timestamp descending to keep freshest data.")
             
-        df_clean = df.drop_duplicates(subset=['url'], keep='first')
+        df_clean = df.drop_duplicates(subset=['url_key'], keep='first')
     else:
         logger.warning("'url' column not found. Deduplicating exact rows.")
         df_clean = df.drop_duplicates(keep='first')
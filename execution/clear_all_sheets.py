@@ -4,6 +4,10 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import DataManager, logger, SHEET_NAME_DEFAULT
+from execution.run_state import RunState
+from execution.scoring_ledger import SCORING_LEDGER_PATH
+from execution.story_clusters import STORY_CLUSTERS_PATH
+from execution.topic_index import TOPIC_INDEX_PATH
 
 def clear_all_sheets():
     dm = DataManager()
@@ -29,5 +33,17 @@ def clear_all_sheets():
                 os.remove(path)
                 logger.info(f"Deleted CSV: {path}")
 
+    # Frequency gates read last-write times from run state; the tabs are empty now
+    state = RunState()
+    for tab in tabs:
+        state.forget_output(tab)
+    state.save()
+
+    # Scoring memory refers to rows that no longer exist
+    for path in (SCORING_LEDGER_PATH, STORY_CLUSTERS_PATH, TOPIC_INDEX_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Deleted {path}")
+
 if __name__ == "__main__":
     clear_all_sheets()
@@ -0,0 +1,49 @@
+"""
+Domain credibility lookups (1-5) from directives/_domain_credibility.md.
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict
+from urllib.parse import urlparse
+
+from execution.utils import BASE_DIR
+
+CREDIBILITY_PATH = os.path.join(BASE_DIR, "directives", "_domain_credibility.md")
+DEFAULT_CREDIBILITY = 3
+
+
+@lru_cache(maxsize=1)
+def load_domain_credibility(path: str = CREDIBILITY_PATH) -> Dict[str, int]:
+    """Parses `- <domain> | <score>` lines from the credibility directive."""
+    table = {}
+    if not os.path.exists(path):
+        return table
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("- "):
+                continue
+            parts = [p.strip() for p in line[2:].split("|")]
+            if len(parts) == 2 and parts[1].isdigit():
+                table[parts[0].lower()] = min(max(int(parts[1]), 1), 5)
+    return table
+
+
+def domain_of(url: str) -> str:
+    host = (urlparse(url or "").hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def domain_credibility(url: str) -> int:
+    """Score of the most specific listed domain (or suffix) covering `url`'s host."""
+    table = load_domain_credibility()
+    host = domain_of(url)
+    labels = host.split(".")
+    for i in range(len(labels)):
+        parent = ".".join(labels[i:])
+        if parent in table:
+            return table[parent]
+        if f".{parent}" in table:
+            return table[f".{parent}"]
+    return DEFAULT_CREDIBILITY
@@ -0,0 +1,110 @@
+"""
+Publish-date normalization and the local freshness score.
+
+Search providers and feeds return dates in many shapes: ISO 8601 (Tavily, Atom),
+RFC 822 (RSS pubDate), "Oct 14, 2024" / "14 October 2024" (DDG), relative
+"3 hours ago" / "yesterday", and epoch seconds. `parse_date` turns any of them into
+an aware UTC datetime. Sourcing stores the normalized form in `source_date`, so a
+relative date still means the same day when step 02 reads it later.
+
+`freshness_score` is the 1-5 freshness dimension of the scoring rubric, computed
+from the date instead of asked of the LLM.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import pandas as pd
+
+from execution import replay
+
+RELATIVE_RE = re.compile(
+    r"^(?:about\s+|an?\s+)?(\d+|an?|one)?\s*(sec|second|min|minute|hr|hour|day|week|month|year)s?\s+ago$"
+)
+RELATIVE_UNITS = {
+    "sec": timedelta(seconds=1), "second": timedelta(seconds=1),
+    "min": timedelta(minutes=1), "minute": timedelta(minutes=1),
+    "hr": timedelta(hours=1), "hour": timedelta(hours=1),
+    "day": timedelta(days=1), "week": timedelta(weeks=1),
+    "month": timedelta(days=30), "year": timedelta(days=365),
+}
+# Dates further ahead than this are treated as bogus
+FUTURE_SLACK = timedelta(days=1)
+
+# (max age in days, score), checked in order; older than all of them scores 2
+FRESHNESS_STEPS = [(90, 5), (365, 4), (3 * 365, 3)]
+# Undated rows are neutral: Tavily search (default topic) returns no publish date, but its
+# results come from a query already limited to a recent time_range
+UNKNOWN_FRESHNESS = 3
+
+
+def _relative(text: str, now: datetime) -> Optional[datetime]:
+    if text in ("just now", "now", "today"):
+        return now
+    if text == "yesterday":
+        return now - timedelta(days=1)
+    m = RELATIVE_RE.match(text)
+    if not m:
+        return None
+    count = m.group(1)
+    n = int(count) if count and count.isdigit() else 1
+    return now - n * RELATIVE_UNITS[m.group(2)]
+
+
+def parse_date(value: Any, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Aware UTC datetime for a provider/feed date, or None when it cannot be read."""
+    if value is None or isinstance(value, bool):
+        return None
+    now = now or replay.now()
+    parsed = None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)):
+        if value != value or value <= 0:  # NaN from empty CSV cells
+            return None
+        parsed = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+    else:
+        text = " ".join(str(value).split()).strip().lower()
+        if not text or text in ("nan", "none", "n/a", "null"):
+            return None
+        if text.isdigit() and len(text) >= 9:
+            return parse_date(int(text), now)
+        parsed = _relative(text, now)
+        if parsed is None and "," in text[:5]:
+            try:
+                parsed = parsedate_to_datetime(str(value).strip())  # RFC 822: "Mon, 14 Oct 2024 12:00:00 GMT"
+            except (TypeError, ValueError):
+                parsed = None
+        if parsed is None:
+            ts = pd.to_datetime(str(value).strip(), utc=True, errors="coerce")
+            if ts is not None and not pd.isna(ts):
+                parsed = ts.to_pydatetime()
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    if parsed > now + FUTURE_SLACK:
+        return None
+    return parsed
+
+
+def normalize_date(value: Any, now: Optional[datetime] = None) -> str:
+    """ISO 8601 UTC form of a date ('' when it cannot be read)."""
+    parsed = parse_date(value, now)
+    return parsed.replace(microsecond=0).isoformat() if parsed else ""
+
+
+def freshness_score(value: Any, now: Optional[datetime] = None) -> int:
+    """1-5 freshness from the publish date (same steps as the scoring rubric)."""
+    now = now or replay.now()
+    parsed = parse_date(value, now)
+    if parsed is None:
+        return UNKNOWN_FRESHNESS
+    age_days = (now - parsed).total_seconds() / 86400
+    for max_days, score in FRESHNESS_STEPS:
+        if age_days <= max_days:
+            return score
+    return 2
@@ -0,0 +1,122 @@
+"""
+Per-domain full-text fetch statistics (.tmp/domain_fetch_stats.json).
+
+FetchEngine records every network fetch: outcome (ok, blocked = 401/402/403/429/451,
+http_error, timeout, error, empty = page fetched but no text extracted) and latency.
+Counts decay by FETCH_STATS_DECAY per day, so a site that drops its paywall recovers.
+The decay is computed from the `last_decay` time stored with the counts, so however
+many times a run loads them (every single-URL fetch, the review app) they fade by
+the elapsed time only.
+
+`fetchability(url)` is the smoothed success rate (one prior success in two
+attempts, so new domains are tried). Sourcing puts results from weak domains last, and
+step 02 skips domains below FETCH_SKIP_BELOW with at least FETCH_SKIP_MIN_ATTEMPTS
+attempts before pass 1, instead of scoring articles whose text never arrives.
+Persistence is disabled under record/replay.
+"""
+
+import os
+import threading
+from datetime import datetime
+from statistics import median
+from typing import Dict, Optional
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+from execution.credibility import domain_of
+
+DOMAIN_STATS_PATH = os.path.join(TMP_DIR, "domain_fetch_stats.json")
+
+OUTCOMES = ("ok", "blocked", "http_error", "timeout", "error", "empty")
+BLOCKED_STATUS = {401, 402, 403, 429, 451}
+LATENCY_WINDOW = 50
+
+PRIOR_OK = 1.0
+PRIOR_ATTEMPTS = 2.0
+# Below this fetchability sourcing ranks a domain's results after everyone else's
+WEAK_BELOW = 0.5
+
+
+class DomainFetchStats:
+    def __init__(self, skip_below: float = 0.2, min_attempts: int = 5, decay: float = 0.97,
+                 path: str = DOMAIN_STATS_PATH):
+        self.skip_below = float(skip_below)
+        self.min_attempts = int(min_attempts)
+        self.path = path
+        self.persist = replay.mode() == "off"
+        state = load_json_state(path, {}) if self.persist else {}
+        if "domains" not in state:
+            state = {"domains": state}  # counts saved before last_decay was kept
+        self.domains: Dict[str, Dict] = state["domains"]
+        self._lock = threading.Lock()
+        self.last_decay = replay.now()
+        try:
+            elapsed_days = (self.last_decay - datetime.fromisoformat(state["last_decay"])).total_seconds() / 86400.0
+        except (KeyError, TypeError, ValueError):
+            elapsed_days = 0.0
+        factor = float(decay) ** max(elapsed_days, 0.0)
+        for entry in self.domains.values():
+            for outcome in OUTCOMES:
+                entry[outcome] = entry.get(outcome, 0) * factor
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "DomainFetchStats":
+        return cls(
+            skip_below=float(config.get("FETCH_SKIP_BELOW", 0.2)),
+            min_attempts=int(config.get("FETCH_SKIP_MIN_ATTEMPTS", 5)),
+            decay=float(config.get("FETCH_STATS_DECAY", 0.97)),
+        )
+
+    def record(self, url: str, outcome: str, seconds: Optional[float] = None):
+        domain = domain_of(url)
+        if not domain:
+            return
+        with self._lock:
+            entry = self.domains.setdefault(domain, {o: 0 for o in OUTCOMES})
+            entry[outcome] = entry.get(outcome, 0) + 1
+            if seconds is not None:
+                entry["latency"] = (entry.get("latency", []) + [round(seconds, 3)])[-LATENCY_WINDOW:]
+
+    def attempts(self, domain: str) -> float:
+        entry = self.domains.get(domain, {})
+        return sum(entry.get(o, 0) for o in OUTCOMES)
+
+    def fetchability(self, url: str) -> float:
+        """Smoothed probability that a fetch from this domain yields article text."""
+        domain = domain_of(url)
+        ok = self.domains.get(domain, {}).get("ok", 0)
+        return (ok + PRIOR_OK) / (self.attempts(domain) + PRIOR_ATTEMPTS)
+
+    def weak(self, url: str) -> bool:
+        return self.fetchability(url) < WEAK_BELOW
+
+    def unfetchable(self, url: str) -> bool:
+        return self.attempts(domain_of(url)) >= self.min_attempts and self.fetchability(url) < self.skip_below
+
+    def summary(self, domain: str) -> Dict:
+        entry = self.domains.get(domain, {})
+        attempts = self.attempts(domain)
+        latency = entry.get("latency") or []
+        return {
+            "attempts": round(attempts, 1),
+            "success_rate": round(entry.get("ok", 0) / attempts, 2) if attempts else None,
+            "blocked_rate": round(entry.get("blocked", 0) / attempts, 2) if attempts else None,
+            "median_latency": round(median(latency), 2) if latency else None,
+        }
+
+    def save(self):
+        if self.persist:
+            with self._lock:
+                save_json_state(self.path, {"last_decay": self.last_decay.isoformat(), "domains": self.domains})
+
+    def log_stats(self, limit: int = 5):
+        """Logs the domains most likely to be skipped."""
+        weak = sorted(
+            (d for d in self.domains if self.attempts(d) >= self.min_attempts),
+            key=lambda d: self.fetchability(f"https://{d}/"),
+        )[:limit]
+        for domain in weak:
+            s = self.summary(domain)
+            latency = f"{s['median_latency']}s" if s["median_latency"] is not None else "n/a"
+            logger.info(f"Fetch stats {domain}: {s['attempts']} attempts, success {s['success_rate']}, "
+                        f"blocked {s['blocked_rate']}, median latency {latency}")
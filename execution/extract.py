@@ -0,0 +1,280 @@
+"""
+Fast article extraction on lxml (readability-style density scoring).
+
+One parse of the page yields the main text, the publish date, the top image and the
+page's image candidates (social preview images, then in-article images), which step 02
+keeps with the selected row so step 03 never downloads the page again for its image.
+newspaper3k stays as the fallback when the fast path finds too little text
+(EXTRACT_MIN_CHARS); it is imported only when that happens.
+
+`python execution/bench_extraction.py` compares both engines on a local corpus.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+from execution.utils import logger
+
+# Below this many characters the fast path is considered to have missed the article
+MIN_TEXT_CHARS = 400
+
+STRIP_TAGS = ["script", "style", "noscript", "iframe", "svg", "form", "button", "nav", "aside", "footer", "header", "figure"]
+PARAGRAPH_TAGS = {"p", "pre", "blockquote", "li", "h2", "h3", "td"}
+
+POSITIVE_RE = re.compile(r"article|body|content|entry|main|post|story|text|blog|news", re.IGNORECASE)
+NEGATIVE_RE = re.compile(
+    r"comment|share|social|related|promo|sidebar|footer|nav|menu|subscribe|newsletter|cookie|"
+    r"banner|sponsor|advert|\bad-|-ad\b|popup|modal|breadcrumb|byline|caption|widget|recirc|outbrain|taboola",
+    re.IGNORECASE,
+)
+
+DATE_META = [
+    ("property", "article:published_time"),
+    ("property", "og:published_time"),
+    ("name", "article:published_time"),
+    ("itemprop", "datePublished"),
+    ("name", "pubdate"),
+    ("name", "publishdate"),
+    ("name", "publish-date"),
+    ("name", "parsely-pub-date"),
+    ("name", "sailthru.date"),
+    ("name", "DC.date.issued"),
+    ("name", "dcterms.created"),
+    ("name", "date"),
+]
+IMAGE_META = [
+    ("property", "og:image"),
+    ("property", "og:image:url"),
+    ("name", "twitter:image"),
+    ("name", "twitter:image:src"),
+]
+# Image candidates in preference order: social previews, then images inside the article body
+CANDIDATE_IMAGE_META = IMAGE_META[:1] + [("property", "og:image:secure_url")] + IMAGE_META[1:]
+ARTICLE_IMAGE_XPATHS = [
+    "//article//img", "//main//img", "//figure//img",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' content ')]//img",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' article ')]//img",
+]
+MAX_IMAGE_CANDIDATES = 12
+JSONLD_DATE_RE = re.compile(r'"datePublished"\s*:\s*"([^"]+)"')
+
+
+@dataclass
+class Extraction:
+    text: str = ""
+    publish_date: str = ""
+    top_image: str = ""
+    images: List[str] = field(default_factory=list)
+    engine: str = "lxml"
+
+
+def _class_weight(el) -> int:
+    weight = 0
+    for attr in (el.get("class"), el.get("id")):
+        if not attr:
+            continue
+        if NEGATIVE_RE.search(attr):
+            weight -= 25
+        if POSITIVE_RE.search(attr):
+            weight += 25
+    return weight
+
+
+def _link_density(el) -> float:
+    text_len = len(el.text_content() or "")
+    if not text_len:
+        return 0.0
+    link_len = sum(len(a.text_content() or "") for a in el.iter("a"))
+    return link_len / text_len
+
+
+def _clean(doc):
+    etree.strip_elements(doc, *STRIP_TAGS, with_tail=False)
+    for el in list(doc.iter()):
+        if not isinstance(el.tag, str) or el.getparent() is None or el.tag in ("body", "html", "article", "main"):
+            continue
+        attrs = f"{el.get('class', '')} {el.get('id', '')}"
+        if attrs.strip() and NEGATIVE_RE.search(attrs) and not POSITIVE_RE.search(attrs):
+            el.drop_tree()
+
+
+def _score_candidates(doc) -> List[Tuple[float, object]]:
+    scores = {}
+    for p in doc.iter(*PARAGRAPH_TAGS):
+        text = (p.text_content() or "").strip()
+        if len(text) < 25:
+            continue
+        parent = p.getparent()
+        if parent is None:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100.0, 3)
+        for node, share in ((parent, 1.0), (parent.getparent(), 0.5)):
+            if node is None or not isinstance(node.tag, str):
+                continue
+            if node not in scores:
+                scores[node] = float(_class_weight(node))
+            scores[node] += score * share
+    ranked = [(s * (1 - _link_density(el)), el) for el, s in scores.items()]
+    ranked.sort(key=lambda x: x[0], reverse=True)
+    return ranked
+
+
+def _nested_in_paragraph(p, root) -> bool:
+    for ancestor in p.iterancestors():
+        if ancestor is root:
+            return False
+        if ancestor.tag in PARAGRAPH_TAGS:
+            return True
+    return False
+
+
+def _node_text(el) -> List[str]:
+    parts = []
+    for p in el.iter(*PARAGRAPH_TAGS):
+        # Paragraph-like nodes nested in another one (li > p) are read once, from the outer node
+        if p is not el and _nested_in_paragraph(p, el):
+            continue
+        text = re.sub(r"\s+", " ", p.text_content() or "").strip()
+        if len(text) >= 25 and _link_density(p) < 0.5:
+            parts.append(text)
+    return parts
+
+
+def _main_text(doc) -> str:
+    ranked = _score_candidates(doc)
+    if not ranked:
+        return ""
+    top_score, top = ranked[0]
+    threshold = max(10.0, top_score * 0.2)
+    parent = top.getparent()
+    nodes = [top]
+    if parent is not None:
+        # Siblings that also score well belong to the same article body (split containers)
+        good = {id(el) for s, el in ranked if s >= threshold}
+        nodes = [sib for sib in parent if sib is top or id(sib) in good]
+    seen, parts = set(), []
+    for node in nodes:
+        for text in _node_text(node):
+            if text not in seen:
+                seen.add(text)
+                parts.append(text)
+    return "\n\n".join(parts)
+
+
+def _meta(doc, pairs) -> str:
+    for attr, value in pairs:
+        for el in doc.xpath(f'//meta[@{attr}="{value}"]'):
+            content = (el.get("content") or "").strip()
+            if content:
+                return content
+    return ""
+
+
+def _publish_date(doc, raw_html: str) -> str:
+    date = _meta(doc, DATE_META)
+    if date:
+        return date
+    for el in doc.xpath('//*[@itemprop="datePublished"]'):
+        value = el.get("datetime") or el.get("content") or (el.text_content() or "").strip()
+        if value:
+            return value
+    for el in doc.xpath("//time[@datetime]"):
+        return el.get("datetime")
+    match = JSONLD_DATE_RE.search(raw_html)
+    return match.group(1) if match else ""
+
+
+def _top_image(doc, base_url: str) -> str:
+    image = _meta(doc, IMAGE_META)
+    if not image:
+        for el in doc.xpath('//link[@rel="image_src"]'):
+            image = el.get("href") or ""
+            break
+    if not image:
+        for img in doc.iter("img"):
+            src = img.get("src") or img.get("data-src") or ""
+            if src and not src.startswith("data:"):
+                image = src
+                break
+    if image and base_url:
+        image = urljoin(base_url, image)
+    return image
+
+
+def _image_candidates(doc, base_url: str) -> List[str]:
+    candidates: List[str] = []
+
+    def add(src: str):
+        src = (src or "").strip()
+        if not src or src.startswith("data:"):
+            return
+        src = urljoin(base_url, src) if base_url else src
+        if src.startswith(("http://", "https://")) and src not in candidates:
+            candidates.append(src)
+
+    for attr, value in CANDIDATE_IMAGE_META:
+        for el in doc.xpath(f'//meta[@{attr}="{value}"]'):
+            add(el.get("content"))
+    for xpath in ARTICLE_IMAGE_XPATHS:
+        for img in doc.xpath(xpath):
+            add(img.get("src") or img.get("data-src") or img.get("data-lazy-src"))
+    return candidates[:MAX_IMAGE_CANDIDATES]
+
+
+def _document(html: str, url: str = ""):
+    try:
+        return lxml.html.document_fromstring(html.encode("utf-8", errors="replace"))
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"lxml could not parse {url}: {e}")
+        return None
+
+
+def page_images(url: str, html: str) -> List[str]:
+    """Image candidates of a page without extracting its text."""
+    doc = _document(html, url) if html and html.strip() else None
+    return _image_candidates(doc, url) if doc is not None else []
+
+
+def newspaper_text(url: str, html: str) -> str:
+    """Main text via newspaper3k from already-downloaded HTML (slow; fallback only)."""
+    from newspaper import Article
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text or ""
+
+
+def extract(html: str, url: str = "") -> Extraction:
+    """Main text, publish date, top image and image candidates from one lxml parse."""
+    if not html or not html.strip():
+        return Extraction()
+    doc = _document(html, url)
+    if doc is None:
+        return Extraction()
+    # Metadata is read before cleaning strips <header>/<figure> etc.
+    result = Extraction(publish_date=_publish_date(doc, html), top_image=_top_image(doc, url),
+                        images=_image_candidates(doc, url))
+    _clean(doc)
+    result.text = _main_text(doc)
+    return result
+
+
+def extract_article(url: str, html: str, min_chars: int = MIN_TEXT_CHARS) -> Extraction:
+    """Fast path first; newspaper3k when it yields fewer than `min_chars` characters."""
+    result = extract(html, url)
+    if len(result.text) >= min_chars:
+        return result
+    try:
+        fallback = newspaper_text(url, html)
+    except Exception as e:
+        logger.debug(f"newspaper fallback failed for {url}: {e}")
+        return result
+    if len(fallback) > len(result.text):
+        result.text = fallback
+        result.engine = "newspaper"
+    return result
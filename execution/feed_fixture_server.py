@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local fixture feed server for exercising execution/feeds.py without the network.
+
+Serves one RSS 2.0 feed (/rss.xml) and one Atom feed (/atom.xml) with ETag and
+Last-Modified validators, answering conditional requests with 304 when nothing
+changed. GET /bump publishes one more entry to both feeds.
+
+Usage:
+    python execution/feed_fixture_server.py [--port 8765]   # serve until Ctrl+C
+    python execution/feed_fixture_server.py --check         # run the poller against it and verify
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FixtureFeeds:
+    """In-memory feed content. Entries are newest first, like real feeds."""
+
+    def __init__(self, initial_entries: int = 5):
+        self._lock = threading.Lock()
+        self.entries = []
+        self.updated_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self.requests = {"200": 0, "304": 0}
+        for _ in range(initial_entries):
+            self.bump()
+
+    def bump(self):
+        with self._lock:
+            n = len(self.entries) + 1
+            self.updated_at = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=n)
+            self.entries.insert(0, {
+                "id": f"fixture-{n}",
+                "title": f"Fixture oilfield services story {n}",
+                "url": f"https://example.com/news/story-{n}?utm_source=feed",
+                "summary": f"<p>Drilling contractor update number {n} &amp; fleet news.</p>",
+                "date": self.updated_at - timedelta(hours=n),
+            })
+
+    def render(self, kind: str) -> bytes:
+        with self._lock:
+            entries = list(self.entries)
+        if kind == "atom":
+            body = "".join(
+                f"<entry><id>{e['id']}</id><title>{e['title']}</title>"
+                f"<link rel=\"alternate\" href=\"{e['url'].replace('&', '&amp;')}\"/>"
+                f"<updated>{e['date'].isoformat()}</updated>"
+                f"<summary type=\"html\">{_escape(e['summary'])}</summary></entry>"
+                for e in entries
+            )
+            return (f"<?xml version=\"1.0\" encoding=\"utf-8\"?><feed xmlns=\"http://www.w3.org/2005/Atom\">"
+                    f"<title>Fixture Atom</title><updated>{self.updated_at.isoformat()}</updated>{body}</feed>").encode("utf-8")
+        body = "".join(
+            f"<item><guid>{e['id']}</guid><title>{e['title']}</title>"
+            f"<link>{e['url'].replace('&', '&amp;')}</link><pubDate>{format_datetime(e['date'])}</pubDate>"
+            f"<description>{_escape(e['summary'])}</description></item>"
+            for e in entries
+        )
+        return (f"<?xml version=\"1.0\" encoding=\"utf-8\"?><rss version=\"2.0\"><channel>"
+                f"<title>Fixture RSS</title>{body}</channel></rss>").encode("utf-8")
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _handler(feeds: FixtureFeeds):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/bump":
+                feeds.bump()
+                self.send_response(204)
+                self.end_headers()
+                return
+            if path not in ("/rss.xml", "/atom.xml"):
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            content = feeds.render("atom" if path == "/atom.xml" else "rss")
+            etag = f"\"{hashlib.sha1(content).hexdigest()[:16]}\""
+            last_modified = format_datetime(feeds.updated_at, usegmt=True)
+
+            if self.headers.get("If-None-Match") == etag or self._not_modified_since(feeds.updated_at):
+                feeds.requests["304"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            feeds.requests["200"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _not_modified_since(self, updated_at: datetime) -> bool:
+            # Only consulted when no ETag was sent, as HTTP specifies
+            since = self.headers.get("If-Modified-Since")
+            if not since or self.headers.get("If-None-Match"):
+                return False
+            try:
+                return updated_at <= parsedate_to_datetime(since)
+            except (TypeError, ValueError):
+                return False
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int = 0, initial_entries: int = 5) -> Tuple[ThreadingHTTPServer, FixtureFeeds, str]:
+    """Starts the server on a background thread. Returns (server, feeds, base_url)."""
+    feeds = FixtureFeeds(initial_entries)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(feeds))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, feeds, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_check() -> bool:
+    """Polls both fixture feeds: full read, unchanged (304), one new entry, then the entry
+    sourcing dropped comes back, also when it sits below SEEN_STREAK_STOP kept entries."""
+    import requests
+    from execution.feeds import FeedPoller
+    from execution.run_state import RunState
+
+    server, feeds, base = start_server()
+    state = RunState(os.path.join(tempfile.mkdtemp(), "run_state.json"))
+    poller = FeedPoller(state)
+    targets = [{"url": f"{base}/rss.xml", "bucket": "upstream"}, {"url": f"{base}/atom.xml", "bucket": "general"}]
+
+    ok = True
+    try:
+        first = poller.poll_all(targets)
+        poller.commit()
+        second = poller.poll_all(targets)
+        poller.commit()
+        not_modified = feeds.requests["304"]
+        requests.get(f"{base}/bump", timeout=5)
+        third = poller.poll_all(targets)
+        # Sourcing dropped the RSS entry (lane full): it must come back on the next poll
+        dropped = [i for i in third if i["bucket"] == "upstream"]
+        poller.commit(dropped)
+        fourth = poller.poll_all(targets)
+        poller.commit()
+        # Five new entries; sourcing keeps the newest three and drops the two below them
+        for _ in range(5):
+            requests.get(f"{base}/bump", timeout=5)
+        fifth = poller.poll_all(targets)
+        dropped_deep = [i for i in fifth if i["bucket"] == "upstream"][3:]
+        poller.commit(dropped_deep)
+        sixth = poller.poll_all(targets)
+        poller.commit()
+        seventh = poller.poll_all(targets)
+        poller.commit()
+
+        checks = [
+            ("first poll reads every entry", len(first) == 10),
+            ("unchanged feeds answer 304", not second and not_modified == 2),
+            ("bump yields one new entry per feed", len(third) == 2),
+            ("dropped entries are polled again", [(i["feed_url"], i["id"]) for i in fourth]
+                                                  == [(i["feed_url"], i["id"]) for i in dropped]),
+            ("dropped entries below kept ones are polled again",
+                [i["id"] for i in dropped_deep] == ["fixture-8", "fixture-7"]
+                and [(i["feed_url"], i["id"]) for i in sixth] == [(i["feed_url"], i["id"]) for i in dropped_deep]),
+            ("consumed entries are not polled again", not seventh),
+            ("entries carry bucket hints", {i["bucket"] for i in first} == {"upstream", "general"}),
+            ("snippets are plain text", all("<" not in i["snippet"] for i in first)),
+        ]
+        for label, passed in checks:
+            print(f"{'✓' if passed else '✗'} {label}")
+            ok = ok and passed
+    finally:
+        server.shutdown()
+    return ok
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        sys.exit(0 if run_check() else 1)
+
+    port = 8765
+    if "--port" in sys.argv:
+        port = int(sys.argv[sys.argv.index("--port") + 1])
+    server, _, base = start_server(port)
+    print(f"Fixture feeds at {base}/rss.xml and {base}/atom.xml (GET {base}/bump adds an entry). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
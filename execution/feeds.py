@@ -0,0 +1,231 @@
+"""
+RSS/Atom feed ingestion for 01_source_news.
+
+Polls the feeds listed in directives/_feeds.md with conditional requests
+(ETag / If-Modified-Since, validators kept in .tmp/run_state.json), so an
+unchanged feed costs a single 304. Entries are parsed incrementally and the
+parse stops at the first entry already seen on a previous poll. New entries are
+returned in the same item shape as the search providers
+(title / url / snippet / date) plus the feed's bucket hint. Entries count as seen
+only once sourcing commits them, so ones dropped for a full lane come back next run.
+"""
+
+import os
+import re
+import html
+import io
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from execution.utils import BASE_DIR, logger
+from execution import replay
+from execution.run_state import RunState
+
+FEEDS_PATH = os.path.join(BASE_DIR, "directives", "_feeds.md")
+DEFAULT_BUCKET = "general"
+USER_AGENT = "Mozilla/5.0 (compatible; oilfield-news-feed-poller)"
+
+# Entry ids remembered per feed (feeds rarely carry more than 50 items)
+SEEN_IDS_LIMIT = 300
+# Consecutive already-seen entries after which the rest of the feed is assumed old
+# (more than one, so a pinned item at the top does not hide new entries below it)
+SEEN_STREAK_STOP = 3
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def load_feeds(path: str = FEEDS_PATH) -> List[Dict[str, str]]:
+    """Parses `- <url> | <bucket>` lines from the feed directive. Bucket is optional."""
+    feeds = []
+    if not os.path.exists(path):
+        return feeds
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("- http"):
+                continue
+            parts = [p.strip() for p in line[2:].split("|")]
+            feeds.append({"url": parts[0], "bucket": (parts[1] if len(parts) > 1 and parts[1] else DEFAULT_BUCKET)})
+    return feeds
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _text(el: Optional[ET.Element]) -> str:
+    if el is None:
+        return ""
+    return html.unescape(TAG_RE.sub(" ", "".join(el.itertext()))).strip()
+
+
+def _child(entry: ET.Element, *names: str) -> Optional[ET.Element]:
+    for child in entry:
+        if _local(child.tag) in names:
+            return child
+    return None
+
+
+def _entry_link(entry: ET.Element) -> str:
+    if entry.tag.startswith(ATOM_NS):
+        fallback = ""
+        for link in entry.findall(f"{ATOM_NS}link"):
+            rel = link.get("rel", "alternate")
+            if rel == "alternate":
+                return link.get("href", "")
+            fallback = fallback or link.get("href", "")
+        return fallback
+    return _text(_child(entry, "link"))
+
+
+def _entry_image(entry: ET.Element) -> str:
+    """media:content / media:thumbnail / image enclosure URL ('' when the entry has none)."""
+    for el in entry.iter():
+        name = _local(el.tag)
+        if name in ("content", "thumbnail") and el.tag.startswith("{") and not el.tag.startswith(ATOM_NS):
+            if el.get("url") and (name == "thumbnail" or el.get("medium") == "image"
+                                  or el.get("type", "").startswith("image/")):
+                return el.get("url")
+        if name in ("enclosure", "link") and el.get("type", "").startswith("image/"):
+            return el.get("url") or el.get("href") or ""
+    return ""
+
+
+def _entry_item(entry: ET.Element) -> Dict[str, str]:
+    url = _entry_link(entry)
+    snippet = _text(_child(entry, "description", "summary", "content", "encoded"))
+    return {
+        "id": _text(_child(entry, "guid", "id")) or url,
+        "title": _text(_child(entry, "title")),
+        "url": url,
+        "snippet": re.sub(r"\s+", " ", snippet)[:500],
+        "date": _text(_child(entry, "pubdate", "published", "updated", "date")),
+        "image": _entry_image(entry),
+    }
+
+
+def parse_entries(content: bytes, seen_ids: set, pending_ids: Iterable[str] = ()) -> List[Dict[str, str]]:
+    """Streams RSS <item> / Atom <entry> elements, stopping once SEEN_STREAK_STOP entries in a
+    row were seen on earlier polls (feeds list newest first). Malformed tails keep whatever
+    parsed before them. While `pending_ids` (entries dropped after an earlier poll) have not all
+    come up again, the streak does not stop the parse: those entries sit below newer, seen ones."""
+    items = []
+    streak = 0
+    pending = set(pending_ids)
+    try:
+        for _, el in ET.iterparse(io.BytesIO(content), events=("end",)):
+            if _local(el.tag) not in ("item", "entry"):
+                continue
+            item = _entry_item(el)
+            el.clear()
+            pending.discard(item["id"])
+            if item["id"] in seen_ids:
+                streak += 1
+                if streak >= SEEN_STREAK_STOP and not pending:
+                    break
+                continue
+            streak = 0
+            if item["url"]:
+                items.append(item)
+    except ET.ParseError as e:
+        logger.warning(f"Feed parse stopped early: {e}")
+    return items
+
+
+class FeedPoller:
+    """Conditional-GET poller. Validators and seen entry ids live in the shared RunState.
+
+    A poll does not mark its entries seen: `commit` does, once sourcing knows which ones it
+    kept. Entries it had to drop (lane quota full) are returned again by the next poll."""
+
+    def __init__(self, run_state: RunState, timeout: float = 10.0):
+        self.run_state = run_state
+        self.timeout = timeout
+        self.stats = {"polled": 0, "not_modified": 0, "failed": 0, "entries": 0}
+        self._lock = threading.Lock()
+        # feed url -> validators and entry ids of this run's poll, written by commit()
+        self._polled: Dict[str, Dict] = {}
+
+    def _bump(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def _state_key(self, feed_url: str) -> str:
+        return f"feed:{feed_url}"
+
+    def poll(self, feed: Dict[str, str]) -> List[Dict[str, str]]:
+        """Returns entries new since the last poll (empty on 304 or error)."""
+        url = feed["url"]
+        state = self.run_state.get(self._state_key(url), {}) or {}
+        headers = {"User-Agent": USER_AGENT}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        self._bump("polled")
+        try:
+            resp = replay.http_get(url, headers=headers, timeout=self.timeout)
+        except Exception as e:
+            self._bump("failed")
+            logger.warning(f"Feed fetch failed for {url}: {e}")
+            return []
+
+        if resp.status_code == 304:
+            self._bump("not_modified")
+            logger.info(f"Feed unchanged (304): {url}")
+            return []
+        if resp.status_code >= 400:
+            self._bump("failed")
+            logger.warning(f"Feed {url} returned HTTP {resp.status_code}")
+            return []
+
+        seen = list(state.get("seen_ids", []))
+        items = parse_entries(resp.content, set(seen), state.get("pending_ids", []))
+        for item in items:
+            item["bucket"] = feed.get("bucket", DEFAULT_BUCKET)
+            item["feed_url"] = url
+
+        with self._lock:
+            self._polled[url] = {
+                "etag": resp.headers.get("ETag", ""),
+                "last_modified": resp.headers.get("Last-Modified", ""),
+                "seen_ids": seen,
+                "ids": [i["id"] for i in items],
+            }
+        self._bump("entries", len(items))
+        logger.info(f"Feed {url}: {len(items)} new entries.")
+        return items
+
+    def poll_all(self, feeds: List[Dict[str, str]], max_workers: int = 8) -> List[Dict[str, str]]:
+        """Polls every feed concurrently; entries come back in feed-list order."""
+        if not feeds:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            batches = list(pool.map(self.poll, feeds))
+        return [item for batch in batches for item in batch]
+
+    def commit(self, dropped: Iterable[Dict[str, str]] = ()):
+        """Marks the polled entries seen, except the `dropped` ones (entries as returned by
+        poll). A feed with dropped entries keeps no validators, so its next poll is a full GET
+        even if the feed is unchanged, and lists them as `pending_ids` so that poll parses down
+        to them. Pending entries that have left the feed are forgotten."""
+        dropped_ids = {(e.get("feed_url"), e.get("id")) for e in dropped}
+        with self._lock:
+            polled, self._polled = self._polled, {}
+        for url, poll in polled.items():
+            kept = [i for i in poll["ids"] if (url, i) not in dropped_ids]
+            pending = [i for i in poll["ids"] if (url, i) in dropped_ids]
+            self.run_state.set(self._state_key(url), {
+                "etag": "" if pending else poll["etag"],
+                "last_modified": "" if pending else poll["last_modified"],
+                "seen_ids": (kept + poll["seen_ids"])[:SEEN_IDS_LIMIT],
+                "pending_ids": pending,
+            })
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(f"Feeds: {s['polled']} polled, {s['not_modified']} unchanged (304), {s['failed']} failed, {s['entries']} new entries.")
@@ -0,0 +1,341 @@
+"""
+Pooled, concurrent full-text fetcher for step 02 (and anything else that needs article text).
+
+  - one requests.Session with a sized connection pool, shared by all downloads
+  - per-domain concurrency caps, so a burst of URLs from one site stays polite
+  - connect/read timeouts and a max-bytes cap per page (streamed, so a huge page is cut off early)
+  - gzip/deflate always, brotli when the `brotli` package is installed
+  - parsing handed to a separate worker pool, so downloads never wait on parsing
+    (execution/extract.py: lxml fast path, newspaper3k fallback)
+  - optional read-through ArticleStore: fresh entries skip the network, stale ones are
+    revalidated with ETag / If-Modified-Since, and failures are negatively cached
+  - per-domain outcome/latency statistics (DomainFetchStats) for skipping paywalled sites
+  - image candidates found while parsing (extract.py) are kept per URL, in memory and in
+    the store, so step 02 can hand them to step 03 with the selected row
+  - optional Tavily extract batching (TAVILY_EXTRACT, execution/provider_content.py): URLs
+    missing from the store are first asked of Tavily in grouped calls, then downloaded if needed
+
+Settings come from `_run_config.md` (FETCH_* keys, PARSE_WORKERS); see `FetchEngine.from_config`.
+"""
+
+import os
+import re
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from execution.utils import logger
+from execution import replay
+from execution.article_store import ArticleStore, STATUS_OK, STATUS_FAILED
+from execution.url_canon import url_key
+from execution.extract import Extraction, extract_article
+from execution.domain_stats import DomainFetchStats, BLOCKED_STATUS
+from execution.provider_content import TavilyExtractBatcher, store_provider_content, EXTRACT_EXTRACTOR
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes `br` when it is importable)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+CHARSET_RE = re.compile(rb"""charset=["']?([A-Za-z0-9_\-]+)""", re.IGNORECASE)
+
+
+class FetchError(Exception):
+    """Raised for HTTP errors and non-HTML responses."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _tavily_batcher(config: Dict) -> Optional[TavilyExtractBatcher]:
+    """Extract batching when TAVILY_EXTRACT is on and paid APIs are allowed (Tavily bills extract calls)."""
+    if not (config.get("TAVILY_EXTRACT", False) and config.get("PAID_APIS_DEFAULT_ALLOWED", False)):
+        return None
+    key = os.getenv("TAVILY_API_KEY")
+    if not key and not replay.is_replaying():
+        logger.warning("TAVILY_EXTRACT is on but TAVILY_API_KEY is not set; downloading articles directly.")
+        return None
+    from tavily import TavilyClient
+    return TavilyExtractBatcher.from_config(config, TavilyClient(api_key=key or "replay"))
+
+
+def _failure_outcome(exc: Exception) -> str:
+    """DomainFetchStats outcome for a failed download."""
+    if isinstance(exc, FetchError) and exc.status_code:
+        return "blocked" if exc.status_code in BLOCKED_STATUS else "http_error"
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    return "error"
+
+
+def _domain(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _decode(content: bytes, header_encoding: Optional[str]) -> str:
+    encoding = header_encoding
+    if not encoding:
+        match = CHARSET_RE.search(content[:4096])
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return content.decode(encoding, errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+class FetchEngine:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        per_domain: int = 2,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        max_bytes: int = 3_000_000,
+        parse_workers: int = 4,
+        parser: Callable[[str, str], Extraction] = extract_article,
+        store: Optional[ArticleStore] = None,
+        stats: Optional[DomainFetchStats] = None,
+        batcher: Optional[TavilyExtractBatcher] = None,
+    ):
+        self.per_domain = max(1, per_domain)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.parser = parser
+        self.store = store
+        self.stats = stats
+        self.batcher = batcher
+        # url_key -> image candidates of pages parsed by this engine (the store may be disabled)
+        self.page_images: Dict[str, List[str]] = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Accept-Language": "en-US,en;q=0.8",
+        })
+
+        self._io_pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="fetch")
+        self._parse_pool = ThreadPoolExecutor(max_workers=max(1, parse_workers), thread_name_prefix="parse")
+        self._domain_lock = threading.Lock()
+        self._domain_slots: Dict[str, threading.Semaphore] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, **kwargs) -> "FetchEngine":
+        kwargs.setdefault("store", ArticleStore.from_config(config))
+        kwargs.setdefault("stats", DomainFetchStats.from_config(config))
+        kwargs.setdefault("batcher", _tavily_batcher(config))
+        return cls(
+            max_workers=int(config.get("FETCH_CONCURRENCY", 8)),
+            per_domain=int(config.get("FETCH_PER_DOMAIN", 2)),
+            connect_timeout=float(config.get("FETCH_CONNECT_TIMEOUT_SECONDS", 5)),
+            read_timeout=float(config.get("FETCH_READ_TIMEOUT_SECONDS", 15)),
+            max_bytes=int(config.get("FETCH_MAX_BYTES", 3_000_000)),
+            parse_workers=int(config.get("PARSE_WORKERS", 4)),
+            parser=lambda url, html: extract_article(url, html, min_chars=int(config.get("EXTRACT_MIN_CHARS", 400))),
+            **kwargs,
+        )
+
+    def _slot(self, url: str) -> threading.Semaphore:
+        domain = _domain(url)
+        with self._domain_lock:
+            if domain not in self._domain_slots:
+                self._domain_slots[domain] = threading.Semaphore(self.per_domain)
+            return self._domain_slots[domain]
+
+    def _download_live(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        with self._slot(url):
+            started = time.monotonic()
+            resp = self.session.get(url, headers=headers, timeout=self.timeout, stream=True, allow_redirects=True)
+            try:
+                page = {
+                    "status_code": resp.status_code,
+                    "final_url": str(resp.url),
+                    "etag": resp.headers.get("ETag", ""),
+                    "last_modified": resp.headers.get("Last-Modified", ""),
+                    "html": "",
+                }
+                if resp.status_code == 304:
+                    page["seconds"] = time.monotonic() - started
+                    return page
+                if resp.status_code >= 400:
+                    raise FetchError(f"HTTP {resp.status_code}", resp.status_code)
+                content_type = resp.headers.get("Content-Type", "")
+                if content_type and "html" not in content_type and "xml" not in content_type:
+                    raise FetchError(f"not HTML ({content_type})")
+
+                chunks, size = [], 0
+                for chunk in resp.iter_content(chunk_size=65536):  # decoded (gzip/br) chunks
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        logger.info(f"Fetch cut at {self.max_bytes} bytes: {url}")
+                        break
+                page["html"] = _decode(b"".join(chunks)[:self.max_bytes], resp.encoding if "charset" in content_type.lower() else None)
+                page["seconds"] = time.monotonic() - started
+                return page
+            finally:
+                resp.close()
+
+    def download(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """{status_code, html, final_url, etag, last_modified} for `url`, through the
+        record/replay layer. `headers` are conditional-request validators. Raises on failure."""
+        headers = headers or {}
+        key = [url, headers] if headers else [url]
+        return replay.through("article_html", key, lambda: self._download_live(url, headers))
+
+    def _parse(self, url: str, html: str) -> Extraction:
+        try:
+            return self.parser(url, html) or Extraction()
+        except Exception as e:
+            logger.warning(f"FullText parse failed for {url}: {e}")
+            return Extraction()
+
+    def _parse_and_store(self, url: str, page: Dict[str, Any]) -> str:
+        result = self._parse(url, page["html"])
+        text = result.text
+        self.page_images[url_key(url)] = result.images
+        if self.store:
+            self.store.put(
+                url, text,
+                status=STATUS_OK if text else STATUS_FAILED,
+                error="" if text else "no text extracted",
+                etag=page.get("etag", ""), last_modified=page.get("last_modified", ""),
+                final_url=page.get("final_url", ""),
+                publish_date=result.publish_date, top_image=result.top_image, extractor=result.engine,
+                image_candidates=result.images,
+            )
+        return text
+
+    def submit(self, url: str) -> "Future[str]":
+        """Schedules download + parse. The future resolves to the text ('' on any failure)."""
+        result: Future = Future()
+
+        if self.store:
+            entry = self.store.get(url)
+            if entry is not None:
+                result.set_result(entry.get("text", "") if entry.get("status") == STATUS_OK else "")
+                return result
+        validators = self.store.validators(url) if self.store else {}
+
+        def downloaded(fut: Future):
+            try:
+                page = fut.result()
+            except Exception as e:
+                logger.warning(f"FullText fetch failed for {url}: {e}")
+                if self.store:
+                    self.store.put(url, "", status=STATUS_FAILED, error=f"{type(e).__name__}: {e}")
+                if self.stats:
+                    self.stats.record(url, _failure_outcome(e))
+                result.set_result("")
+                return
+            if page["status_code"] == 304 and self.store:
+                self.store.touch(url)
+                entry = self.store.lookup(url) or {}
+                if self.stats:
+                    self.stats.record(url, "ok", page.get("seconds"))
+                result.set_result(entry.get("text", ""))
+                return
+
+            def parsed(p: Future):
+                try:
+                    text = p.result()
+                    if self.stats:
+                        self.stats.record(url, "ok" if text else "empty", page.get("seconds"))
+                    result.set_result(text)
+                except Exception as e:
+                    give_up("parse", e)
+
+            try:
+                self._parse_pool.submit(self._parse_and_store, url, page).add_done_callback(parsed)
+            except Exception as e:
+                give_up("parse", e)
+
+        def give_up(stage: str, e: Exception):
+            # Callbacks run on pool threads: an escaped exception would leave `result` pending forever
+            logger.warning(f"FullText {stage} failed for {url}: {e}")
+            if self.stats:
+                self.stats.record(url, _failure_outcome(e))
+            if not result.done():
+                result.set_result("")
+
+        def start_download():
+            try:
+                self._io_pool.submit(self.download, url, validators).add_done_callback(downloaded)
+            except Exception as e:
+                give_up("fetch", e)
+
+        def provided(fut: Future):
+            try:
+                text = fut.result()
+                if not text:
+                    start_download()
+                    return
+                store_provider_content(self.store, url, text, EXTRACT_EXTRACTOR, min_chars=0)
+                result.set_result(text)
+            except Exception as e:
+                give_up("extract", e)
+
+        # A stale stored copy is cheaper to revalidate than to extract again
+        if self.batcher and not validators:
+            self.batcher.fetch(url).add_done_callback(provided)
+        else:
+            start_download()
+        return result
+
+    def image_candidates(self, url: str) -> Optional[List[str]]:
+        """Image candidates of the fetched page, or None when its HTML was never parsed
+        (provider-supplied text, failed fetch, not fetched)."""
+        images = self.page_images.get(url_key(url))
+        if images is not None:
+            return images
+        entry = self.store.lookup(url) if self.store else None
+        if not entry or entry.get("status") != STATUS_OK:
+            return None
+        if "image_candidates" in entry:
+            return entry["image_candidates"]
+        # Entries stored before candidates were kept have the top image only
+        return [entry["top_image"]] if entry.get("top_image") else None
+
+    def fetch_text(self, url: str) -> str:
+        return self.submit(url).result()
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Fetches all URLs concurrently; returns {url: text}."""
+        futures = {url: self.submit(url) for url in dict.fromkeys(urls)}
+        return {url: fut.result() for url, fut in futures.items()}
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+            self.batcher.log_stats()
+        self._io_pool.shutdown(wait=True)
+        self._parse_pool.shutdown(wait=True)
+        self.session.close()
+        if self.store:
+            self.store.evict()
+            self.store.log_stats()
+        if self.stats:
+            self.stats.save()
+            self.stats.log_stats()
+
+    def __enter__(self) -> "FetchEngine":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
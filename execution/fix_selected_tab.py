@@ -8,8 +8,9 @@ from typing import Any, Dict, List, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from execution.utils import DataManager, SHEET_NAME_DEFAULT, logger
-from newspaper import Article
+from execution.utils import DataManager, SHEET_NAME_DEFAULT, load_config, logger
+from execution.url_canon import row_key
+from execution.fetch_engine import FetchEngine
 
 
 TAB_NAME = "selected"
@@ -22,11 +23,13 @@ CANONICAL_HEADERS = [
     "ready_for_write",
     "bucket_reason",
     "url",
+    "url_key",
     "title",
     "source_date",
     "key_evidence_notes",
     "article_text_truncated",
     "article_text_hash",
+    "image_candidates",
 ]
 
 
@@ -42,15 +45,12 @@ def _truncate_for_sheet(text: str, max_chars: int = 45000) -> str:
     return text[:max_chars]
 
 
-def _fetch_full_text(url: str) -> str:
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text or ""
-    except Exception as e:
-        logger.warning(f"FullText fetch failed for {url}: {e}")
-        return ""
+def _fetch_full_texts(urls: List[str]) -> Dict[str, str]:
+    """Article text per URL, read through the shared article store (fetched concurrently on a miss)."""
+    if not urls:
+        return {}
+    with FetchEngine.from_config(load_config()) as engine:
+        return engine.fetch_many(urls)
 
 
 def _ensure_backup_dir() -> str:
@@ -103,7 +103,7 @@ def fix_selected_tab(backfill_article_text: bool = True) -> None:
     old_headers = values[0]
     data_rows = values[1:]
 
-    new_rows: List[List[str]] = []
+    row_maps: List[Dict[str, str]] = []
     for row in data_rows:
         row_map = _row_to_map(old_headers, row)
 
@@ -126,13 +126,25 @@ def fix_selected_tab(backfill_article_text: bool = True) -> None:
             repaired["source_date"] = repaired.get("key_evidence_notes", "")
             repaired["key_evidence_notes"] = ""
             row_map = repaired
+        row_maps.append(row_map)
+
+    def _needs_text(row_map: Dict[str, str]) -> bool:
+        return not (row_map.get("article_text_truncated") or "").strip() or not (row_map.get("article_text_hash") or "").strip()
 
+    texts: Dict[str, str] = {}
+    if backfill_article_text:
+        texts = _fetch_full_texts([
+            (m.get("url") or "").strip() for m in row_maps if (m.get("url") or "").strip() and _needs_text(m)
+        ])
+
+    new_rows: List[List[str]] = []
+    for row_map in row_maps:
         url = (row_map.get("url") or "").strip()
         article_text = (row_map.get("article_text_truncated") or "").strip()
         article_hash = (row_map.get("article_text_hash") or "").strip()
 
         if backfill_article_text and url and (not article_text or not article_hash):
-            full_text = _fetch_full_text(url)
+            full_text = texts.get(url, "")
             if full_text:
                 article_text = _truncate_for_sheet(full_text)
                 article_hash = _sha256(full_text)
@@ -141,6 +153,8 @@ def fix_selected_tab(backfill_article_text: bool = True) -> None:
         out_map["article_text_truncated"] = article_text
         out_map["article_text_hash"] = article_hash
         out_map.setdefault("selected_at", "")
+        out_map["url_key"] = row_key(out_map) if url else ""
+
 
         new_rows.append([str(out_map.get(h, "")) for h in CANONICAL_HEADERS])
 
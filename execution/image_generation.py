@@ -1,19 +1,21 @@
 """
 Image generation utilities for LinkedIn posts.
 Hybrid approach: Try scraping article image, fallback to AI generation.
+Image candidates collected in steps 01/02 (selected row `image_candidates`) are probed
+directly; the article page is downloaded only for rows without them.
 """
 
 import os
-import requests
+import json
 from typing import Optional, Dict, Any, List, Tuple
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
 import logging
 
 # Import after adding to path
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from execution.utils import query_llm
+from execution import replay
+from execution.extract import page_images
 
 logger = logging.getLogger("workflow")
 
@@ -105,109 +107,112 @@ def _get_image_dimensions(path: str) -> Optional[Tuple[int, int]]:
 
 
 def _extract_image_candidates(page_url: str, html_text: str) -> List[str]:
-    soup = BeautifulSoup(html_text, "html.parser")
-    candidates: List[str] = []
+    # Same candidates step 02 collects while extracting the article (execution/extract.py)
+    return page_images(page_url, html_text)
 
-    def add(u: str):
-        if not u:
-            return
-        u = u.strip()
-        if not _is_http_url(u):
-            u = urljoin(page_url, u)
-        if u not in candidates:
-            candidates.append(u)
 
-    # Social preview images (often OK, but sometimes logos)
-    for meta in soup.select("meta[property='og:image'], meta[property='og:image:secure_url']"):
-        add(meta.get("content", ""))
-    for meta in soup.select("meta[name='twitter:image'], meta[name='twitter:image:src']"):
-        add(meta.get("content", ""))
+def parse_image_candidates(value: Any) -> List[str]:
+    """Image URLs from a selected row's `image_candidates` cell (JSON list; [] when empty)."""
+    if not isinstance(value, str) or not value.strip():
+        return []
+    try:
+        urls = json.loads(value)
+    except ValueError:
+        return []
+    return [u for u in urls if isinstance(u, str) and _is_http_url(u)] if isinstance(urls, list) else []
+
+
+def _probe_candidates(candidates: List[str], draft_id: str) -> Optional[Dict[str, str]]:
+    """Downloads candidates in order and keeps the first that is not a logo and big enough."""
+    ensure_images_dir()
+    final_path = os.path.join(IMAGES_DIR, f"{draft_id}_scraped.jpg")
+
+    # Try candidates in order, but skip obvious logos early
+    for cand in candidates:
+        if _looks_like_logo(cand):
+            logger.info(f"Skipping likely logo image: {cand}")
+            continue
+
+        tmp_path = os.path.join(IMAGES_DIR, f"{draft_id}_cand.tmp")
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+        if not download_image(cand, tmp_path):
+            continue
+
+        # Basic size gate
+        file_size = 0
+        try:
+            file_size = os.path.getsize(tmp_path)
+        except Exception:
+            file_size = 0
+
+        dims = _get_image_dimensions(tmp_path)
+        if not dims:
+            logger.info(f"Rejecting image (unknown dimensions): {cand}")
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+            continue
+
+        width, height = dims
+        min_width = 700
+        min_height = 350
+        min_bytes = 80_000
+
+        if width < min_width or height < min_height or file_size < min_bytes:
+            logger.info(
+                f"Rejecting image (too small) url={cand} dims={width}x{height} bytes={file_size}"
+            )
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+            continue
 
-    # In-article images (prefer these if social images look like logos)
-    for selector in ["article img", "main img", "figure img", ".content img", ".article img"]:
-        for img in soup.select(selector):
-            add(img.get("src", "") or img.get("data-src", "") or img.get("data-lazy-src", ""))
+        # Accept: move into final location
+        try:
+            if os.path.exists(final_path):
+                os.remove(final_path)
+        except Exception:
+            pass
+        os.replace(tmp_path, final_path)
+        return {"image_path": final_path, "image_origin_url": cand}
 
-    return candidates[:12]
+    return None
 
 
-def scrape_article_best_image(url: str, draft_id: str) -> Optional[Dict[str, str]]:
+def scrape_article_best_image(url: str, draft_id: str, candidates: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
     """
     Attempts to find a relevant in-article image.
     Rejects likely logos and too-small images, then downloads the best candidate locally.
+    `candidates` collected upstream (selected row) are probed first; the article page is
+    downloaded only when none of them passes (its candidates minus those already tried).
     Returns: {"image_path": local path, "image_origin_url": image url} if found; otherwise None.
     """
     try:
+        tried: List[str] = []
+        if candidates:
+            logger.info(f"Probing {len(candidates)} image candidates collected upstream for: {url}")
+            found = _probe_candidates(candidates, draft_id)
+            if found:
+                return found
+            tried = list(candidates)
+            logger.info(f"No upstream image candidate passed; scraping the article page: {url}")
+
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
-        response = requests.get(url, headers=headers, timeout=12)
+        response = replay.http_get(url, headers=headers, timeout=12)
         response.raise_for_status()
-
-        candidates = _extract_image_candidates(url, response.text)
+        candidates = [c for c in _extract_image_candidates(url, response.text) if c not in tried]
         if not candidates:
             return None
-
-        ensure_images_dir()
-        final_path = os.path.join(IMAGES_DIR, f"{draft_id}_scraped.jpg")
-
-        # Try candidates in order, but skip obvious logos early
-        for cand in candidates:
-            if _looks_like_logo(cand):
-                logger.info(f"Skipping likely logo image: {cand}")
-                continue
-
-            tmp_path = os.path.join(IMAGES_DIR, f"{draft_id}_cand.tmp")
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-
-            if not download_image(cand, tmp_path):
-                continue
-
-            # Basic size gate
-            file_size = 0
-            try:
-                file_size = os.path.getsize(tmp_path)
-            except Exception:
-                file_size = 0
-
-            dims = _get_image_dimensions(tmp_path)
-            if not dims:
-                logger.info(f"Rejecting image (unknown dimensions): {cand}")
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-                continue
-
-            width, height = dims
-            min_width = 700
-            min_height = 350
-            min_bytes = 80_000
-
-            if width < min_width or height < min_height or file_size < min_bytes:
-                logger.info(
-                    f"Rejecting image (too small) url={cand} dims={width}x{height} bytes={file_size}"
-                )
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-                continue
-
-            # Accept: move into final location
-            try:
-                if os.path.exists(final_path):
-                    os.remove(final_path)
-            except Exception:
-                pass
-            os.replace(tmp_path, final_path)
-            return {"image_path": final_path, "image_origin_url": cand}
-
-        return None
+        return _probe_candidates(candidates, draft_id)
     except Exception as e:
         logger.warning(f"Failed to scrape image from {url}: {e}")
         return None
@@ -215,7 +220,7 @@ def scrape_article_best_image(url: str, draft_id: str) -> Optional[Dict[str, str
 def download_image(image_url: str, save_path: str) -> bool:
     """Download image from URL to local path."""
     try:
-        response = requests.get(image_url, timeout=15)
+        response = replay.http_get(image_url, timeout=15)
         response.raise_for_status()
         
         with open(save_path, 'wb') as f:
@@ -259,7 +264,7 @@ Generate the Fal.ai image prompt now (return ONLY the prompt, no explanation):
 """
     
     # Call OpenAI
-    image_prompt = query_llm(full_prompt, temperature=0.7)
+    image_prompt = query_llm(full_prompt, temperature=0.7, call_site="image_prompt")
     return image_prompt.strip()
 
 def generate_image_with_fal(prompt: str, draft_id: str) -> Optional[Dict[str, str]]:
@@ -275,21 +280,22 @@ def generate_image_with_fal(prompt: str, draft_id: str) -> Optional[Dict[str, st
     
     # Check API key
     api_key = os.getenv("FAL_KEY")
-    if not api_key:
+    if not api_key and not replay.is_replaying():
         logger.error("FAL_KEY not found in environment")
         return None
     
     try:
         # Generate image
         logger.info(f"Generating image with Fal.ai: {prompt[:60]}...")
-        result = fal_client.subscribe(
-            "fal-ai/flux/schnell",
-            arguments={
-                "prompt": prompt,
-                "image_size": "landscape_16_9",  # LinkedIn optimized
-                "num_inference_steps": 4,
-                "num_images": 1,
-            },
+        arguments = {
+            "prompt": prompt,
+            "image_size": "landscape_16_9",  # LinkedIn optimized
+            "num_inference_steps": 4,
+            "num_images": 1,
+        }
+        result = replay.through(
+            "fal", ["fal-ai/flux/schnell", arguments],
+            lambda: fal_client.subscribe("fal-ai/flux/schnell", arguments=arguments)
         )
         
         image_url = result['images'][0]['url']
@@ -308,36 +314,27 @@ def generate_image_with_fal(prompt: str, draft_id: str) -> Optional[Dict[str, st
         logger.error(f"Fal.ai image generation failed: {e}")
         return None
 
-def get_or_generate_image(
-    article_url: str,
-    article_title: str,
-    post_text: str,
-    bucket: str,
-    draft_id: str
-) -> Dict[str, Any]:
-    """
-    Main function: Try scraping article image, fallback to AI generation.
-    Returns a dict with fields:
-      - image_path: local image path (or "")
-      - image_source: "scraped" | "ai" | "none"
-      - image_prompt: prompt used for AI generation (or "")
-      - image_origin_url: scraped image url or generated image url (or "")
-    """
+NO_IMAGE = {"image_path": "", "image_source": "none", "image_prompt": "", "image_origin_url": ""}
+
+def scraped_image(article_url: str, draft_id: str, candidates: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Strategy 1: the article's own image. Does not need the post text, so step 03
+    starts it before the draft exists. Returns an image dict (see get_or_generate_image) or None."""
     ensure_images_dir()
-    
-    # Strategy 1: Try scraping article image
     logger.info(f"Attempting to scrape image from article: {article_url}")
-    scraped = scrape_article_best_image(article_url, draft_id=draft_id)
-    if scraped and scraped.get("image_path"):
-        logger.info(f"✓ Using scraped article image: {scraped.get('image_path')}")
-        return {
-            "image_path": scraped.get("image_path", ""),
-            "image_source": "scraped",
-            "image_prompt": "",
-            "image_origin_url": scraped.get("image_origin_url", ""),
-        }
-    
-    # Strategy 2: Generate with AI
+    scraped = scrape_article_best_image(article_url, draft_id=draft_id, candidates=candidates)
+    if not scraped or not scraped.get("image_path"):
+        return None
+    logger.info(f"✓ Using scraped article image: {scraped.get('image_path')}")
+    return {
+        "image_path": scraped.get("image_path", ""),
+        "image_source": "scraped",
+        "image_prompt": "",
+        "image_origin_url": scraped.get("image_origin_url", ""),
+    }
+
+def generated_image(post_text: str, bucket: str, article_title: str, draft_id: str) -> Dict[str, Any]:
+    """Strategy 2: an AI image from a prompt written for the post."""
+    ensure_images_dir()
     logger.info("Scraping failed, generating image with AI...")
     
     # Generate Fal.ai prompt using OpenAI
@@ -349,7 +346,7 @@ def get_or_generate_image(
     
     if not result:
         logger.warning("Both scraping and AI generation failed")
-        return {"image_path": "", "image_source": "none", "image_prompt": "", "image_origin_url": ""}
+        return dict(NO_IMAGE)
 
     local_path = result.get("image_path", "")
     image_url = result.get("image_url", "")
@@ -360,3 +357,20 @@ def get_or_generate_image(
         "image_prompt": image_prompt,
         "image_origin_url": image_url,
     }
+
+def get_or_generate_image(
+    article_url: str,
+    article_title: str,
+    post_text: str,
+    bucket: str,
+    draft_id: str
+) -> Dict[str, Any]:
+    """
+    Main function: Try scraping article image, fallback to AI generation.
+    Returns a dict with fields:
+      - image_path: local image path (or "")
+      - image_source: "scraped" | "ai" | "none"
+      - image_prompt: prompt used for AI generation (or "")
+      - image_origin_url: scraped image url or generated image url (or "")
+    """
+    return scraped_image(article_url, draft_id) or generated_image(post_text, bucket, article_title, draft_id)
@@ -45,5 +45,5 @@ def analyze_post_vs_article(payload: Dict[str, Any]) -> str:
     )
 
     logger.info(f"Running analysis model={model}")
-    return query_llm(prompt, model=model, temperature=temperature)
+    return query_llm(prompt, model=model, temperature=temperature, call_site="post_analysis")
 
@@ -0,0 +1,271 @@
+"""
+Local prefilter for step 02: rejects obvious misses before any LLM call.
+
+Two signals, both computed from title + snippet:
+  - compiled keyword matchers (one word-bounded regex per term group)
+    that give a prior confidence that the article is oil & gas related at all
+  - a small TF-IDF + logistic regression model trained on the LLM's own pass-1
+    accept/reject decisions, kept in .tmp/prefilter_history.json
+
+Until there are PREFILTER_MIN_TRAINING decisions (with both outcomes), only the
+keyword prior is used. Candidates whose accept probability is below
+PREFILTER_MIN_CONFIDENCE are rejected without an LLM call, except a sampled
+PREFILTER_AUDIT_RATE share that is still scored so false rejects can be measured.
+
+Disabled for the model (keyword prior only) and history under record/replay, so
+cassettes stay deterministic.
+"""
+
+import os
+import re
+import hashlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+
+PREFILTER_HISTORY_PATH = os.path.join(TMP_DIR, "prefilter_history.json")
+HISTORY_LIMIT = 3000      # most recent LLM decisions kept for training
+MAX_FEATURES = 2000       # TF-IDF vocabulary size
+MIN_DOC_FREQ = 2
+
+# Explicit AI/ML terms (generic automation alone does not count)
+AI_TERMS = [
+    "artificial intelligence", "ai", "machine learning", "ml", "deep learning",
+    "neural network", "ml model", "ai model", "ai-powered", "ai-driven", "ai-enabled",
+    "computer vision", "generative ai", "large language model", "llm",
+]
+OILFIELD_TERMS = [
+    "oilfield", "upstream", "drilling", "completion", "fracturing", "fracking",
+    "well", "rig", "production", "oil and gas", "oil & gas", "petroleum",
+    "halliburton", "slb", "schlumberger", "baker hughes", "weatherford",
+    "oilfield services", "field operations", "field execution",
+]
+# Wider oil & gas context used by the prefilter (pass-1 bucket signals)
+OIL_GAS_TERMS = OILFIELD_TERMS + [
+    "oil", "gas", "crude", "natural gas", "lng", "opec", "shale", "permian", "offshore",
+    "frac", "coiled tubing", "wireline", "workover", "well intervention", "artificial lift",
+    "esp", "gas lift", "rod pump", "well construction", "operator", "e&p", "exploration",
+    "reservoir", "subsea", "pipeline", "barrel", "bpd", "nov", "transocean", "nabors",
+    "patterson-uti", "chevron", "exxonmobil", "conocophillips", "aramco", "equinor", "petrobras",
+]
+REGULATION_TERMS = [
+    "regulation", "regulatory", "compliance", "rule", "law", "standard", "directive",
+    "guideline", "epa", "phmsa", "blm", "bsee", "methane", "flaring", "venting", "permit",
+    "leasing", "emissions",
+]
+PRACTICAL_TERMS = [
+    "deployment", "implementation", "case study", "field trial",
+    "operational", "production", "efficiency", "optimization",
+]
+OFFTOPIC_TERMS = [
+    "price target", "stock price", "shares of", "dividend", "etf", "bitcoin", "crypto",
+    "real estate", "celebrity", "horoscope", "recipe", "football", "box office",
+]
+
+
+def compile_terms(terms: List[str]) -> "re.Pattern":
+    """One alternation for a whole term group (longest first, word-bounded, plural-tolerant)."""
+    alternation = "|".join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf"(?<![\w&-])(?:{alternation})s?(?![\w&])", re.IGNORECASE)
+
+
+AI_RE = compile_terms(AI_TERMS)
+OILFIELD_RE = compile_terms(OILFIELD_TERMS)
+OIL_GAS_RE = compile_terms(OIL_GAS_TERMS)
+REGULATION_RE = compile_terms(REGULATION_TERMS)
+PRACTICAL_RE = compile_terms(PRACTICAL_TERMS)
+OFFTOPIC_RE = compile_terms(OFFTOPIC_TERMS)
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9&\-]+")
+STOPWORDS = frozenset(
+    "the and for with from that this into over after about its are was were has have will "
+    "new says said than more also their they been but not can may".split()
+)
+
+
+def distinct_hits(pattern: "re.Pattern", text: str) -> int:
+    return len({m.group(0).lower().rstrip("s") for m in pattern.finditer(text or "")})
+
+
+def keyword_features(text: str) -> Dict[str, int]:
+    return {
+        "ai": distinct_hits(AI_RE, text),
+        "oil_gas": distinct_hits(OIL_GAS_RE, text),
+        "regulation": distinct_hits(REGULATION_RE, text),
+        "practical": distinct_hits(PRACTICAL_RE, text),
+        "offtopic": distinct_hits(OFFTOPIC_RE, text),
+    }
+
+
+def keyword_confidence(features: Dict[str, int]) -> float:
+    """Prior probability that pass 1 would accept, from keyword hits alone."""
+    if not features["oil_gas"]:
+        p = 0.05
+    else:
+        p = min(0.35 + 0.15 * features["oil_gas"], 0.9)
+        if features["practical"]:
+            p += 0.05
+        if features["ai"] or features["regulation"]:
+            p += 0.05
+    p -= 0.2 * features["offtopic"]
+    return float(min(max(p, 0.01), 0.99))
+
+
+def candidate_text(item: Dict) -> str:
+    return f"{item.get('title') or ''} {item.get('snippet') or ''}"
+
+
+def _tokens(text: str) -> List[str]:
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class TfidfLogistic:
+    """TF-IDF features plus keyword-group counts, fitted with L2-regularised logistic regression."""
+
+    def __init__(self, l2: float = 1.0, epochs: int = 300, lr: float = 0.5):
+        self.l2 = l2
+        self.epochs = epochs
+        self.lr = lr
+        self.vocab: Dict[str, int] = {}
+        self.idf = None
+        self.weights = None
+        self.bias = 0.0
+
+    def _matrix(self, texts: List[str]) -> np.ndarray:
+        X = np.zeros((len(texts), len(self.vocab) + 5), dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = Counter(t for t in _tokens(text) if t in self.vocab)
+            for token, n in counts.items():
+                X[i, self.vocab[token]] = 1.0 + np.log(n)
+        X[:, :len(self.vocab)] *= self.idf
+        norms = np.linalg.norm(X[:, :len(self.vocab)], axis=1, keepdims=True)
+        X[:, :len(self.vocab)] /= np.maximum(norms, 1e-9)
+        for i, text in enumerate(texts):
+            X[i, len(self.vocab):] = np.minimum(list(keyword_features(text).values()), 3) / 3.0
+        return X
+
+    def fit(self, texts: List[str], labels: List[int]) -> "TfidfLogistic":
+        doc_freq = Counter(t for text in texts for t in set(_tokens(text)))
+        common = [t for t, n in doc_freq.most_common() if n >= MIN_DOC_FREQ][:MAX_FEATURES]
+        self.vocab = {t: i for i, t in enumerate(common)}
+        self.idf = np.array([np.log((1 + len(texts)) / (1 + doc_freq[t])) + 1 for t in common], dtype=np.float32)
+
+        X = self._matrix(texts)
+        y = np.asarray(labels, dtype=np.float32)
+        # Balanced class weights, so the rarer outcome is not drowned out
+        pos = max(y.mean(), 1e-6)
+        sample_w = np.where(y == 1, 0.5 / pos, 0.5 / max(1 - pos, 1e-6)).astype(np.float32)
+        w = np.zeros(X.shape[1], dtype=np.float32)
+        b = 0.0
+        n = len(y)
+        for _ in range(self.epochs):
+            err = (_sigmoid(X @ w + b) - y) * sample_w
+            w -= self.lr * (X.T @ err / n + self.l2 * w / n)
+            b -= self.lr * float(err.mean())
+        self.weights, self.bias = w, b
+        return self
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        return _sigmoid(self._matrix(texts) @ self.weights + self.bias)
+
+
+class Prefilter:
+    def __init__(
+        self,
+        min_confidence: float = 0.15,
+        audit_rate: float = 0.1,
+        min_training: int = 100,
+        path: str = PREFILTER_HISTORY_PATH,
+    ):
+        self.min_confidence = float(min_confidence)
+        self.audit_rate = float(audit_rate)
+        self.min_training = int(min_training)
+        self.path = path
+        self.persist = replay.mode() == "off"
+        self.history: List[Dict] = load_json_state(path, []) if self.persist else []
+        self.model: Optional[TfidfLogistic] = None
+        self.stats = Counter()
+        self._train()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "Prefilter":
+        return cls(
+            min_confidence=float(config.get("PREFILTER_MIN_CONFIDENCE", 0.15)),
+            audit_rate=float(config.get("PREFILTER_AUDIT_RATE", 0.1)),
+            min_training=int(config.get("PREFILTER_MIN_TRAINING", 100)),
+        )
+
+    def _train(self):
+        labels = [int(r["accepted"]) for r in self.history]
+        if len(labels) < self.min_training or len(set(labels)) < 2:
+            logger.info(f"Prefilter: {len(labels)} past decisions, using keyword rules only "
+                        f"(model needs {self.min_training} with both outcomes).")
+            return
+        self.model = TfidfLogistic().fit([r["text"] for r in self.history], labels)
+        logger.info(f"Prefilter: model trained on {len(labels)} past decisions ({sum(labels)} accepted).")
+
+    def confidence(self, items: List[Dict]) -> List[float]:
+        """Accept probability per candidate (model if trained, else keyword prior)."""
+        texts = [candidate_text(c) for c in items]
+        if self.model is not None and texts:
+            return [float(p) for p in self.model.predict(texts)]
+        return [keyword_confidence(keyword_features(t)) for t in texts]
+
+    def _audited(self, item: Dict) -> bool:
+        key = item.get("url_key") or item.get("url") or ""
+        bucket = int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < self.audit_rate
+
+    def apply(self, items: List[Dict]) -> List[Dict]:
+        """Sets `prefilter_confidence` on every item; returns the ones that still need the LLM."""
+        keep = []
+        for item, p in zip(items, self.confidence(items)):
+            item["prefilter_confidence"] = round(p, 3)
+            self.stats["seen"] += 1
+            if p >= self.min_confidence:
+                keep.append(item)
+            elif self._audited(item):
+                item["prefilter_audit"] = True
+                self.stats["audited"] += 1
+                keep.append(item)
+            else:
+                self.stats["rejected"] += 1
+                logger.info(f"Prefiltered: {item.get('url')} (confidence {p:.2f})")
+        return keep
+
+    def observe(self, item: Dict, accepted: bool):
+        """Records the LLM's pass-1 decision for training and agreement stats."""
+        # Same threshold the filter rejects on, so "disagreed" counts decisions the filter would flip
+        predicted = item.get("prefilter_confidence", 1.0) >= self.min_confidence
+        if item.get("prefilter_audit"):
+            self.stats["audit_overruled"] += int(accepted)
+        else:
+            self.stats["compared"] += 1
+            self.stats["disagreed"] += int(predicted != accepted)
+        self.history.append({
+            "text": candidate_text(item)[:1000],
+            "accepted": bool(accepted),
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    def save(self):
+        if self.persist:
+            save_json_state(self.path, self.history[-HISTORY_LIMIT:])
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(
+            f"Prefilter: {s['rejected']} of {s['seen']} candidates rejected locally ({s['rejected']} LLM calls saved); "
+            f"audit: {s['audit_overruled']}/{s['audited']} local rejects accepted by the LLM; "
+            f"disagreement with the LLM on scored items: {s['disagreed']}/{s['compared']}."
+        )
@@ -0,0 +1,121 @@
+"""
+Article text supplied by the search provider instead of a separate download.
+
+Two paths fill the article store (execution/article_store.py) so that step 02's
+FetchEngine finds the text without an HTTP round trip to the publisher:
+
+  - sourcing: Tavily search with `include_raw_content` (TAVILY_RAW_CONTENT) returns
+    each result's page text; `store_provider_content` keeps it when it is at least
+    EXTRACT_MIN_CHARS long
+  - scoring: `TavilyExtractBatcher` (TAVILY_EXTRACT) groups the URLs FetchEngine is
+    asked for within a short window into one Tavily extract call; URLs Tavily cannot
+    extract fall back to the normal download
+
+Provider text is stored with `extractor` set to the provider path, so it can be told
+apart from our own extraction. Both are recorded/replayed like the search calls.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from execution.utils import logger
+from execution import replay
+from execution.article_store import ArticleStore, STATUS_OK
+from execution.url_canon import url_key
+
+RAW_CONTENT_EXTRACTOR = "tavily_raw_content"
+EXTRACT_EXTRACTOR = "tavily_extract"
+
+
+def store_provider_content(store: Optional[ArticleStore], url: str, text: str, extractor: str,
+                           min_chars: int = 400, **extra) -> bool:
+    """Stores provider text for `url` unless it is too short or a fresh entry exists."""
+    if not store or not url or not isinstance(text, str) or len(text.strip()) < min_chars:
+        return False
+    existing = store.lookup(url)
+    if existing and existing.get("fresh") and existing.get("status") == STATUS_OK:
+        return False
+    store.put(url, text.strip(), status=STATUS_OK, extractor=extractor, **extra)
+    return True
+
+
+class TavilyExtractBatcher:
+    """Collects URLs for `window_seconds` (or until `max_batch`) and extracts them in one call.
+    `fetch(url)` resolves to the extracted text, '' when Tavily could not extract it."""
+
+    def __init__(self, client, window_seconds: float = 0.3, max_batch: int = 20, min_chars: int = 400):
+        self.client = client
+        self.window = float(window_seconds)
+        self.max_batch = max(1, int(max_batch))
+        self.min_chars = int(min_chars)
+        self.stats = {"calls": 0, "urls": 0, "extracted": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+
+    @classmethod
+    def from_config(cls, config: Dict, client) -> "TavilyExtractBatcher":
+        return cls(
+            client,
+            window_seconds=float(config.get("TAVILY_EXTRACT_WINDOW_MS", 300)) / 1000,
+            max_batch=int(config.get("TAVILY_EXTRACT_MAX_BATCH", 20)),
+            min_chars=int(config.get("EXTRACT_MIN_CHARS", 400)),
+        )
+
+    def fetch(self, url: str) -> "Future[str]":
+        fut: Future = Future()
+        with self._lock:
+            self._pending.append((url, fut))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            threading.Thread(target=self._extract, args=(batch,), daemon=True).start()
+        return fut
+
+    def _take(self) -> List[Tuple[str, Future]]:
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._extract(batch)
+
+    def _extract(self, batch: List[Tuple[str, Future]]):
+        urls = sorted({url for url, _ in batch})
+        texts: Dict[str, str] = {}
+        try:
+            response = replay.through("tavily", ["extract", urls], lambda: self.client.extract(urls=urls))
+            for r in response.get("results", []) or []:
+                text = r.get("raw_content") or ""
+                if len(text.strip()) >= self.min_chars:
+                    texts[url_key(r.get("url") or "")] = text.strip()
+        except Exception as e:
+            logger.warning(f"Tavily extract failed for {len(urls)} URLs: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["urls"] += len(urls)
+            self.stats["extracted"] += len(texts)
+        for url, fut in batch:
+            fut.set_result(texts.get(url_key(url), ""))
+
+    def close(self):
+        self.flush()
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(f"Tavily extract: {s['extracted']} of {s['urls']} URLs in {s['calls']} calls "
+                    f"({s['errors']} failed calls); the rest were downloaded.")
@@ -0,0 +1,129 @@
+"""
+Adaptive query scheduler for 01_source_news.
+
+Keeps per-query yield statistics in .tmp/query_stats.json:
+  - searches / results / net_new   (recorded by sourcing; cache hits are not counted)
+  - pass1_survivors / winners      (recorded by scoring via the `search_query` column)
+
+Queries are ordered by expected yield, and a query whose searches return only
+already-known URLs is backed off exponentially (QUERY_BACKOFF_HOURS, doubling up
+to QUERY_BACKOFF_MAX_DAYS). The static lists in `get_bucket_queries` stay the
+source of truth; the scheduler only reorders and rests them.
+"""
+
+import os
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+
+QUERY_STATS_PATH = os.path.join(TMP_DIR, "query_stats.json")
+
+# Optimistic prior so untried queries get explored before proven ones run dry
+PRIOR_SEARCHES = 1.0
+PRIOR_NET_NEW = 3.0
+
+# How much downstream outcomes are worth relative to a net-new URL
+SURVIVOR_WEIGHT = 2.0
+WINNER_WEIGHT = 5.0
+
+
+class QueryScheduler:
+    def __init__(self, backoff_hours: float = 24, backoff_max_days: float = 14, path: str = QUERY_STATS_PATH):
+        self.path = path
+        self.backoff_hours = float(backoff_hours)
+        self.backoff_max_hours = float(backoff_max_days) * 24
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict] = load_json_state(path, {})
+
+    def _entry(self, query: str) -> Dict:
+        return self.stats.setdefault(query, {
+            "searches": 0, "results": 0, "net_new": 0,
+            "pass1_survivors": 0, "winners": 0,
+            "dup_streak": 0, "next_eligible_at": "", "last_searched_at": "",
+        })
+
+    def expected_yield(self, query: str) -> float:
+        """Expected net-new value per search (net-new URLs plus weighted downstream outcomes)."""
+        s = self.stats.get(query, {})
+        value = (
+            s.get("net_new", 0)
+            + SURVIVOR_WEIGHT * s.get("pass1_survivors", 0)
+            + WINNER_WEIGHT * s.get("winners", 0)
+        )
+        return (value + PRIOR_NET_NEW) / (s.get("searches", 0) + PRIOR_SEARCHES)
+
+    def expected_net_new(self, query: str) -> float:
+        s = self.stats.get(query, {})
+        return (s.get("net_new", 0) + PRIOR_NET_NEW) / (s.get("searches", 0) + PRIOR_SEARCHES)
+
+    def is_backed_off(self, query: str, now: datetime = None) -> bool:
+        until = self.stats.get(query, {}).get("next_eligible_at")
+        if not until:
+            return False
+        now = now or replay.now()
+        try:
+            return datetime.fromisoformat(until) > now
+        except ValueError:
+            return False
+
+    def plan(self, lane: str, queries: List[str]) -> List[str]:
+        """Eligible queries for a lane, best expected yield first (ties keep list order)."""
+        active = [q for q in queries if not self.is_backed_off(q)]
+        rested = len(queries) - len(active)
+        if rested:
+            logger.info(f"Scheduler [{lane}]: {rested} query(s) backed off after duplicate-only runs.")
+        if not active:
+            # Never starve a lane completely: fall back to the least-recently rested query
+            active = sorted(queries, key=lambda q: self.stats.get(q, {}).get("next_eligible_at", ""))[:1]
+        order = {q: i for i, q in enumerate(queries)}
+        return sorted(active, key=lambda q: (-self.expected_yield(q), order[q]))
+
+    def wave(self, planned: List[str], needed: int) -> Tuple[List[str], List[str]]:
+        """Splits planned queries into the smallest batch expected to cover `needed` new URLs, and the rest."""
+        batch, expected = [], 0.0
+        for i, q in enumerate(planned):
+            if batch and expected >= needed:
+                return batch, planned[i:]
+            batch.append(q)
+            expected += self.expected_net_new(q)
+        return batch, []
+
+    def record_search(self, query: str, n_results: int, n_net_new: int):
+        """Records one paid search. Duplicate-only results extend the back-off."""
+        now = replay.now()
+        with self._lock:
+            s = self._entry(query)
+            s["searches"] += 1
+            s["results"] += n_results
+            s["net_new"] += n_net_new
+            s["last_searched_at"] = now.isoformat()
+            if n_results and not n_net_new:
+                s["dup_streak"] += 1
+                hours = min(self.backoff_hours * math.pow(2, s["dup_streak"] - 1), self.backoff_max_hours)
+                s["next_eligible_at"] = (now + timedelta(hours=hours)).isoformat()
+                verb = "retired" if hours >= self.backoff_max_hours else "backed off"
+                logger.info(f"Scheduler: '{query}' returned only duplicates {s['dup_streak']}x; {verb} for {hours:.0f}h.")
+            elif n_net_new:
+                s["dup_streak"] = 0
+                s["next_eligible_at"] = ""
+
+    def record_outcomes(self, survivors: Dict[str, int], winners: Dict[str, int]):
+        """Credits pass-1 survivors and selected winners/backups back to the queries that found them."""
+        with self._lock:
+            for q, n in survivors.items():
+                if q:
+                    self._entry(q)["pass1_survivors"] += n
+            for q, n in winners.items():
+                if q:
+                    self._entry(q)["winners"] += n
+
+    def save(self):
+        with self._lock:
+            try:
+                save_json_state(self.path, self.stats)
+            except Exception as e:
+                logger.warning(f"Could not save query stats: {e}")
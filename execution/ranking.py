@@ -0,0 +1,141 @@
+"""
+Weighted ranking of scored candidates.
+
+A candidate's total is the weighted mean of its five 1-5 scoring dimensions.
+The weights are the SCORE_WEIGHT_* keys in _run_config.md; the defaults are the
+original 2.0 / 1.0 / 1.5 / 1.5 / 1.0.
+
+`RankingTable` holds the dimension scores of many candidates as one numpy matrix,
+computes every total with a single matrix-vector product, and selects top-k per bucket
+(or across buckets, for TEST mode) with heaps instead of full sorts. Step 02 uses it
+for winner selection. Backtests over thousands of archived candidates can call
+`rank_frame` on a DataFrame directly.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ("relevance", "freshness", "credibility", "practicality", "linkedin_worthiness")
+DEFAULT_WEIGHTS = {
+    "relevance": 2.0,
+    "freshness": 1.0,
+    "credibility": 1.5,
+    "practicality": 1.5,
+    "linkedin_worthiness": 1.0,
+}
+# Config key per dimension (the config parser only accepts [A-Z_] keys)
+WEIGHT_KEYS = {
+    "relevance": "SCORE_WEIGHT_RELEVANCE",
+    "freshness": "SCORE_WEIGHT_FRESHNESS",
+    "credibility": "SCORE_WEIGHT_CREDIBILITY",
+    "practicality": "SCORE_WEIGHT_PRACTICALITY",
+    "linkedin_worthiness": "SCORE_WEIGHT_LINKEDIN",
+}
+
+
+def score_column(dimension: str) -> str:
+    return f"{dimension}_score"
+
+
+class Ranker:
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        w = np.array([float(weights[d]) for d in DIMENSIONS], dtype=np.float64)
+        if (w < 0).any() or w.sum() <= 0:
+            raise ValueError(f"Score weights must be non-negative and not all zero: {weights}")
+        # Normalized once, so a total stays on the 1-5 scale whatever the weights add up to
+        self.weights = w / w.sum()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "Ranker":
+        return cls({d: float(config.get(key, DEFAULT_WEIGHTS[d])) for d, key in WEIGHT_KEYS.items()})
+
+    def total(self, scores: Dict) -> float:
+        """Weighted total of one candidate (`<dimension>_score` keys; missing ones count 0)."""
+        return float(np.dot(self.weights, [_number(scores.get(score_column(d))) for d in DIMENSIONS]))
+
+    def totals(self, matrix: np.ndarray) -> np.ndarray:
+        return matrix @ self.weights
+
+
+def _number(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+
+def score_matrix(frame: pd.DataFrame) -> np.ndarray:
+    """(n, 5) float matrix of the dimension columns; missing columns / cells are 0."""
+    columns = [
+        pd.to_numeric(frame[score_column(d)], errors="coerce").to_numpy(dtype=np.float64)
+        if score_column(d) in frame.columns else np.zeros(len(frame))
+        for d in DIMENSIONS
+    ]
+    return np.nan_to_num(np.column_stack(columns) if columns else np.zeros((len(frame), 0)))
+
+
+class RankingTable:
+    """Columnar keys / buckets / totals for a set of candidates."""
+
+    def __init__(self, keys: Sequence[str], buckets: Sequence[str], totals: np.ndarray):
+        self.keys = list(keys)
+        self.buckets = np.asarray(buckets, dtype=object)
+        self.totals = np.asarray(totals, dtype=np.float64)
+
+    @classmethod
+    def from_records(cls, records: List[Dict], ranker: Optional[Ranker] = None,
+                     key: str = "url_key", bucket: str = "bucket", score: Optional[str] = None) -> "RankingTable":
+        """Totals from the dimension scores, or taken as-is from the `score` field when given."""
+        frame = pd.DataFrame.from_records(records)
+        return cls.from_frame(frame, ranker, key=key, bucket=bucket, score=score)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, ranker: Optional[Ranker] = None,
+                   key: str = "url_key", bucket: str = "bucket", score: Optional[str] = None) -> "RankingTable":
+        if frame.empty:
+            return cls([], [], np.zeros(0))
+        if score is not None:
+            totals = np.nan_to_num(pd.to_numeric(frame[score], errors="coerce").to_numpy(dtype=np.float64))
+        else:
+            totals = (ranker or Ranker()).totals(score_matrix(frame))
+        buckets = frame[bucket].to_numpy() if bucket in frame.columns else [""] * len(frame)
+        return cls(frame[key].tolist(), buckets, totals)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def top_k(self, k: int, bucket: Optional[str] = None) -> List[int]:
+        """Row indices of the k best totals, best first (all buckets when `bucket` is None).
+        Ties keep table order."""
+        rows: Iterable[int] = range(len(self.keys)) if bucket is None else np.flatnonzero(self.buckets == bucket)
+        return [int(i) for i in heapq.nsmallest(k, rows, key=lambda i: (-self.totals[i], i))]
+
+    def top_k_per_bucket(self, k: int) -> Dict[str, List[int]]:
+        """The k best rows of every bucket, in one pass with one bounded heap per bucket."""
+        heaps: Dict[str, List] = {}
+        for i, (bucket, total) in enumerate(zip(self.buckets, self.totals)):
+            heap = heaps.setdefault(bucket, [])
+            entry = (total, -i)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        return {b: [-i for _, i in sorted(h, reverse=True)] for b, h in heaps.items()}
+
+
+def rank_frame(frame: pd.DataFrame, ranker: Optional[Ranker] = None, k: Optional[int] = None,
+               per_bucket: bool = True) -> pd.DataFrame:
+    """`frame` with a `total_score` column, cut to the top k per bucket (or overall), best first."""
+    table = RankingTable.from_frame(frame.assign(_row=range(len(frame))), ranker, key="_row")
+    ranked = frame.assign(total_score=table.totals)
+    if k is None:
+        return ranked.sort_values("total_score", ascending=False, kind="stable")
+    if per_bucket:
+        rows = [i for picks in table.top_k_per_bucket(k).values() for i in picks]
+        return ranked.iloc[rows].sort_values(["bucket", "total_score"], ascending=[True, False], kind="stable")
+    return ranked.iloc[table.top_k(k)]
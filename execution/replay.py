@@ -0,0 +1,317 @@
+"""
+Record/replay layer for every external service the pipeline touches
+(OpenAI, Tavily, DDG, article/image HTTP, Fal.ai, Google Sheets).
+
+Modes (env REPLAY_MODE, or `run_pipeline.py --record NAME` / `--replay NAME`):
+  off     - call services normally (default, zero overhead)
+  record  - call services and store each response in a cassette under .tmp/cassettes/<name>/
+  replay  - never touch the network; serve responses from the cassette
+
+Injected latency in replay (env REPLAY_LATENCY_MS or `--replay-latency`):
+  0 (default) - answer instantly, to measure the pipeline's own overhead
+  <ms>        - fixed delay per call
+  recorded    - sleep for the latency measured when the call was recorded
+
+Calls are keyed by a hash of their arguments plus an occurrence counter, so the
+same request made twice in a run replays both recorded answers in order.
+
+The run clock is recorded too (clock.json): date logic reads `now()`, which in replay
+answers with the recorded time, so freshness scores, look-back windows and TTLs do
+not drift when a cassette is replayed on a later day.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("workflow")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASSETTE_ROOT = os.path.join(BASE_DIR, ".tmp", "cassettes")
+
+# Request headers that change the response (conditional GETs); everything else is ignored in keys.
+KEYED_HEADERS = ("if-none-match", "if-modified-since", "range")
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_clock: Dict[str, Any] = {}  # anchor (run start, UTC) and the monotonic time it was taken
+
+
+class ReplayMiss(Exception):
+    """Raised in replay mode when the cassette has no recorded response for a call."""
+
+
+class ReplayedError(RuntimeError):
+    """Re-raised in replay mode for calls that raised when they were recorded."""
+
+
+def configure(mode: str, cassette: Optional[str] = None, latency: Optional[str] = None):
+    """Sets the mode for this process (also exported so child scripts inherit it)."""
+    os.environ["REPLAY_MODE"] = mode
+    if cassette:
+        os.environ["REPLAY_CASSETTE"] = cassette
+    if latency is not None:
+        os.environ["REPLAY_LATENCY_MS"] = str(latency)
+    with _lock:
+        _counters.clear()
+        _stats.clear()
+        _clock.clear()
+    if mode != "off":
+        logger.info(f"Replay layer: mode={mode} cassette={cassette_dir()} latency={os.getenv('REPLAY_LATENCY_MS', '0')}")
+
+
+def mode() -> str:
+    return os.getenv("REPLAY_MODE", "off").strip().lower()
+
+
+def is_replaying() -> bool:
+    return mode() == "replay"
+
+
+def is_recording() -> bool:
+    return mode() == "record"
+
+
+def cassette_dir() -> str:
+    return os.path.join(CASSETTE_ROOT, os.getenv("REPLAY_CASSETTE", "default"))
+
+
+def output_dir() -> str:
+    """Where writes land during replay (nothing is sent to Sheets)."""
+    return os.path.join(cassette_dir(), "out")
+
+
+def _clock_path() -> str:
+    return os.path.join(cassette_dir(), "clock.json")
+
+
+def _clock_anchor(current: str) -> datetime:
+    if current == "replay":
+        try:
+            with open(_clock_path(), "r", encoding="utf-8") as f:
+                return datetime.fromisoformat(json.load(f)["started_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Replay: no recorded run clock ({e}); using the wall clock.")
+            return datetime.now(timezone.utc)
+    anchor = datetime.now(timezone.utc)
+    try:
+        os.makedirs(cassette_dir(), exist_ok=True)
+        with open(_clock_path(), "w", encoding="utf-8") as f:
+            json.dump({"started_at": anchor.isoformat()}, f)
+    except OSError as e:
+        logger.warning(f"Replay: could not record the run clock: {e}")
+    return anchor
+
+
+def now() -> datetime:
+    """Current UTC time for date logic. Off: the wall clock. Record: the wall clock, with
+    the run's start stored in the cassette on first use. Replay: the recorded start plus
+    the time elapsed since this process first asked."""
+    current = mode()
+    if current not in ("record", "replay"):
+        return datetime.now(timezone.utc)
+    with _lock:
+        if "anchor" not in _clock:
+            _clock["anchor"] = _clock_anchor(current)
+            _clock["started"] = time.monotonic()
+        return _clock["anchor"] + timedelta(seconds=time.monotonic() - _clock["started"])
+
+
+def _entry_path(service: str, entry_key: str) -> str:
+    return os.path.join(cassette_dir(), service, f"{entry_key}.json")
+
+
+def _key(key_parts: Any) -> str:
+    raw = json.dumps(key_parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _next_entry_key(service: str, base: str) -> str:
+    with _lock:
+        n = _counters.get(f"{service}/{base}", 0)
+        _counters[f"{service}/{base}"] = n + 1
+    return f"{base}_{n}"
+
+
+def _count(service: str, outcome: str):
+    with _lock:
+        svc = _stats.setdefault(service, {})
+        svc[outcome] = svc.get(outcome, 0) + 1
+
+
+def _inject_latency(entry: Dict[str, Any]):
+    setting = os.getenv("REPLAY_LATENCY_MS", "0").strip().lower()
+    if setting == "recorded":
+        delay_ms = entry.get("elapsed_ms", 0)
+    else:
+        try:
+            delay_ms = int(setting)
+        except ValueError:
+            delay_ms = 0
+    if delay_ms > 0:
+        time.sleep(delay_ms / 1000.0)
+
+
+def through(
+    service: str,
+    key_parts: Any,
+    fn: Callable[[], Any],
+    encode: Optional[Callable[[Any], Any]] = None,
+    decode: Optional[Callable[[Any], Any]] = None,
+) -> Any:
+    """Runs `fn` (off), runs and stores it (record), or serves the stored result (replay).
+    `encode`/`decode` convert non-JSON results (DataFrames, responses) to and from JSON."""
+    current = mode()
+    if current not in ("record", "replay"):
+        return fn()
+
+    base = _key(key_parts)
+    entry_key = _next_entry_key(service, base)
+
+    if current == "replay":
+        path = _entry_path(service, entry_key)
+        if not os.path.exists(path):
+            # Same request recorded fewer times than it is replayed: reuse the first answer.
+            path = _entry_path(service, f"{base}_0")
+        if not os.path.exists(path):
+            _count(service, "miss")
+            raise ReplayMiss(f"No recorded '{service}' response for {str(key_parts)[:120]}")
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        _count(service, "replayed")
+        _inject_latency(entry)
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        value = entry.get("value")
+        return decode(value) if decode else value
+
+    started = time.monotonic()
+    entry: Dict[str, Any] = {"service": service, "label": str(key_parts)[:200]}
+    try:
+        result = fn()
+        entry["value"] = encode(result) if encode else result
+        return result
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        entry["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+        path = _entry_path(service, entry_key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            _count(service, "recorded")
+        except Exception as e:
+            logger.warning(f"Replay: could not record '{service}' entry: {e}")
+
+
+def summary() -> Dict[str, Dict[str, int]]:
+    """Per-service counts of recorded / replayed / missed calls in this process."""
+    with _lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+# --- HTTP ---
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response, used whenever record/replay is active."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, encoding: Optional[str] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size: int = 65536):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "encoding": self.encoding,
+            "content_b64": base64.b64encode(self.content).decode("ascii"),
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ReplayResponse":
+        return cls(
+            url=data.get("url", ""),
+            status_code=int(data.get("status_code", 200)),
+            headers=data.get("headers") or {},
+            content=base64.b64decode(data.get("content_b64", "")),
+            encoding=data.get("encoding"),
+        )
+
+
+def http_request(method: str, url: str, session: Any = None, **kwargs) -> Any:
+    """requests-compatible HTTP call that goes through the cassette.
+    In `off` mode this is exactly `requests.request` (or `session.request`)."""
+    import requests
+
+    requester = session.request if session is not None else requests.request
+    if mode() not in ("record", "replay"):
+        return requester(method, url, **kwargs)
+
+    headers = {k.lower(): v for k, v in (kwargs.get("headers") or {}).items() if k.lower() in KEYED_HEADERS}
+    key_parts = [method.upper(), url, kwargs.get("params"), headers]
+
+    def live() -> ReplayResponse:
+        resp = requester(method, url, **kwargs)
+        try:
+            return ReplayResponse(
+                url=str(resp.url),
+                status_code=resp.status_code,
+                headers=dict(resp.headers),
+                content=resp.content,
+                encoding=resp.encoding,
+            )
+        finally:
+            resp.close()
+
+    return through("http", key_parts, live, encode=lambda r: r.to_json(), decode=ReplayResponse.from_json)
+
+
+def http_get(url: str, session: Any = None, **kwargs) -> Any:
+    return http_request("GET", url, session=session, **kwargs)
+
+
+def records_to_json(df: Any) -> Dict[str, List]:
+    """Encodes a DataFrame for the cassette (columns kept so empty tabs round-trip)."""
+    df = df.where(df.notnull(), None)
+    return {"columns": [str(c) for c in df.columns], "records": df.to_dict("records")}
+
+
+def records_from_json(data: Dict[str, List]) -> Any:
+    import pandas as pd
+    return pd.DataFrame(data.get("records") or [], columns=data.get("columns") or None)
@@ -7,6 +7,7 @@ import gspread
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import DataManager, logger, SHEET_NAME_DEFAULT
+from execution.run_state import RunState
 
 def reset_sheet():
     logger.info("Resetting 'raw_candidates' with correct schema...")
@@ -28,6 +29,10 @@ def reset_sheet():
         worksheet.append_row(headers)
         
         logger.info(f"Sheet cleared and initialized with headers: {headers}")
+
+        state = RunState()
+        state.forget_output("raw_candidates")
+        state.save()
             
     except Exception as e:
         logger.error(f"Error resetting sheet: {e}")
@@ -10,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import DataManager, logger, load_config, SHEET_NAME_DEFAULT
 from execution.post_analysis import analyze_post_vs_article
+from execution.article_store import ArticleStore
+from execution.fetch_engine import FetchEngine
 
 
 STUB_FILE = os.path.join("execution", "stub_posts.json")
@@ -202,6 +204,19 @@ def _load_posts_for_review() -> list:
         return json.load(f) or []
 
 
+def _article_text(sel: dict, url: str, fetch: bool = False) -> str:
+    """Full text from the article store, else the sheet's truncated copy.
+    With `fetch`, a URL missing from both is fetched (and stored) once."""
+    text = ArticleStore.from_config().text(url) if url else None
+    if text:
+        return text
+    text = str(sel.get("article_text_truncated") or "")
+    if text or not (fetch and url):
+        return text
+    with FetchEngine.from_config(load_config(), max_workers=1) as engine:
+        return engine.fetch_text(url)
+
+
 def _selected_map_by_url() -> dict:
     dm = DataManager()
     df = dm.read_data("selected")
@@ -291,7 +306,7 @@ def build_page_html() -> str:
         title = str(sel.get("title") or "Article")
         bucket = str(sel.get("bucket") or "")
         source_date = str(sel.get("source_date") or "")
-        article_text = str(sel.get("article_text_truncated") or "")
+        article_text = _article_text(sel, link)
         post_text = str(p.get("text") or "")
 
         domain = ""
@@ -409,7 +424,7 @@ class Handler(BaseHTTPRequestHandler):
                 "title": str(sel.get("title") or ""),
                 "url": link,
                 "post_text": str(post.get("text") or ""),
-                "article_text": str(sel.get("article_text_truncated") or ""),
+                "article_text": _article_text(sel, link, fetch=True),
             }
 
             analysis = analyze_post_vs_article(payload)
@@ -8,6 +8,8 @@ import webbrowser
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from execution.utils import logger
+from execution import replay
+from execution.run_state import run_stage
 
 # Import step functions
 import importlib
@@ -21,8 +23,19 @@ def main():
     parser.add_argument("--mode", choices=["TEST", "PROD"], help="Override RUN_SIZE")
     parser.add_argument("--step", choices=["01", "02", "03", "04", "all"], default="all", help="Run specific step or all")
     parser.add_argument("--force", action="store_true", help="Force sourcing even if recent run exists")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the search result cache")
+    parser.add_argument("--record", metavar="CASSETTE", help="Record all external calls to .tmp/cassettes/CASSETTE")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Replay external calls from .tmp/cassettes/CASSETTE (no network)")
+    parser.add_argument("--replay-latency", default="0", help="Injected latency per replayed call: milliseconds or 'recorded'")
     
     args = parser.parse_args()
+
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    if args.record:
+        replay.configure("record", args.record)
+    elif args.replay:
+        replay.configure("replay", args.replay, args.replay_latency)
     
     # 1. Handle Overrides
     if args.mode:
@@ -37,25 +50,27 @@ def main():
             if hasattr(source_news, 'run_sourcing'):
                  # Check signature or just try? 
                  # We updated it to take force kwarg.
-                 source_news.run_sourcing(force=args.force)
+                 run_stage("source_news", source_news.run_sourcing, force=args.force, use_cache=not args.no_cache)
             
         if args.step in ["02", "all"]:
             logger.info("=== Running Step 02: Scoring & Selection ===")
-            score_select.run_scoring()
+            run_stage("score_and_select", score_select.run_scoring)
             
         if args.step in ["03", "all"]:
             logger.info("=== Running Step 03: Drafting ===")
-            write_post.run_drafting()
+            run_stage("write_linkedin_post", write_post.run_drafting)
             
         if args.step in ["04", "all"]:
             logger.info("=== Running Step 04: Publishing (Stub/Real) ===")
-            publish_post.run_publishing()
+            run_stage("publish_post", publish_post.run_publishing)
             
         
         logger.info("Pipeline Complete.")
+        if replay.mode() != "off":
+            logger.info(f"Replay summary ({replay.mode()}): {replay.summary()}")
         
-        # Auto-open preview if Step 04 ran
-        if args.step in ["04", "all"]:
+        # Auto-open preview if Step 04 ran (not during replay/benchmark runs)
+        if args.step in ["04", "all"] and not replay.is_replaying():
             preview_path = os.path.abspath("execution/preview.html")
             if os.path.exists(preview_path):
                 # Generate preview
@@ -0,0 +1,206 @@
+"""
+Small persistent run-state store (.tmp/run_state.json).
+
+Holds:
+  - per-stage metadata: last start / end, status and counts (`run_stage`)
+  - per-tab last write time, so "has this run already happened" checks are a
+    single key lookup instead of a scan of the tab's history
+  - per-query sourcing watermarks: when each query last ran and the newest
+    publish date it has seen. Sourcing turns these into server-side time filters
+    (Tavily `time_range`, DDG `timelimit`) so each run asks only for new items.
+  - feed validators (execution/feeds.py)
+
+Under record/replay the state starts empty and is never saved, so cassettes do
+not depend on (or change) local history.
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from execution.utils import TMP_DIR, LLM_LATENCY, load_json_state, save_json_state, logger
+from execution import replay
+from execution.dates import parse_date
+
+RUN_STATE_PATH = os.path.join(TMP_DIR, "run_state.json")
+
+# Provider time filters, narrowest first: (max window in days, Tavily time_range, DDG timelimit)
+TIME_FILTERS = [
+    (1, "day", "d"),
+    (7, "week", "w"),
+    (31, "month", "m"),
+    (366, "year", "y"),
+]
+
+# Extra look-back so items indexed late by the provider are not missed
+WATERMARK_SLACK = timedelta(hours=6)
+
+
+class RunState:
+    def __init__(self, path: str = RUN_STATE_PATH):
+        self.path = path
+        self.persist = replay.mode() == "off"
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = load_json_state(path, {}) if self.persist else {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self.data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self.data[key] = value
+
+    def save(self):
+        if not self.persist:
+            return
+        with self._lock:
+            try:
+                save_json_state(self.path, self.data)
+            except Exception as e:
+                logger.warning(f"Could not save run state: {e}")
+
+    # --- Stages and outputs ---
+
+    def stage(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.data.get("stages", {}).get(name, {}))
+
+    def _reload(self):
+        # Steps keep their own RunState; re-read so stage bookkeeping never overwrites their writes
+        if self.persist:
+            self.data = load_json_state(self.path, {})
+
+    def stage_started(self, name: str):
+        with self._lock:
+            self._reload()
+            entry = self.data.setdefault("stages", {}).setdefault(name, {})
+            entry["last_started_at"] = _now_iso()
+            entry["status"] = "running"
+        self.save()
+
+    def stage_finished(self, name: str, status: str = "ok", counts: Optional[Dict[str, Any]] = None, error: str = ""):
+        with self._lock:
+            self._reload()
+            entry = self.data.setdefault("stages", {}).setdefault(name, {})
+            entry["last_finished_at"] = _now_iso()
+            entry["status"] = status
+            entry["counts"] = counts or {}
+            entry["error"] = error[:500]
+            if status == "ok":
+                entry["last_success_at"] = entry["last_finished_at"]
+        self.save()
+
+    def mark_output(self, tab: str, when: Optional[datetime] = None):
+        """Records that rows were just written to `tab`."""
+        self.set_output_time(tab, when or replay.now())
+
+    def set_output_time(self, tab: str, when: datetime):
+        with self._lock:
+            self.data.setdefault("outputs", {})[tab] = when.isoformat()
+
+    def forget_output(self, tab: str):
+        """Drops the last-write record for `tab` (after clearing it), so gates fall back to the tab."""
+        with self._lock:
+            self.data.get("outputs", {}).pop(tab, None)
+
+    def last_output_at(self, tab: str) -> Optional[datetime]:
+        """When rows were last written to `tab`, or None if this store has never seen a write."""
+        with self._lock:
+            value = self.data.get("outputs", {}).get(tab)
+        return _parse(value)
+
+    # --- Sourcing watermarks ---
+
+    def watermark(self, scope: str, query: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.data.get("watermarks", {}).get(scope, {}).get(query, {}))
+
+    def update_watermark(self, scope: str, query: str, dates: Iterable[Any], run_at: Optional[datetime] = None):
+        """Records a completed search: run time plus the newest parseable publish date seen."""
+        run_at = run_at or replay.now()
+        newest = _newest_date(dates)
+        with self._lock:
+            marks = self.data.setdefault("watermarks", {}).setdefault(scope, {})
+            mark = marks.setdefault(query, {})
+            mark["last_run_at"] = run_at.isoformat()
+            if newest and newest.isoformat() > mark.get("last_published_at", ""):
+                mark["last_published_at"] = newest.isoformat()
+
+    def window_days(self, scope: str, query: str, max_days: float) -> float:
+        """Look-back window for the next search of `query`: time since its last run
+        (plus slack), never wider than `max_days`. No watermark -> `max_days`."""
+        mark = self.watermark(scope, query)
+        since = _parse(mark.get("last_run_at")) or _parse(mark.get("last_published_at"))
+        if not since:
+            return float(max_days)
+        elapsed = replay.now() - since + WATERMARK_SLACK
+        return min(float(max_days), max(elapsed.total_seconds() / 86400.0, 0.0))
+
+
+def run_stage(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a pipeline step and records start/end/status in the run state.
+    The step's return value becomes the counts: a dict, an int (rows written),
+    or None for an early exit (status 'skipped')."""
+    state = RunState()
+    state.stage_started(name)
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        state.stage_finished(name, "failed", error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        LLM_LATENCY.flush()
+    if result is None:
+        state.stage_finished(name, "skipped")
+    else:
+        state.stage_finished(name, "ok", result if isinstance(result, dict) else {"rows": result})
+    return result
+
+
+def _now_iso() -> str:
+    return replay.now().isoformat()
+
+
+def tavily_time_range(window_days: float) -> Optional[str]:
+    for max_days, tavily_range, _ in TIME_FILTERS:
+        if window_days <= max_days:
+            return tavily_range
+    return None
+
+
+def ddg_timelimit(window_days: float) -> Optional[str]:
+    for max_days, _, ddg_limit in TIME_FILTERS:
+        if window_days <= max_days:
+            return ddg_limit
+    return None
+
+
+def wider_time_filters(window_days: float) -> List[Tuple[Optional[str], Optional[str]]]:
+    """(Tavily time_range, DDG timelimit) of every filter wider than the one for
+    `window_days`, narrowest first, ending with no filter at all."""
+    wider = [(tavily_range, ddg_limit) for max_days, tavily_range, ddg_limit in TIME_FILTERS if window_days <= max_days]
+    return (wider + [(None, None)])[1:]
+
+
+def within_window(date_value: Any, window_days: float) -> bool:
+    """True when `date_value` falls inside the look-back window (undated items count as inside)."""
+    published = parse_date(date_value)
+    return published is None or published >= replay.now() - timedelta(days=float(window_days))
+
+
+def _parse(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    ts = pd.to_datetime(value, utc=True, errors="coerce")
+    if ts is None or pd.isna(ts):
+        return None
+    return ts.to_pydatetime()
+
+
+def _newest_date(values: Iterable[Any]) -> Optional[datetime]:
+    parsed = [d for d in (parse_date(v) for v in values) if d]  # bogus future dates are dropped
+    return max(parsed) if parsed else None
@@ -0,0 +1,99 @@
+"""
+Per-URL scoring ledger for step 02 (.tmp/scoring_ledger.json, keyed by url_key).
+
+Every candidate step 02 decides on is recorded with its outcome, pass-1/pass-2
+scores and reasons, bucket and timestamp. Later runs skip URLs with a live entry,
+so a candidate rejected once is not sent back to the LLM on every run just
+because it is still in raw_candidates.
+
+Entries expire after SCORING_LEDGER_TTL_DAYS. Transient outcomes (fetch failures,
+skipped unfetchable domains) expire after SCORING_LEDGER_RETRY_HOURS, so the
+article gets another chance.
+Persistence is disabled under record/replay.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+
+SCORING_LEDGER_PATH = os.path.join(TMP_DIR, "scoring_ledger.json")
+
+# Outcomes that say nothing about the article itself
+TRANSIENT_DECISIONS = {"fetch_failed", "unfetchable_domain"}
+
+
+def _reason(value) -> str:
+    return value[:300] if isinstance(value, str) else ""
+
+
+class ScoringLedger:
+    def __init__(self, ttl_days: float = 30, retry_hours: float = 24, path: str = SCORING_LEDGER_PATH):
+        self.ttl = timedelta(days=float(ttl_days))
+        self.retry = timedelta(hours=float(retry_hours))
+        self.path = path
+        self.persist = replay.mode() == "off"
+        self.entries: Dict[str, Dict] = load_json_state(path, {}) if self.persist else {}
+        self._expire()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "ScoringLedger":
+        return cls(
+            ttl_days=float(config.get("SCORING_LEDGER_TTL_DAYS", 30)),
+            retry_hours=float(config.get("SCORING_LEDGER_RETRY_HOURS", 24)),
+        )
+
+    def _expire(self):
+        now = replay.now()
+        live = {}
+        for key, entry in self.entries.items():
+            try:
+                scored_at = datetime.fromisoformat(entry.get("scored_at", ""))
+            except ValueError:
+                continue
+            ttl = self.retry if entry.get("decision") in TRANSIENT_DECISIONS else self.ttl
+            if now - scored_at <= ttl:
+                live[key] = entry
+        expired = len(self.entries) - len(live)
+        if expired:
+            logger.info(f"Scoring ledger: {expired} entries expired and will be scored again.")
+        self.entries = live
+
+    def seen(self, keys: Iterable[str]) -> Set[str]:
+        """The keys that have a live ledger entry."""
+        return {k for k in keys if k in self.entries}
+
+    def get(self, url_key: str) -> Dict:
+        return self.entries.get(url_key, {})
+
+    def record(self, item: Dict, decision: str):
+        self.entries[item["url_key"]] = {
+            "url": item.get("url", ""),
+            "bucket": item.get("bucket", ""),
+            "decision": decision,
+            "score_pass1": item.get("score_pass1"),
+            "score_pass2": item.get("score_pass2"),
+            "reason_pass1": _reason(item.get("reason_pass1")),
+            "reason_pass2": _reason(item.get("reason_pass2")),
+            "prefilter_confidence": item.get("prefilter_confidence"),
+            "cluster_id": item.get("cluster_id", ""),
+            "scored_at": replay.now().isoformat(),
+        }
+
+    def pass2_uplift(self, quantile: float = 0.95, min_samples: int = 20) -> Optional[float]:
+        """How far pass 2 raised an item's pass-1 score (the given quantile over recorded
+        items that have both scores), or None with fewer than `min_samples` of them."""
+        uplifts = [
+            e["score_pass2"] - e["score_pass1"] for e in self.entries.values()
+            if isinstance(e.get("score_pass1"), (int, float)) and isinstance(e.get("score_pass2"), (int, float))
+        ]
+        if len(uplifts) < min_samples:
+            return None
+        uplifts.sort()
+        return max(uplifts[min(int(quantile * len(uplifts)), len(uplifts) - 1)], 0.0)
+
+    def save(self):
+        if self.persist:
+            save_json_state(self.path, self.entries)
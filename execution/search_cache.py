@@ -0,0 +1,146 @@
+"""
+Search result cache keyed by provider, normalized query, max_results and any
+extra search parameters. Entries live under .tmp/search_cache/ and expire after
+a freshness window (SEARCH_CACHE_TTL_HOURS, default 6h), so re-running sourcing
+(`--force`, TEST vs PROD) does not pay for identical Tavily/DDG queries.
+
+A lookup may also accept entries stored under wider parameters (a longer time
+window): a re-run right after a normal run asks for a narrower window, since the
+watermark moved, and is served from the earlier entry filtered down locally.
+"""
+
+import os
+import re
+import time
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+
+SEARCH_CACHE_DIR = os.path.join(TMP_DIR, "search_cache")
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+class SearchCache:
+    """File-per-entry cache of search results with automatic expiry and hit/miss stats.
+    Disabled automatically under record/replay so cassettes stay deterministic."""
+
+    def __init__(self, ttl_hours: float = 6, enabled: bool = True, cache_dir: str = SEARCH_CACHE_DIR):
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.enabled = bool(enabled) and self.ttl_seconds > 0 and replay.mode() == "off"
+        self.cache_dir = cache_dir
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0}
+        self._lock = threading.Lock()
+        if self.enabled:
+            self.purge_expired()
+
+    def _path(self, provider: str, query: str, max_results: int, params: Dict[str, Any]) -> str:
+        raw = json.dumps([provider, normalize_query(query), int(max_results), params], sort_keys=True, default=str)
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.json")
+
+    def _bump(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _load(self, path: str) -> Optional[Dict]:
+        entry = load_json_state(path, None)
+        if entry is None:
+            return None
+        if time.time() - float(entry.get("stored_at", 0)) > self.ttl_seconds:
+            self._bump("expired")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def get(self, provider: str, query: str, max_results: int, **params) -> Optional[List[Dict]]:
+        found = self.get_covering(provider, query, max_results, [params])
+        return found[0] if found is not None else None
+
+    def get_covering(self, provider: str, query: str, max_results: int,
+                     param_sets: Sequence[Dict[str, Any]]) -> Optional[Tuple[List[Dict], Dict[str, Any]]]:
+        """First live entry among `param_sets` (tried in order) as (results, its params).
+        Counts one hit or one miss however many sets are tried."""
+        if not self.enabled:
+            return None
+        for params in param_sets:
+            entry = self._load(self._path(provider, query, max_results, params))
+            if entry is not None:
+                self._bump("hits")
+                return entry.get("results", []), params
+        self._bump("misses")
+        return None
+
+    def put(self, provider: str, query: str, max_results: int, results: List[Dict], **params):
+        if not self.enabled:
+            return
+        entry = {
+            "stored_at": time.time(),
+            "provider": provider,
+            "query": normalize_query(query),
+            "max_results": max_results,
+            "params": params,
+            "results": results,
+        }
+        try:
+            save_json_state(self._path(provider, query, max_results, params), entry)
+            self._bump("stores")
+        except Exception as e:
+            logger.warning(f"Search cache write failed for '{query}': {e}")
+
+    def cached(self, provider: str, query: str, max_results: int, fn: Callable[[], List[Dict]], **params) -> List[Dict]:
+        """Returns cached results or calls `fn` and stores them. Empty results are not cached."""
+        return self.cached_with_status(provider, query, max_results, fn, **params)[0]
+
+    def cached_with_status(self, provider: str, query: str, max_results: int, fn: Callable[[], List[Dict]],
+                           wider: Sequence[Dict[str, Any]] = (),
+                           narrow: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+                           **params) -> Tuple[List[Dict], bool]:
+        """Like `cached`, but also returns whether the results came from the cache.
+        `wider` lists parameter sets whose results cover these ones (narrowest first); a hit
+        on one of them is passed through `narrow` instead of searching again."""
+        hit = self.get_covering(provider, query, max_results, [params, *wider])
+        if hit is not None:
+            results, hit_params = hit
+            if hit_params != params and narrow:
+                results = narrow(results)
+            return results, True
+        results = fn()
+        if results:
+            self.put(provider, query, max_results, results, **params)
+        return results, False
+
+    def purge_expired(self) -> int:
+        """Deletes expired entry files. Returns how many were removed."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Search cache: purged {removed} expired entries.")
+        return removed
+
+    def log_stats(self, label: str = "Search cache"):
+        if not self.enabled:
+            logger.info(f"{label}: disabled.")
+            return
+        s = self.stats
+        total = s["hits"] + s["misses"]
+        rate = (s["hits"] / total * 100) if total else 0.0
+        logger.info(f"{label}: {s['hits']} hits / {s['misses']} misses ({rate:.0f}% hit rate), {s['expired']} expired, {s['stores']} stored.")
@@ -0,0 +1,293 @@
+"""
+Search provider abstraction for 01_source_news.
+
+Every provider answers `search(query, window_days) -> (items, served_from_cache)`
+with items shaped {title, url, snippet, date}. `CompositeProvider` combines
+several of them:
+  FAILOVER - ask providers in order; move on after an error, a timeout or an empty answer
+  RACE     - ask all at once and take the first non-empty answer
+
+Per-provider latency (persisted in .tmp/search_latency.json), error, timeout
+and empty-answer counts are tracked and logged at the end of each run. Each backend
+caps its own live calls in flight (SEARCH_CONCURRENCY_<NAME>), so a failover or a
+race does not send the primary's concurrency to a slower provider.
+"""
+
+import os
+import abc
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from execution.utils import TMP_DIR, LatencyHistogram, logger
+from execution import replay
+from execution.search_cache import SearchCache
+from execution.run_state import tavily_time_range, ddg_timelimit, wider_time_filters, within_window
+from execution.article_store import ArticleStore
+from execution.provider_content import store_provider_content, RAW_CONTENT_EXTRACTOR
+
+SEARCH_LATENCY_PATH = os.path.join(TMP_DIR, "search_latency.json")
+SEARCH_LATENCY = LatencyHistogram(path=SEARCH_LATENCY_PATH, window=200)
+
+SearchResult = Tuple[List[Dict], bool]  # (items, served_from_cache)
+
+
+class ProviderTimeout(Exception):
+    """Raised when a provider does not answer within the composite's timeout."""
+
+
+class SearchProvider(abc.ABC):
+    """Abstract base class for search backends."""
+
+    name = "provider"
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0, "empty": 0, "cached": 0}
+        self._slots = threading.BoundedSemaphore(max(1, int(max_in_flight))) if max_in_flight else None
+
+    @abc.abstractmethod
+    def search(self, query: str, window_days: float) -> SearchResult:
+        """Returns items newer than `window_days` (where the backend supports it)."""
+        pass
+
+    def limited(self, fn):
+        """Runs a live backend call within this provider's concurrency cap."""
+        if self._slots is None:
+            return fn()
+        with self._slots:
+            return fn()
+
+    def bump(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def timed_search(self, query: str, window_days: float) -> SearchResult:
+        """`search` plus latency/error/empty bookkeeping. Cache hits are not timed."""
+        self.bump("calls")
+        started = time.monotonic()
+        try:
+            items, cached = self.search(query, window_days)
+        except Exception:
+            self.bump("errors")
+            raise
+        if cached:
+            self.bump("cached")
+        else:
+            SEARCH_LATENCY.record(self.name, time.monotonic() - started)
+        if not items:
+            self.bump("empty")
+        return items, cached
+
+    def close(self):
+        pass
+
+    def log_stats(self):
+        s = self.stats
+        live = s["calls"] - s["cached"]
+        p50 = SEARCH_LATENCY.percentile(self.name, 50, min_samples=1)
+        p95 = SEARCH_LATENCY.percentile(self.name, 95, min_samples=1)
+        error_rate = (s["errors"] + s["timeouts"]) / live * 100 if live else 0.0
+        latency = f"p50 {p50:.2f}s / p95 {p95:.2f}s" if p50 is not None else "no samples"
+        logger.info(f"Provider {self.name}: {s['calls']} calls ({s['cached']} cached), {s['errors']} errors, "
+                    f"{s['timeouts']} timeouts ({error_rate:.0f}% of live calls), {s['empty']} empty; latency {latency}.")
+
+
+class TavilyProvider(SearchProvider):
+    name = "tavily"
+
+    def __init__(self, client, cache: SearchCache, max_results: int = 5,
+                 article_store: Optional[ArticleStore] = None, min_chars: int = 400,
+                 max_in_flight: Optional[int] = None):
+        super().__init__(max_in_flight)
+        self.client = client
+        self.cache = cache
+        self.max_results = max_results
+        # With a store, results come with their page text, which is stored for step 02 (TAVILY_RAW_CONTENT).
+        # A disabled store (ARTICLE_CACHE: NO, record/replay) would drop the text: don't pay for it
+        self.article_store = article_store if article_store is not None and article_store.enabled else None
+        self.min_chars = min_chars
+        self.stats["raw_content_stored"] = 0
+
+    def _live_search(self, query: str, time_range: Optional[str]) -> List[Dict]:
+        if not self.article_store:
+            return replay.through(
+                "tavily", ["search", query, "basic", self.max_results, time_range],
+                lambda: self.client.search(query=query, search_depth="basic", max_results=self.max_results, time_range=time_range)
+            ).get("results", [])
+        results = replay.through(
+            "tavily", ["search", query, "basic", self.max_results, time_range, "raw_content"],
+            lambda: self.client.search(query=query, search_depth="basic", max_results=self.max_results,
+                                       time_range=time_range, include_raw_content=True)
+        ).get("results", [])
+        for r in results:
+            if store_provider_content(self.article_store, r.get("url"), r.pop("raw_content", None) or "",
+                                      RAW_CONTENT_EXTRACTOR, min_chars=self.min_chars):
+                self.bump("raw_content_stored")
+        return results  # page text stays out of the search cache
+
+    def log_stats(self):
+        super().log_stats()
+        if self.article_store:
+            logger.info(f"Provider {self.name}: page text stored for {self.stats['raw_content_stored']} results "
+                        f"(step 02 reads it from the article store instead of downloading).")
+
+    def search(self, query: str, window_days: float) -> SearchResult:
+        # Server-side time filter from the query's watermark: only ask for items newer than the last run
+        time_range = tavily_time_range(window_days)
+        results, cached = self.cache.cached_with_status(
+            "tavily", query, self.max_results, lambda: self.limited(lambda: self._live_search(query, time_range)),
+            wider=[{"time_range": t} for t, _ in wider_time_filters(window_days)],
+            narrow=lambda rows: [r for r in rows if within_window(r.get("published_date"), window_days)],
+            time_range=time_range)
+        # map to standard dict
+        return [{
+            "title": r.get("title"),
+            "url": r.get("url"),
+            "snippet": r.get("content"),
+            "date": r.get("published_date") # Tavily might provide
+        } for r in results], cached
+
+
+class DDGProvider(SearchProvider):
+    name = "ddg"
+
+    def __init__(self, ddgs, cache: SearchCache, max_results: int = 5, max_in_flight: Optional[int] = None):
+        super().__init__(max_in_flight)
+        self.ddgs = ddgs
+        self.cache = cache
+        self.max_results = max_results
+
+    def search(self, query: str, window_days: float) -> SearchResult:
+        # Note: DDG python lib changes often. One DDGS session is shared by all queries.
+        timelimit = ddg_timelimit(window_days)
+        results, cached = self.cache.cached_with_status("ddg", query, self.max_results, lambda: self.limited(lambda: replay.through(
+            "ddg", ["news", query, self.max_results, timelimit],
+            lambda: list(self.ddgs.news(query, timelimit=timelimit, max_results=self.max_results) or [])
+        )), wider=[{"timelimit": d} for _, d in wider_time_filters(window_days)],
+            narrow=lambda rows: [r for r in rows if within_window(r.get("date"), window_days)],
+            timelimit=timelimit)
+        return [{
+            "title": r.get("title"),
+            "url": r.get("url"), # DDG uses 'url' or 'link'? usually 'url' or 'href'
+            "snippet": r.get("body"),
+            "date": r.get("date"),
+            "image": r.get("image") or ""  # news thumbnail, an image candidate for step 03
+        } for r in results], cached
+
+
+class FeedProvider(SearchProvider):
+    """Answers queries from the configured RSS/Atom feeds (polled once per run).
+    An entry matches when at least half of the query's significant words appear in it."""
+
+    name = "feeds"
+
+    def __init__(self, poller, feeds: List[Dict[str, str]], max_results: int = 5, max_workers: int = 8):
+        super().__init__()
+        self.poller = poller
+        self.feeds = feeds
+        self.max_results = max_results
+        self.max_workers = max_workers
+        self._entries: Optional[List[Dict]] = None
+        self._poll_lock = threading.Lock()
+
+    def entries(self) -> List[Dict]:
+        """New feed entries for this run (conditional GETs happen on the first call only)."""
+        with self._poll_lock:
+            if self._entries is None:
+                self._entries = self.poller.poll_all(self.feeds, max_workers=self.max_workers)
+                self.poller.log_stats()
+            return self._entries
+
+    def commit(self, dropped: Iterable[Dict] = ()):
+        """Marks this run's feed entries seen, except those sourcing dropped (see FeedPoller.commit)."""
+        self.poller.commit(dropped)
+
+    def search(self, query: str, window_days: float) -> SearchResult:
+        words = [w for w in re.findall(r"[a-z0-9]+", query.lower()) if len(w) > 2 and w != "news"]
+        if not words:
+            return [], True
+        matches = []
+        for entry in self.entries():
+            text = f"{entry.get('title', '')} {entry.get('snippet', '')}".lower()
+            if sum(1 for w in words if w in text) * 2 >= len(words):
+                matches.append(entry)
+        # Feeds are already paid for (or free): report as cached so no search is counted
+        return matches[:self.max_results], True
+
+
+class CompositeProvider(SearchProvider):
+    """Combines providers by failover (in order) or by racing them for the first non-empty answer."""
+
+    def __init__(self, providers: List[SearchProvider], mode: str = "FAILOVER", timeout: float = 20.0, max_workers: int = 8):
+        super().__init__()
+        self.providers = providers
+        self.mode = mode.upper()
+        self.timeout = float(timeout)
+        self.name = "+".join(p.name for p in providers)
+        # Calls run on this pool so a hung provider can be abandoned after `timeout`
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers) * max(1, len(providers)))
+
+    def search(self, query: str, window_days: float) -> SearchResult:
+        if self.mode == "RACE":
+            return self._race(query, window_days)
+        return self._failover(query, window_days)
+
+    def _failover(self, query: str, window_days: float) -> SearchResult:
+        last_error: Optional[Exception] = None
+        answered = False
+        for provider in self.providers:
+            fut = self._pool.submit(provider.timed_search, query, window_days)
+            try:
+                items, cached = fut.result(timeout=self.timeout)
+            except FutureTimeout:
+                provider.bump("timeouts")
+                last_error = ProviderTimeout(f"{provider.name} timed out after {self.timeout:g}s")
+                logger.warning(f"Search '{query}': {last_error}; failing over.")
+                continue
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Search '{query}' failed on {provider.name}: {e}; failing over.")
+                continue
+            answered = True
+            if items:
+                return items, cached
+        if answered:
+            return [], False
+        raise last_error or RuntimeError("no search providers configured")
+
+    def _race(self, query: str, window_days: float) -> SearchResult:
+        futures = {self._pool.submit(p.timed_search, query, window_days): p for p in self.providers}
+        deadline = time.monotonic() + self.timeout
+        pending = set(futures)
+        answered = False
+        last_error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                try:
+                    items, cached = fut.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Search '{query}' failed on {futures[fut].name}: {e}")
+                    continue
+                answered = True
+                if items:
+                    # Losers keep running in the background; their answers are discarded
+                    return items, cached
+        for fut in pending:
+            futures[fut].bump("timeouts")
+        if answered:
+            return [], False
+        raise last_error or ProviderTimeout(f"no provider answered '{query}' within {self.timeout:g}s")
+
+    def log_stats(self):
+        for provider in self.providers:
+            provider.log_stats()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,242 @@
+"""
+Near-duplicate story clustering between sourcing and scoring.
+
+The same contract award often arrives from several outlets under different URLs
+and slightly different titles. Each candidate gets a MinHash signature over the
+word shingles of its title + snippet; LSH banding finds likely pairs and an exact
+Jaccard check (>= CLUSTER_SIMILARITY) confirms them. Connected pairs form a
+cluster, and only one representative per cluster is scored: the copy from the
+most credible domain (directives/_domain_credibility.md), then the longest
+snippet, then the shortest URL.
+
+Every scored story (singletons too) is kept in .tmp/story_clusters.json for
+CLUSTER_TTL_DAYS with its members, the representative's signature and step 02's
+decision, so a copy that turns up on a later run joins the existing cluster and
+inherits that decision instead of being scored again. The copies a run drops are
+also handed to the scoring ledger with that decision (`copy_decisions`), so they stay
+skipped for the ledger's longer TTL after the cluster expires. Transient outcomes (fetch
+failures, see scoring_ledger.TRANSIENT_DECISIONS) are not kept on the cluster, so the
+story is scored again once the ledger's retry window has passed. Persistence is
+disabled under record/replay.
+"""
+
+import os
+import re
+import hashlib
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+from execution.credibility import domain_credibility
+from execution.scoring_ledger import TRANSIENT_DECISIONS
+
+STORY_CLUSTERS_PATH = os.path.join(TMP_DIR, "story_clusters.json")
+
+NUM_PERM = 64
+BANDS = 16                # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always collide
+ROWS = NUM_PERM // BANDS
+MERSENNE = (1 << 61) - 1
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9&$%.\-]*")
+STOPWORDS = frozenset(
+    "a an the and or of for to in on at by with from as is are was were be has have its it "
+    "that this into over after new says said will".split()
+)
+
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str) -> Set[str]:
+    """Word unigrams and bigrams (stopwords dropped), so reworded titles still overlap."""
+    words = [w.strip(".-") for w in TOKEN_RE.findall((text or "").lower())]
+    words = [w for w in words if w and w not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens: Set[str]) -> np.ndarray:
+    if not tokens:
+        return np.full(NUM_PERM, MERSENNE, dtype=np.uint64)
+    # 32-bit token hashes keep a * x + b inside uint64
+    x = np.array([_hash64(t) & 0xFFFFFFFF for t in tokens], dtype=np.uint64)
+    return ((np.outer(x, _PERM_A) + _PERM_B) % MERSENNE).min(axis=0)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _band_keys(signature) -> List[str]:
+    sig = [int(v) for v in signature]
+    return [f"{i}:{hash(tuple(sig[i * ROWS:(i + 1) * ROWS]))}" for i in range(BANDS)]
+
+
+def _story_text(row: Dict) -> str:
+    return f"{row.get('title') or ''} {row.get('snippet') or ''}"
+
+
+def _rank_key(row: Dict):
+    """Best copy first: most credible domain, fullest snippet, cleanest (shortest) URL."""
+    snippet = row.get("snippet")
+    return (-domain_credibility(row.get("url", "")), -len(snippet if isinstance(snippet, str) else ""), len(row.get("url", "")))
+
+
+def _decided(cluster: Dict) -> bool:
+    # Clusters stored before transient decisions were skipped may still carry one
+    decision = cluster.get("decision")
+    return bool(decision) and decision not in TRANSIENT_DECISIONS
+
+
+class StoryClusters:
+    def __init__(self, similarity: float = 0.5, ttl_days: float = 7, path: str = STORY_CLUSTERS_PATH):
+        self.similarity = float(similarity)
+        self.ttl = timedelta(days=float(ttl_days))
+        self.path = path
+        self.persist = replay.mode() == "off"
+        self.clusters: Dict[str, Dict] = load_json_state(path, {}) if self.persist else {}
+        self._expire()
+        self._member_of = {m: cid for cid, c in self.clusters.items() for m in c.get("members", [])}
+        # cluster id -> rows assign() dropped as copies of its representative this run
+        self._copies: Dict[str, List[Dict]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "StoryClusters":
+        return cls(
+            similarity=float(config.get("CLUSTER_SIMILARITY", 0.5)),
+            ttl_days=float(config.get("CLUSTER_TTL_DAYS", 7)),
+        )
+
+    def _expire(self):
+        cutoff = (replay.now() - self.ttl).isoformat()
+        self.clusters = {cid: c for cid, c in self.clusters.items() if c.get("created_at", "") >= cutoff}
+
+    def cluster_of(self, url_key: str) -> Optional[Dict]:
+        cid = self._member_of.get(url_key)
+        return self.clusters.get(cid) if cid else None
+
+    def assign(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Clusters the rows of `df` (needs url_key); returns one representative per
+        new cluster with `cluster_id` / `cluster_size` columns. Copies of stories
+        clustered on an earlier run are dropped (they inherit that decision)."""
+        if df.empty:
+            return df
+        rows = df.to_dict("records")
+        tokens = [shingles(_story_text(r)) for r in rows]
+        sigs = [minhash(t) for t in tokens]
+
+        # Decided clusters from earlier runs: match against their stored representative
+        decided = {cid: c for cid, c in self.clusters.items() if _decided(c)}
+        index: Dict[str, List[str]] = {}
+        for cid, c in decided.items():
+            for band in _band_keys(c["signature"]):
+                index.setdefault(band, []).append(cid)
+
+        parent = list(range(len(rows)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        known, inherited = {}, 0
+        band_rows: Dict[str, List[int]] = {}
+        for i, row in enumerate(rows):
+            existing = self.cluster_of(row["url_key"])
+            if existing is not None and not _decided(existing):
+                existing = None  # never decided (interrupted run, fetch failure): score it again
+            if existing is None:
+                for cid in dict.fromkeys(c for band in _band_keys(sigs[i]) for c in index.get(band, [])):
+                    if jaccard(tokens[i], set(decided[cid]["shingles"])) >= self.similarity:
+                        existing = decided[cid]
+                        break
+            if existing is not None:
+                known[i] = existing
+                continue
+            for band in _band_keys(sigs[i]):
+                for j in band_rows.setdefault(band, []):
+                    if find(i) != find(j) and jaccard(tokens[i], tokens[j]) >= self.similarity:
+                        parent[find(i)] = find(j)
+                band_rows[band].append(i)
+
+        for i, c in known.items():
+            key = rows[i]["url_key"]
+            if key not in c["members"]:
+                c["members"].append(key)
+                self._member_of[key] = c["representative"]
+            self._copies.setdefault(c["representative"], []).append(rows[i])
+            inherited += 1
+            logger.debug(f"Already decided on an earlier run ({c['decision']}): {rows[i].get('url')}")
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(rows)):
+            if i not in known:
+                groups.setdefault(find(i), []).append(i)
+
+        keep, dropped = [], 0
+        now = replay.now().isoformat()
+        for members in groups.values():
+            members.sort(key=lambda i: _rank_key(rows[i]))
+            rep = rows[members[0]]
+            cid = rep["url_key"]
+            rep["cluster_id"] = cid
+            rep["cluster_size"] = len(members)
+            keep.append(rep)
+            if len(members) > 1:
+                dropped += len(members) - 1
+                self._copies.setdefault(cid, []).extend(rows[i] for i in members[1:])
+                logger.info(f"Story cluster of {len(members)}: keeping {rep.get('url')} "
+                            f"(dropping {', '.join(rows[i].get('url', '') for i in members[1:])})")
+            member_keys = [rows[i]["url_key"] for i in members]
+            if cid in self.clusters:
+                member_keys = list(dict.fromkeys(self.clusters[cid]["members"] + member_keys))
+            self.clusters[cid] = {
+                "representative": cid,
+                "members": member_keys,
+                "signature": [int(v) for v in sigs[members[0]]],
+                "shingles": sorted(tokens[members[0]]),
+                "decision": "",
+                "created_at": now,
+            }
+            self._member_of.update({m: cid for m in member_keys})
+
+        logger.info(f"Story clustering: {len(rows)} candidates -> {len(keep)} stories "
+                    f"({dropped} same-run copies dropped, {inherited} already decided on earlier runs).")
+        columns = list(df.columns) + [c for c in ("cluster_id", "cluster_size") if c not in df.columns]
+        return pd.DataFrame(keep, columns=columns)
+
+    def record_decision(self, url_key: str, decision: str):
+        """Stores step 02's decision on a representative; its copies inherit it.
+        Transient decisions are not stored (the ledger retries those)."""
+        cluster = self.clusters.get(url_key)
+        if cluster is not None:
+            cluster["decision"] = "" if decision in TRANSIENT_DECISIONS else decision
+
+    def copy_decisions(self) -> List[Tuple[Dict, str]]:
+        """(row, decision) for the copies dropped this run whose cluster is decided."""
+        out = []
+        for cid, copies in self._copies.items():
+            cluster = self.clusters.get(cid)
+            if cluster is None or not _decided(cluster):
+                continue
+            out.extend((dict(row, cluster_id=cid), cluster["decision"]) for row in copies)
+        return out
+
+    def decision_for(self, url_key: str) -> str:
+        cluster = self.cluster_of(url_key)
+        return cluster.get("decision", "") if cluster else ""
+
+    def save(self):
+        if self.persist:
+            save_json_state(self.path, self.clusters)
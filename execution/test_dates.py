@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Checks for the local freshness score (execution/dates.py).
+
+Run with `python execution/test_dates.py` or `python -m pytest execution/test_dates.py`.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from execution.dates import freshness_score, UNKNOWN_FRESHNESS
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def test_dated_rows_follow_the_rubric_steps():
+    assert freshness_score((NOW - timedelta(days=2)).isoformat(), NOW) == 5
+    assert freshness_score("Tue, 14 Apr 2026 12:00:00 GMT", NOW) == 4
+    assert freshness_score("3 hours ago", NOW) == 5
+    assert freshness_score("2019-01-01", NOW) == 2
+
+
+def test_undated_rows_score_neutral():
+    # Tavily search results have no published_date; they must not score below stale dated rows
+    assert UNKNOWN_FRESHNESS == 3
+    for missing in (None, "", float("nan"), "n/a", "not a date"):
+        assert freshness_score(missing, NOW) == 3
+    assert freshness_score(None, NOW) > freshness_score("2019-01-01", NOW)
+
+
+if __name__ == "__main__":
+    test_dated_rows_follow_the_rubric_steps()
+    test_undated_rows_score_neutral()
+    print("✓ dates checks passed")
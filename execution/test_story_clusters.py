@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Checks that story clusters and the scoring ledger agree on when a story is scored again
+(execution/story_clusters.py, execution/scoring_ledger.py).
+
+Run with `python execution/test_story_clusters.py` or `python -m pytest execution/test_story_clusters.py`.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from datetime import timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from execution import replay
+from execution.scoring_ledger import ScoringLedger
+from execution.story_clusters import StoryClusters
+
+TITLE = "Contractor wins offshore drilling contract for two deepwater rigs in Brazil"
+SNIPPET = "The five-year award covers two drillships and integrated well services starting in 2027."
+
+
+def _candidates() -> pd.DataFrame:
+    return pd.DataFrame([
+        {"url": "https://a.example.com/rig-award", "url_key": "a.example.com/rig-award",
+         "title": TITLE, "snippet": SNIPPET, "bucket": "upstream"},
+        {"url": "https://b.example.com/news/rig-award", "url_key": "b.example.com/news/rig-award",
+         "title": TITLE + " - report", "snippet": SNIPPET, "bucket": "upstream"},
+    ])
+
+
+def _decide(tmp: str, decision: str) -> str:
+    """One step-02 run: cluster, record the representative's decision, save both stores."""
+    ledger = ScoringLedger(path=os.path.join(tmp, "ledger.json"))
+    clusters = StoryClusters(path=os.path.join(tmp, "clusters.json"))
+    reps = clusters.assign(_candidates())
+    assert len(reps) == 1
+    rep = reps.to_dict("records")[0]
+    ledger.record(rep, decision)
+    clusters.record_decision(rep["url_key"], decision)
+    for row, copy_decision in clusters.copy_decisions():
+        ledger.record(row, copy_decision)
+    ledger.save()
+    clusters.save()
+    return rep["url_key"]
+
+
+def _age_ledger(tmp: str, hours: float):
+    path = os.path.join(tmp, "ledger.json")
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries.values():
+        entry["scored_at"] = (replay.now() - timedelta(hours=hours)).isoformat()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+
+def _next_run(tmp: str) -> pd.DataFrame:
+    """What the next step-02 run would score: ledger filter first, then clustering."""
+    ledger = ScoringLedger(path=os.path.join(tmp, "ledger.json"))
+    df = _candidates()
+    df = df[~df["url_key"].isin(ledger.seen(df["url_key"]))]
+    return StoryClusters(path=os.path.join(tmp, "clusters.json")).assign(df)
+
+
+def test_fetch_failure_is_retried_after_the_ledger_window():
+    replay.configure("off")
+    tmp = tempfile.mkdtemp()
+    rep_key = _decide(tmp, "fetch_failed")
+    _age_ledger(tmp, hours=25)
+    again = _next_run(tmp)
+    assert again["url_key"].tolist() == [rep_key]
+
+
+def test_final_decision_still_covers_copies():
+    replay.configure("off")
+    tmp = tempfile.mkdtemp()
+    _decide(tmp, "rejected_pass1")
+    _age_ledger(tmp, hours=25)
+    assert _next_run(tmp).empty
+
+
+def test_copies_stay_skipped_after_the_cluster_expires():
+    replay.configure("off")
+    tmp = tempfile.mkdtemp()
+    _decide(tmp, "not_shortlisted")
+    ledger = ScoringLedger(path=os.path.join(tmp, "ledger.json"))
+    assert ledger.get("b.example.com/news/rig-award")["decision"] == "not_shortlisted"
+    # Clusters live CLUSTER_TTL_DAYS, the ledger SCORING_LEDGER_TTL_DAYS (longer)
+    os.remove(os.path.join(tmp, "clusters.json"))
+    assert _next_run(tmp).empty
+
+
+if __name__ == "__main__":
+    test_fetch_failure_is_retried_after_the_ledger_window()
+    test_final_decision_still_covers_copies()
+    test_copies_stay_skipped_after_the_cluster_expires()
+    print("✓ story cluster checks passed")
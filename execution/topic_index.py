@@ -0,0 +1,154 @@
+"""
+Topic-diversity index over recent posts (.tmp/topic_index.json).
+
+Every drafted or published post (source title + post text) is one TF-IDF document
+over word unigrams/bigrams (story_clusters.shingles). Step 02 compares each
+candidate's title + snippet against the posts of the last TOPIC_WINDOW_DAYS: the
+similarity is the idf-weighted share of the candidate's terms a post contains.
+  - at or above TOPIC_SKIP_SIMILARITY the candidate is skipped before pass 1
+  - from TOPIC_PENALTY_SIMILARITY up, its total score is lowered by up to
+    TOPIC_PENALTY_MAX, growing with the similarity
+
+The index is updated incrementally: each run adds only posts it has not indexed yet
+(by draft_id) and drops posts that left the window, keeping document frequencies
+and an inverted index in step, so the post history is never re-read into a rebuild.
+Persistence is disabled under record/replay.
+"""
+
+import math
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from execution.utils import TMP_DIR, load_json_state, save_json_state, logger
+from execution import replay
+from execution.dates import parse_date
+from execution.story_clusters import shingles
+
+TOPIC_INDEX_PATH = os.path.join(TMP_DIR, "topic_index.json")
+
+# Post-tab columns that carry the post's time, in order of preference
+TIME_COLUMNS = ("published_at", "drafted_at", "created_at_utc")
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+class TopicIndex:
+    def __init__(self, window_days: float = 30, skip_similarity: float = 0.45,
+                 penalty_similarity: float = 0.2, penalty_max: float = 1.0, path: str = TOPIC_INDEX_PATH):
+        self.window = timedelta(days=float(window_days))
+        self.skip_similarity = float(skip_similarity)
+        self.penalty_similarity = float(penalty_similarity)
+        self.penalty_max = float(penalty_max)
+        self.path = path
+        self.persist = replay.mode() == "off"
+        state = load_json_state(path, {}) if self.persist else {}
+        self.docs: Dict[str, Dict] = state.get("docs", {})
+        self.df = Counter(state.get("df", {}))
+        self.postings: Dict[str, List[str]] = {}
+        for doc_id, doc in self.docs.items():
+            for term in doc["terms"]:
+                self.postings.setdefault(term, []).append(doc_id)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "TopicIndex":
+        return cls(
+            window_days=float(config.get("TOPIC_WINDOW_DAYS", 30)),
+            skip_similarity=float(config.get("TOPIC_SKIP_SIMILARITY", 0.45)),
+            penalty_similarity=float(config.get("TOPIC_PENALTY_SIMILARITY", 0.2)),
+            penalty_max=float(config.get("TOPIC_PENALTY_MAX", 1.0)),
+        )
+
+    # --- incremental updates ---
+
+    def add(self, doc_id: str, title: str, text: str, at: datetime) -> bool:
+        if not doc_id or doc_id in self.docs:
+            return False
+        terms = sorted(shingles(f"{title} {text}"))
+        if not terms:
+            return False
+        self.docs[doc_id] = {"title": title[:200], "terms": terms, "at": at.isoformat()}
+        self.df.update(terms)
+        for term in terms:
+            self.postings.setdefault(term, []).append(doc_id)
+        return True
+
+    def remove(self, doc_id: str):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            self.df[term] -= 1
+            if self.df[term] <= 0:
+                del self.df[term]
+            ids = self.postings.get(term, [])
+            if doc_id in ids:
+                ids.remove(doc_id)
+
+    def update(self, *frames: pd.DataFrame, now: Optional[datetime] = None) -> int:
+        """Indexes posts not seen before (rows need draft_id; title / post_text used) and
+        expires posts older than the window. Returns the number of posts added."""
+        now = now or replay.now()
+        cutoff = now - self.window
+        for doc_id in [d for d, doc in self.docs.items() if doc["at"] < cutoff.isoformat()]:
+            self.remove(doc_id)
+        added = 0
+        for frame in frames:
+            if frame is None or frame.empty or "draft_id" not in frame.columns:
+                continue
+            for row in frame.to_dict("records"):
+                doc_id = _text(row.get("draft_id")).strip()
+                if not doc_id or doc_id in self.docs:
+                    continue
+                at = next((t for t in (parse_date(row.get(c), now) for c in TIME_COLUMNS) if t), None)
+                if at is None or at < cutoff:
+                    continue
+                added += int(self.add(doc_id, _text(row.get("title")), _text(row.get("post_text")), at))
+        if added:
+            logger.info(f"Topic index: {added} new posts indexed, {len(self.docs)} posts in the last "
+                        f"{self.window.days} days.")
+        return added
+
+    # --- queries ---
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self.docs)) / (1 + self.df.get(term, 0))) + 1.0
+
+    def most_similar(self, text: str) -> Tuple[float, str]:
+        """Similarity of `text` to the closest indexed post, and that post's id.
+
+        Similarity is the idf-weighted share of the candidate's terms that the post
+        contains (a short title + snippet against a long post, so cosine would be diluted
+        by the post's length)."""
+        terms = shingles(text)
+        if not terms or not self.docs:
+            return 0.0, ""
+        weights = {t: self._idf(t) ** 2 for t in terms}
+        total = sum(weights.values())
+        overlap = Counter()
+        for term, w in weights.items():
+            for doc_id in self.postings.get(term, ()):
+                overlap[doc_id] += w
+        if not overlap:
+            return 0.0, ""
+        doc_id, shared = overlap.most_common(1)[0]
+        return shared / total, doc_id
+
+    def penalty(self, similarity: float) -> float:
+        """Score deduction for a candidate this similar to a recent post (0 below the penalty threshold)."""
+        if similarity < self.penalty_similarity:
+            return 0.0
+        span = max(self.skip_similarity - self.penalty_similarity, 1e-9)
+        return self.penalty_max * min((similarity - self.penalty_similarity) / span, 1.0)
+
+    def title_of(self, doc_id: str) -> str:
+        return self.docs.get(doc_id, {}).get("title", "")
+
+    def save(self):
+        if self.persist:
+            save_json_state(self.path, {"docs": self.docs, "df": dict(self.df)})
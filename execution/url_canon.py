@@ -0,0 +1,157 @@
+"""
+URL canonicalization and dedupe keys shared by every stage.
+
+Two URLs for the same story (tracking params, http vs https, www/m/amp hosts,
+AMP paths, trailing slashes, shortener redirects) map to the same canonical URL
+and therefore the same `url_key`, which is persisted as a column on every tab.
+
+Redirect resolution is optional (`RESOLVE_REDIRECTS` in `_run_config.md`):
+  NO         - never resolve
+  SHORTENERS - resolve only known shortener/aggregator hosts (default)
+  ALL        - resolve every URL (one HEAD request per new URL, cached in .tmp)
+"""
+
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from execution.utils import TMP_DIR, load_config, load_json_state, save_json_state, logger
+from execution import replay
+
+REDIRECT_CACHE_PATH = os.path.join(TMP_DIR, "redirect_cache.json")
+
+TRACKING_PARAMS = {
+    "ref", "source", "fbclid", "gclid", "dclid", "msclkid", "_ga", "_gl", "mc_cid", "mc_eid",
+    "cmpid", "ocid", "ito", "sr_share", "taid", "guccounter", "guce_referrer", "guce_referrer_sig",
+    "smid", "icid", "ncid", "outputtype", "amp", "amp_js_v", "usqp", "__twitter_impression", "igshid",
+}
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_", "mtm_")
+
+# Host prefixes that serve the same article as the bare host
+MIRROR_HOST_PREFIXES = ("www.", "amp.", "m.", "mobile.")
+
+SHORTENER_HOSTS = {
+    "t.co", "bit.ly", "lnkd.in", "ow.ly", "buff.ly", "trib.al", "tinyurl.com", "goo.gl",
+    "news.google.com", "feedproxy.google.com", "feeds.feedburner.com", "dlvr.it", "rebrand.ly",
+}
+
+AMP_PATH_RE = re.compile(r"(/amp/?$|/amp(?=/)|\.amp(?=\.html?$)|\.amp$)", re.IGNORECASE)
+
+_redirect_lock = threading.Lock()
+_redirect_cache: Optional[Dict[str, str]] = None
+_policy: Optional[Any] = None
+
+
+def _strip_mirror_prefix(host: str) -> str:
+    for prefix in MIRROR_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") >= 2:
+            return host[len(prefix):]
+    return host
+
+
+def canonicalize_url(url: str, resolve: Any = None) -> str:
+    """Returns the canonical form of `url` used for dedupe (not for fetching).
+    `resolve`: None (use config), or NO / SHORTENERS / ALL."""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = f"https://{url}"
+
+    if resolve is None:
+        resolve = redirect_policy()
+    if resolve:
+        url = resolve_redirect(url, only_shorteners=str(resolve).upper() != "ALL")
+
+    parsed = urlparse(url)
+    scheme = "https" if parsed.scheme.lower() in ("http", "https") else parsed.scheme.lower()
+
+    host = (parsed.hostname or "").lower().rstrip(".")
+    host = _strip_mirror_prefix(host)
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+
+    path = AMP_PATH_RE.sub("", parsed.path or "")
+    path = re.sub(r"/{2,}", "/", path).rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+
+def url_key(url: str, resolve: Any = None) -> str:
+    """Short stable hash of the canonical URL. Empty string for empty URLs."""
+    canonical = canonicalize_url(url, resolve=resolve)
+    if not canonical:
+        return ""
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def row_key(row: Dict[str, Any]) -> str:
+    """Uses the persisted `url_key` column when present, else computes it from `url`."""
+    key = str(row.get("url_key") or "").strip()
+    if key and key.lower() != "nan":
+        return key
+    return url_key(str(row.get("url") or ""))
+
+
+def frame_keys(df: Any) -> Any:
+    """Series of url keys for a DataFrame (persisted column first, computed for legacy rows)."""
+    import pandas as pd
+    if df.empty:
+        return pd.Series([], dtype=str)
+    return pd.Series([row_key(r) for r in df.to_dict("records")], index=df.index, dtype=str)
+
+
+# --- Redirect resolution (cached) ---
+
+def redirect_policy() -> Any:
+    """NO -> False, otherwise 'SHORTENERS' or 'ALL' from _run_config.md (read once per process)."""
+    global _policy
+    if _policy is None:
+        value = load_config().get("RESOLVE_REDIRECTS", "SHORTENERS")
+        _policy = False if value is False else str(value).upper()
+    return _policy
+
+
+def _cache() -> Dict[str, str]:
+    global _redirect_cache
+    if _redirect_cache is None:
+        _redirect_cache = load_json_state(REDIRECT_CACHE_PATH, {})
+    return _redirect_cache
+
+
+def resolve_redirect(url: str, only_shorteners: bool = True, timeout: float = 5.0) -> str:
+    """Follows redirects with a HEAD request. Results (including failures) are cached in .tmp."""
+    host = _strip_mirror_prefix((urlparse(url).hostname or "").lower())
+    if only_shorteners and host not in SHORTENER_HOSTS:
+        return url
+
+    with _redirect_lock:
+        cached = _cache().get(url)
+    if cached is not None:
+        return cached or url
+
+    final = ""
+    try:
+        resp = replay.http_request("HEAD", url, allow_redirects=True, timeout=timeout,
+                                   headers={"User-Agent": "Mozilla/5.0"})
+        final = str(resp.url or "")
+    except Exception as e:
+        logger.debug(f"Redirect resolution failed for {url}: {e}")
+
+    with _redirect_lock:
+        cache = _cache()
+        cache[url] = final if final != url else ""
+        try:
+            save_json_state(REDIRECT_CACHE_PATH, cache)
+        except Exception as e:
+            logger.debug(f"Could not persist redirect cache: {e}")
+    return final or url
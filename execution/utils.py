@@ -2,17 +2,25 @@ import os
 import re
 import csv
 import json
+import time
+import atexit
 import logging
+import threading
 from time import sleep
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
 import gspread # Import at top level to avoid scope issues
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from execution import replay
+
 # Load env vars
 load_dotenv()
 
@@ -85,6 +93,33 @@ def load_config() -> Dict[str, Any]:
                 
     return config
 
+def config_list(value: Any) -> List[str]:
+    """Splits a comma-separated config value into a clean list."""
+    if not value or value is True:
+        return []
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+# --- Local State (.tmp) ---
+
+def load_json_state(path: str, default: Any) -> Any:
+    """Reads a JSON state file from .tmp. Returns `default` if missing or unreadable."""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read state file {path}: {e}. Starting fresh.")
+        return default
+
+def save_json_state(path: str, data: Any):
+    """Atomically writes a JSON state file (write to temp file, then rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
 # --- Data Access (Sheet vs CSV) ---
 
 class DataManager:
@@ -98,6 +133,11 @@ class DataManager:
         self.gc = None
         self.workbook = None
         self.drive_service = None # For folder management
+
+        # Replay runs never touch Google; reads come from the cassette, writes go to CSV under it.
+        if replay.is_replaying():
+            logger.info("Replay mode: Google Sheets disabled.")
+            return
         
         # Check for Authenticated User Token (Preferred)
         if self.token_path and os.path.exists(self.token_path):
@@ -130,6 +170,9 @@ class DataManager:
             logger.info("No valid Google credentials found. Using CSV mode.")
 
     def _get_csv_path(self, tab_name: str) -> str:
+        if replay.is_replaying():
+            os.makedirs(replay.output_dir(), exist_ok=True)
+            return os.path.join(replay.output_dir(), f"{tab_name}.csv")
         return os.path.join(BASE_DIR, f"{tab_name}.csv")
 
     def _get_or_create_folder_id(self, folder_name: str) -> Optional[str]:
@@ -272,6 +315,12 @@ class DataManager:
 
     def read_data(self, tab_name: str) -> pd.DataFrame:
         """Reads data from the specified tab/file."""
+        return replay.through(
+            "sheets", ["read", tab_name], lambda: self._read_data_live(tab_name),
+            encode=replay.records_to_json, decode=replay.records_from_json
+        )
+
+    def _read_data_live(self, tab_name: str) -> pd.DataFrame:
         if self.use_sheets:
             try:
                 sh = self.gc.open(SHEET_NAME_DEFAULT)
@@ -332,21 +381,200 @@ def get_bucket_queries(lane: str) -> List[str]:
 
 # --- LLM Helper ---
 
-def query_llm(prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.0) -> str:
-    """Simple wrapper for OpenAI LLM calls. Returns content string."""
+LLM_LATENCY_PATH = os.path.join(TMP_DIR, "llm_latency.json")
+LLM_LATENCY_WINDOW = 200  # samples kept per call site
+LLM_LATENCY_SAVE_INTERVAL = 30.0  # seconds between writes of the latency file while a stage runs
+
+class LatencyHistogram:
+    """Rolling window of LLM latencies per call site (e.g. 'pass1_scoring').
+    Persisted under .tmp so the p95 is already warm at the start of the next run: written
+    at most every `save_interval` seconds while samples arrive, and by `flush()` at the end
+    of each stage (and at exit)."""
+
+    def __init__(self, path: str = LLM_LATENCY_PATH, window: int = LLM_LATENCY_WINDOW,
+                 save_interval: float = LLM_LATENCY_SAVE_INTERVAL):
+        self.path = path
+        self.window = window
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._samples: Optional[Dict[str, deque]] = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> Dict[str, deque]:
+        if self._samples is None:
+            raw = load_json_state(self.path, {})
+            self._samples = {k: deque(v, maxlen=self.window) for k, v in raw.items()}
+        return self._samples
+
+    def record(self, call_site: str, seconds: float):
+        with self._lock:
+            samples = self._load()
+            samples.setdefault(call_site, deque(maxlen=self.window)).append(round(seconds, 3))
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def flush(self):
+        """Writes pending samples to disk."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        # Caller holds the lock
+        self._saved_at = time.monotonic()
+        try:
+            save_json_state(self.path, {k: list(v) for k, v in self._samples.items()})
+            self._dirty = False
+        except Exception as e:
+            logger.debug(f"Could not persist LLM latency samples: {e}")
+
+    def percentile(self, call_site: str, pct: float, min_samples: int = 20) -> Optional[float]:
+        """Returns the pct-th percentile latency, or None until enough samples exist."""
+        with self._lock:
+            samples = sorted(self._load().get(call_site, []))
+        if len(samples) < max(1, min_samples):
+            return None
+        idx = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[idx]
+
+LLM_LATENCY = LatencyHistogram()
+atexit.register(LLM_LATENCY.flush)
+
+def _make_llm_client(secondary: bool = False) -> Optional[OpenAI]:
+    """Builds an OpenAI client. The secondary client may point at another OpenAI-compatible provider."""
+    if secondary and os.getenv("LLM_HEDGE_BASE_URL"):
+        api_key = os.getenv("LLM_HEDGE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        return OpenAI(api_key=api_key, base_url=os.getenv("LLM_HEDGE_BASE_URL"))
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
+        return None
+    return OpenAI(api_key=api_key)
+
+def _chat_completion(client: OpenAI, prompt: str, model: str, temperature: float) -> str:
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature
+    )
+    return response.choices[0].message.content.strip()
+
+@lru_cache(maxsize=1)
+def _hedge_config() -> Dict[str, Any]:
+    """Hedging keys from _run_config.md, read once per process (query_llm runs per row)."""
+    config = load_config()
+    hedge_model = str(config.get("LLM_HEDGE_MODEL", "SAME")).strip()
+    return {
+        "enabled": bool(config.get("LLM_HEDGING", False)),
+        "call_sites": set(config_list(config.get("LLM_HEDGE_CALL_SITES", "pass1_scoring"))),
+        "percentile": float(config.get("LLM_HEDGE_PERCENTILE", 95)),
+        "min_samples": int(config.get("LLM_HEDGE_MIN_SAMPLES", 20)),
+        "model": None if hedge_model.upper() in ("", "SAME") else hedge_model,
+    }
+
+def _hedge_settings(call_site: Optional[str], config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Returns hedging settings if hedging is enabled for this call site, else None."""
+    if not call_site:
+        return None
+    config = config or _hedge_config()
+    if not config["enabled"] or call_site not in config["call_sites"]:
+        return None
+    return {"percentile": config["percentile"], "min_samples": config["min_samples"], "model": config["model"]}
+
+def _query_llm_hedged(prompt: str, model: str, temperature: float, call_site: str, settings: Dict[str, Any]) -> str:
+    """Sends the request; if it runs past the call site's p95, sends a duplicate.
+    First non-empty answer wins; the other request's client is closed to abort it."""
+    delay = LLM_LATENCY.percentile(call_site, settings["percentile"], settings["min_samples"])
+    primary_client = _make_llm_client()
+    if primary_client is None:
         logger.error("OPENAI_API_KEY not found.")
         return ""
-        
-    client = OpenAI(api_key=api_key)
+
+    # One latency sample per logical call: the primary's own time, or the censored time
+    # at which the hedge won (the primary finishing later must not add a second one)
+    sample_lock = threading.Lock()
+    sampled = []
+
+    def record_once(seconds: float):
+        with sample_lock:
+            if sampled:
+                return
+            sampled.append(seconds)
+        LLM_LATENCY.record(call_site, seconds)
+
+    def attempt(client: OpenAI, attempt_model: str, is_primary: bool) -> str:
+        attempt_started = time.monotonic()
+        text = _chat_completion(client, prompt, attempt_model, temperature)
+        if is_primary:
+            record_once(time.monotonic() - attempt_started)
+        return text
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    started = time.monotonic()
+    primary = pool.submit(attempt, primary_client, model, True)
+    clients = {primary: primary_client}
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature
-        )
-        return response.choices[0].message.content.strip()
+        done, _ = wait([primary], timeout=delay)
+        if not done:
+            hedge_client = _make_llm_client(secondary=True)
+            if hedge_client is not None:
+                logger.info(f"LLM call '{call_site}' passed p95 ({delay:.1f}s). Sending hedge request.")
+                hedge = pool.submit(attempt, hedge_client, settings["model"] or model, False)
+                clients[hedge] = hedge_client
+
+        pending = set(clients)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    text = fut.result()
+                except Exception as e:
+                    logger.warning(f"LLM attempt failed ({call_site}): {e}")
+                    continue
+                if text:
+                    if fut is not primary:
+                        logger.info(f"Hedge request won for '{call_site}'.")
+                    return text
+        logger.error(f"LLM call failed ({call_site}): all attempts failed or returned empty.")
+        return ""
+    finally:
+        for fut, client in clients.items():
+            if not fut.done():
+                if fut is primary:
+                    # Censored sample: the primary took at least this long.
+                    record_once(time.monotonic() - started)
+                try:
+                    client.close()
+                except Exception:
+                    pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def query_llm(prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.0, call_site: Optional[str] = None) -> str:
+    """Simple wrapper for OpenAI LLM calls. Returns content string.
+    `call_site` labels the caller for latency tracking; hedging only applies to call
+    sites listed in LLM_HEDGE_CALL_SITES (cheap, idempotent calls like pass 1 scoring)."""
+    return replay.through(
+        "llm", [model, temperature, prompt],
+        lambda: _query_llm_live(prompt, model, temperature, call_site)
+    )
+
+def _query_llm_live(prompt: str, model: str, temperature: float, call_site: Optional[str]) -> str:
+    settings = _hedge_settings(call_site)
+    if settings:
+        return _query_llm_hedged(prompt, model, temperature, call_site, settings)
+
+    client = _make_llm_client()
+    if client is None:
+        logger.error("OPENAI_API_KEY not found.")
+        return ""
+
+    try:
+        started = time.monotonic()
+        text = _chat_completion(client, prompt, model, temperature)
+        if call_site:
+            LLM_LATENCY.record(call_site, time.monotonic() - started)
+        return text
     except Exception as e:
         logger.error(f"LLM call failed: {e}")
         return ""